@@ -0,0 +1,52 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, ConfigDict, Field
+
+from utils.deps import get_db, get_current_user
+from utils.db import DB
+
+router = APIRouter(tags=["analytics"])
+
+
+class MerchantSpend(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "merchantId": 42,
+            "name": "RAPPI",
+            "spend": 185400,
+            "count": 11
+        }
+    })
+
+    merchantId: int = Field(..., description="Interned merchant identifier")
+    name: str = Field(..., description="Canonical merchant name")
+    spend: int = Field(..., description="Total spend in minor units (positive)")
+    count: int = Field(..., description="Number of expense transactions")
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(400, f"{name} must be YYYY-MM-DD")
+
+
+@router.get(
+    "/merchants",
+    response_model=List[MerchantSpend],
+    summary="Top merchants by spend",
+    description="Return the top-N merchants by expense total in an optional date range, grouped by canonical merchant."
+)
+def api_top_merchants(
+    date_from: Optional[str] = Query(None, alias="from", description="Start date YYYY-MM-DD (inclusive)"),
+    date_to: Optional[str] = Query(None, alias="to", description="End date YYYY-MM-DD (inclusive)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of merchants to return"),
+    current_user=Depends(get_current_user),
+    db: DB = Depends(get_db),
+):
+    df = _parse_date(date_from, "from")
+    dt = _parse_date(date_to, "to")
+    return db.top_merchants(current_user["user_id"], df, dt, limit)
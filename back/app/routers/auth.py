@@ -1,11 +1,10 @@
-import hashlib
+import math
 import os
-import binascii
 import secrets
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, ConfigDict, Field
 
 import logging
@@ -13,6 +12,8 @@ import logging
 logger = logging.getLogger("auth")
 from utils.deps import create_access_token, get_db
 from utils.db import DB
+from utils.password_hashing import HashPoolBusy, derive_password
+from utils.rate_limit import TokenBucketLimiter
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -20,6 +21,18 @@ DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "CLP")
 # OWASP 2023 minimum for PBKDF2-HMAC-SHA256.
 PBKDF2_ITERATIONS = int(os.getenv("AUTH_PBKDF2_ITERATIONS", "600000"))
 PBKDF2_ALGO = "PBKDF2-HMAC-SHA256"
+# Login attempts are throttled per email and per client IP before any lookup
+# or hashing, so guessing passwords or enumerating accounts cannot buy CPU.
+LOGIN_EMAIL_LIMITER = TokenBucketLimiter(
+    capacity=float(os.getenv("AUTH_LOGIN_EMAIL_BURST", "5")),
+    refill_per_second=float(os.getenv("AUTH_LOGIN_EMAIL_PER_MINUTE", "5")) / 60,
+)
+LOGIN_IP_LIMITER = TokenBucketLimiter(
+    capacity=float(os.getenv("AUTH_LOGIN_IP_BURST", "20")),
+    refill_per_second=float(os.getenv("AUTH_LOGIN_IP_PER_MINUTE", "30")) / 60,
+)
+# Retry-After sent when every derivation slot in the hash pool is taken.
+HASH_BUSY_RETRY_SECONDS = 1
 
 
 class AuthRequest(BaseModel):
@@ -47,9 +60,31 @@ class TokenResponse(BaseModel):
 
 
 def _derive_password(password: str, salt: bytes, iterations: int = PBKDF2_ITERATIONS) -> str:
-    """PBKDF2-HMAC-SHA256 hex digest."""
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
-    return binascii.hexlify(dk).decode()
+    """PBKDF2-HMAC-SHA256 hex digest, computed in the bounded hash pool."""
+    try:
+        return derive_password(password, salt, iterations)
+    except HashPoolBusy:
+        logger.warning("Password hash pool full; rejecting attempt")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, try again shortly",
+            headers={"Retry-After": str(HASH_BUSY_RETRY_SECONDS)},
+        )
+
+
+def _throttle(limiter: TokenBucketLimiter, key: str) -> None:
+    wait = limiter.acquire(key)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def _client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client.
+    return request.client.host if request.client else "unknown"
 
 
 def _get_user_by_email(db: DB, email: str):
@@ -112,11 +147,14 @@ def _new_user_item(email: str, password: str) -> dict:
     summary="Log in",
     description="Authenticate a user and return a bearer token."
 )
-def login(body: AuthRequest, db: DB = Depends(get_db)):
+def login(body: AuthRequest, request: Request, db: DB = Depends(get_db)):
     logger.info("Login attempt for email=%s", body.email)
     if not body.email or not body.password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing credentials")
 
+    _throttle(LOGIN_IP_LIMITER, _client_ip(request))
+    _throttle(LOGIN_EMAIL_LIMITER, body.email.strip().lower())
+
     user = _get_user_by_email(db, body.email)
     if not user:
         logger.warning("Login failed: user not found for email=%s", body.email)
@@ -151,10 +189,12 @@ def login(body: AuthRequest, db: DB = Depends(get_db)):
     summary="Sign up",
     description="Create a new user account and return a bearer token."
 )
-def signup(body: AuthRequest, db: DB = Depends(get_db)):
+def signup(body: AuthRequest, request: Request, db: DB = Depends(get_db)):
     if not body.email or not body.password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing credentials")
 
+    _throttle(LOGIN_IP_LIMITER, _client_ip(request))
+
     existing = _get_user_by_email(db, body.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
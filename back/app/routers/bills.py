@@ -1,7 +1,8 @@
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, ConfigDict, Field
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+import calendar
 
 from utils.deps import get_db, get_current_user
 from utils.db import DB, list_bills
@@ -51,10 +52,27 @@ class BillOut(BaseModel):
     updatedAt: str | None = Field(None, description="Last update timestamp (ISO8601)")
 
 
+class MaterializeResult(BaseModel):
+    through: str = Field(..., description="Last month materialized (YYYY-MM)")
+    created: int = Field(..., description="Bills created by this call; existing occurrences are skipped")
+
+
+# How far ahead a client may ask bills to be materialized.
+MAX_MATERIALIZE_MONTHS = 24
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _month_end(month: str) -> date:
+    """'YYYY-MM' -> last day of that month; raises ValueError on bad input."""
+    year, mon = (int(part) for part in month.split("-"))
+    if len(month) != 7:
+        raise ValueError(month)
+    return date(year, mon, calendar.monthrange(year, mon)[1])
+
+
 def _public_bill(item: dict) -> BillOut:
     return BillOut(
         billId=item.get("billId"),
@@ -88,6 +106,28 @@ def api_list_bills(
     return [_public_bill(i) for i in items]
 
 
+@router.post(
+    "/materialize",
+    response_model=MaterializeResult,
+    summary="Materialize bills",
+    description=(
+        "Expand the user's active recurring rules into PROJECTED bills from the current month "
+        "through the given month. Idempotent: each (rule, period) is created once."
+    )
+)
+def api_materialize_bills(through: str, current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    try:
+        through_date = _month_end(through)
+    except ValueError:
+        raise HTTPException(400, "through must be YYYY-MM")
+    today = datetime.now(timezone.utc).date()
+    months_ahead = (through_date.year - today.year) * 12 + through_date.month - today.month
+    if months_ahead > MAX_MATERIALIZE_MONTHS:
+        raise HTTPException(400, f"through must be at most {MAX_MATERIALIZE_MONTHS} months ahead")
+    created = db.materialize_bills(through_date, today.replace(day=1), user_ids=[current_user["user_id"]])
+    return {"through": through, "created": created}
+
+
 @router.patch(
     "/{bill_id}",
     response_model=BillOut,
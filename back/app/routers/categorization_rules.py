@@ -0,0 +1,135 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, ConfigDict, Field
+
+from utils.deps import get_db, get_current_user
+from utils.db import DB
+
+router = APIRouter(tags=["categorization-rules"])
+
+
+class CategorizationRuleIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "pattern": "UBER",
+            "field": "description",
+            "categoryId": "cat_transport",
+            "notes": "ride",
+            "priority": 0,
+            "isActive": True
+        }
+    })
+
+    pattern: str = Field(..., min_length=1, description="Case- and accent-insensitive substring to look for")
+    field: str = Field("any", pattern="^(merchant|description|notes|any)$", description="Transaction field the pattern applies to")
+    categoryId: str = Field(..., description="Category assigned when the rule matches")
+    notes: Optional[str] = Field(None, description="Notes applied when the transaction has none")
+    priority: int = Field(0, description="Higher priority wins when several rules match")
+    isActive: bool = Field(True, description="Inactive rules are kept but never applied")
+
+
+class CategorizationRule(CategorizationRuleIn):
+    ruleId: str = Field(..., description="Rule identifier")
+    createdAt: str | None = Field(None, description="Creation timestamp (ISO8601)")
+    updatedAt: str | None = Field(None, description="Last update timestamp (ISO8601)")
+
+
+class CategorizationRulePatch(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "priority": 10,
+            "isActive": False
+        }
+    })
+
+    pattern: Optional[str] = Field(None, min_length=1, description="Updated pattern")
+    field: Optional[str] = Field(default=None, pattern="^(merchant|description|notes|any)$", description="Updated field scope")
+    categoryId: Optional[str] = Field(None, description="Updated category")
+    notes: Optional[str] = Field(None, description="Updated notes")
+    priority: Optional[int] = Field(None, description="Updated priority")
+    isActive: Optional[bool] = Field(None, description="Enable/disable the rule")
+
+
+class ApplyRulesResult(BaseModel):
+    scanned: int = Field(..., description="Transactions examined")
+    updated: int = Field(..., description="Transactions whose category or notes changed")
+
+
+def _public_rule(item: dict) -> CategorizationRule:
+    return CategorizationRule(
+        ruleId=item.get("ruleId"),
+        pattern=item.get("pattern"),
+        field=item.get("field"),
+        categoryId=item.get("categoryId"),
+        notes=item.get("notes"),
+        priority=item.get("priority", 0),
+        isActive=item.get("isActive", True),
+        createdAt=item.get("createdAt"),
+        updatedAt=item.get("updatedAt"),
+    )
+
+
+def _require_category(db: DB, user_id: str, category_id: str) -> None:
+    # Rules may only point at the caller's own categories.
+    if not db.get_category(user_id, category_id):
+        raise HTTPException(404, "Category not found")
+
+
+@router.get(
+    "",
+    response_model=List[CategorizationRule],
+    summary="List categorization rules",
+    description="Return the authenticated user's categorization rules in evaluation order."
+)
+def api_list_rules(current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    return [_public_rule(i) for i in db.list_categorization_rules(current_user["user_id"])]
+
+
+@router.post(
+    "",
+    response_model=CategorizationRule,
+    summary="Create categorization rule",
+    description="Create a rule applied to new, imported and (via /apply) existing transactions."
+)
+def api_create_rule(payload: CategorizationRuleIn, current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    _require_category(db, current_user["user_id"], payload.categoryId)
+    item = db.create_categorization_rule(current_user["user_id"], payload.model_dump())
+    return _public_rule(item)
+
+
+@router.post(
+    "/apply",
+    response_model=ApplyRulesResult,
+    summary="Apply rules to history",
+    description="Run the user's rules over every stored transaction. Categorized transactions are skipped unless overwrite=true."
+)
+def api_apply_rules(overwrite: bool = False, current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    return db.apply_categorization_rules(current_user["user_id"], overwrite=overwrite)
+
+
+@router.patch(
+    "/{rule_id}",
+    response_model=CategorizationRule,
+    summary="Update categorization rule",
+    description="Update fields on a categorization rule."
+)
+def api_update_rule(rule_id: str, payload: CategorizationRulePatch, current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    updates = payload.model_dump(exclude_none=True)
+    if "categoryId" in updates:
+        _require_category(db, current_user["user_id"], updates["categoryId"])
+    updated = db.update_categorization_rule(current_user["user_id"], rule_id, updates)
+    if not updated:
+        raise HTTPException(404, "Categorization rule not found")
+    return _public_rule(updated)
+
+
+@router.delete(
+    "/{rule_id}",
+    summary="Delete categorization rule",
+    description="Delete a categorization rule. Already-categorized transactions keep their category."
+)
+def api_delete_rule(rule_id: str, current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    ok = db.delete_categorization_rule(current_user["user_id"], rule_id)
+    if not ok:
+        raise HTTPException(404, "Categorization rule not found")
+    return {"deleted": True}
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, ConfigDict, Field
+
+from utils.deps import get_db, get_current_user
+from utils.db import DB
+
+router = APIRouter(tags=["forecast"])
+
+
+class ForecastPoint(BaseModel):
+    date: str = Field(..., description="Day (YYYY-MM-DD)")
+    balance: int = Field(..., description="Projected end-of-day balance in minor units")
+    scheduled: int = Field(..., description="Net bills and recurring amounts falling on this day")
+
+
+class CategoryBaseline(BaseModel):
+    categoryId: Optional[str] = Field(None, description="Category (null for uncategorized spend)")
+    dailyAverage: int = Field(..., description="Average daily discretionary spend in minor units")
+
+
+class Forecast(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "startDate": "2026-02-05",
+            "days": 90,
+            "startingBalance": 1250000,
+            "dailyDiscretionary": 8400,
+            "endingBalance": 905000,
+            "lowest": {"date": "2026-03-01", "balance": 610000, "scheduled": -450000},
+            "points": [{"date": "2026-02-06", "balance": 1241600, "scheduled": 0}],
+            "baseline": [{"categoryId": "cat_groceries", "dailyAverage": 5100}]
+        }
+    })
+
+    startDate: str = Field(..., description="Day the projection starts from (today)")
+    days: int = Field(..., description="Number of projected days")
+    startingBalance: int = Field(..., description="Sum of all transactions so far")
+    dailyDiscretionary: int = Field(..., description="Total average daily discretionary spend applied to every day")
+    endingBalance: int = Field(..., description="Projected balance on the last day")
+    lowest: Optional[ForecastPoint] = Field(None, description="Day with the lowest projected balance")
+    points: List[ForecastPoint] = Field(..., description="One point per projected day")
+    baseline: List[CategoryBaseline] = Field(..., description="Discretionary baseline per category, largest first")
+
+
+@router.get(
+    "",
+    response_model=Forecast,
+    summary="Cash-flow forecast",
+    description=(
+        "Project a daily balance from recurring rule occurrences, unpaid bills and each category's "
+        "average daily discretionary spend over the last 90 days."
+    )
+)
+def api_forecast(
+    days: int = Query(90, ge=1, le=365, description="Days to project"),
+    current_user=Depends(get_current_user),
+    db: DB = Depends(get_db),
+):
+    today = datetime.now(timezone.utc).date()
+    return db.forecast(current_user["user_id"], today, days)
@@ -36,6 +36,52 @@ class OcrCallbackPayload(BaseModel):
     ocrError: Optional[str] = Field(None, description="Error description on failure")
     parsedReceipt: Optional[Dict[str, Any]] = Field(None, description="Normalized parsed receipt JSON")
     needsReview: Optional[bool] = Field(None, description="Whether UI review should be required")
+    contentSha256: Optional[str] = Field(None, description="Hex SHA-256 of the image bytes")
+    ocrCacheHit: Optional[bool] = Field(None, description="Provider output came from the OCR cache")
+
+
+# One SQS batch (up to 10 records, more with a batching window) per request.
+MAX_CALLBACK_BATCH = 100
+
+
+class OcrCallbackBatch(BaseModel):
+    results: List[OcrCallbackPayload] = Field(
+        ..., min_length=1, max_length=MAX_CALLBACK_BATCH, description="OCR results to apply"
+    )
+
+
+class OcrCacheLookupIn(BaseModel):
+    hashes: List[str] = Field(..., max_length=MAX_CALLBACK_BATCH, description="Hex SHA-256 image hashes")
+
+
+class OcrCacheEntryOut(BaseModel):
+    provider: str = Field(..., description="Provider that produced the output")
+    rawText: str = Field(..., description="Raw OCR text")
+    rawBlocks: List[Dict[str, Any]] = Field(..., description="Raw OCR block payload")
+    confidence: Optional[float] = Field(None, description="Overall confidence")
+
+
+class OcrCacheLookupOut(BaseModel):
+    entries: Dict[str, OcrCacheEntryOut] = Field(..., description="Cached provider output by hash (hits only)")
+    hits: int = Field(..., description="Hashes found")
+    misses: int = Field(..., description="Hashes not cached")
+
+
+class OcrCallbackBatchItem(BaseModel):
+    receiptId: str = Field(..., description="Receipt id")
+    updated: bool = Field(..., description="False when the receipt no longer exists")
+
+
+class OcrCallbackBatchOut(BaseModel):
+    updated: int = Field(..., description="Receipts updated")
+    results: List[OcrCallbackBatchItem] = Field(..., description="Per-result outcome, in request order")
+
+
+def _link_done_receipts(db: DB, payloads: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> None:
+    """Match receipts that just reached ocr_done to the transactions that paid them."""
+    done = [p["receiptId"] for p, r in zip(payloads, results) if r["updated"] and p.get("status") == "ocr_done"]
+    if done:
+        db.match_receipt_transactions(receipt_ids=done)
 
 
 def _verify_internal_token(x_internal_token: Optional[str] = Header(default=None)) -> None:
@@ -53,11 +99,49 @@ def ocr_callback(
     _: None = Depends(_verify_internal_token),
     db: DB = Depends(get_db),
 ):
-    updates = payload.model_dump(exclude_none=True)
-    updates.pop("userId", None)
-    updates.pop("receiptId", None)
-    updated = db.update_receipt(payload.userId, payload.receiptId, updates)
-    if not updated:
+    payloads = [payload.model_dump(exclude_none=True)]
+    [result] = db.apply_ocr_results(payloads)
+    if not result["updated"]:
         raise HTTPException(status_code=404, detail="Receipt not found")
+    _link_done_receipts(db, payloads, [result])
     return {"updated": True, "receiptId": payload.receiptId}
 
+
+@router.post(
+    "/receipts/ocr-callback:batch",
+    response_model=OcrCallbackBatchOut,
+    summary="Internal OCR callback (batch)",
+    description=(
+        "Apply a batch of OCR results in one transaction. Missing receipts are "
+        "reported per item with `updated: false` instead of failing the batch. Receipts that "
+        "reach `ocr_done` are then linked to a matching transaction when one exists."
+    ),
+)
+def ocr_callback_batch(
+    payload: OcrCallbackBatch,
+    _: None = Depends(_verify_internal_token),
+    db: DB = Depends(get_db),
+):
+    payloads = [item.model_dump(exclude_none=True) for item in payload.results]
+    results = db.apply_ocr_results(payloads)
+    _link_done_receipts(db, payloads, results)
+    return {"updated": sum(r["updated"] for r in results), "results": results}
+
+
+
+@router.post(
+    "/ocr-cache:lookup",
+    response_model=OcrCacheLookupOut,
+    summary="Internal OCR cache lookup",
+    description=(
+        "Provider output cached by image SHA-256. The OCR worker calls this once per batch and skips "
+        "the provider for every hit; results posted back with `contentSha256` fill the cache."
+    ),
+)
+def ocr_cache_lookup(
+    payload: OcrCacheLookupIn,
+    _: None = Depends(_verify_internal_token),
+    db: DB = Depends(get_db),
+):
+    entries = db.lookup_ocr_cache(payload.hashes)
+    return {"entries": entries, "hits": len(entries), "misses": len(set(payload.hashes)) - len(entries)}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 
 from utils.deps import get_current_user
-from . import auth, categories, budgets, recurring, bills, transactions, receipts, user, objectives, internal
+from . import auth, categories, budgets, recurring, bills, transactions, receipts, user, objectives, internal, categorization_rules, analytics, merchants, search, forecast, storage
 
 # Public router (no auth)
 public_router = APIRouter()
@@ -14,16 +14,22 @@ def health():
 
 public_router.include_router(auth.router)
 public_router.include_router(internal.router)
+public_router.include_router(storage.router)
 
 
 # Protected router (requires auth)
 protected_router = APIRouter(dependencies=[Depends(get_current_user)])
 
 protected_router.include_router(categories.router, prefix="/categories")
+protected_router.include_router(categorization_rules.router, prefix="/categorization-rules")
 protected_router.include_router(budgets.router, prefix="/budgets")
 protected_router.include_router(recurring.router, prefix="/recurring")
 protected_router.include_router(bills.router, prefix="/bills")
 protected_router.include_router(transactions.router, prefix="/transactions")
 protected_router.include_router(receipts.router, prefix="/receipts")
 protected_router.include_router(objectives.router, prefix="/objectives")
+protected_router.include_router(analytics.router, prefix="/analytics")
+protected_router.include_router(merchants.router, prefix="/merchants")
+protected_router.include_router(search.router, prefix="/search")
+protected_router.include_router(forecast.router, prefix="/forecast")
 protected_router.include_router(user.router)
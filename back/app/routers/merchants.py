@@ -0,0 +1,35 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, ConfigDict, Field
+
+from utils.deps import get_db, get_current_user
+from utils.db import DB
+
+router = APIRouter(tags=["merchants"])
+
+
+class MerchantSuggestion(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "merchant": "Starbucks",
+            "count": 14
+        }
+    })
+
+    merchant: str = Field(..., description="Merchant as the user usually writes it")
+    count: int = Field(..., description="Number of the user's transactions with this merchant")
+
+
+@router.get(
+    "/suggest",
+    response_model=List[MerchantSuggestion],
+    summary="Suggest merchants",
+    description="Autocomplete merchants the user has already used, matching a case- and accent-insensitive prefix, most frequent first."
+)
+def api_suggest_merchants(
+    q: str = Query("", description="Prefix typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum suggestions"),
+    current_user=Depends(get_current_user),
+    db: DB = Depends(get_db),
+):
+    return db.merchant_suggestions(current_user["user_id"], q, limit)
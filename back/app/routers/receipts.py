@@ -1,19 +1,39 @@
-from typing import Optional, List, Any, Dict
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import Optional, List, Any, Dict, Iterator, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, ConfigDict, Field
+import json
+import mimetypes
+import os
 import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
 from datetime import datetime, timezone
-from pathlib import Path
 
 from utils.deps import get_db, get_current_user
-from utils.db import DB, list_receipts
+from utils.db import DB, RECEIPT_OCR_PAYLOAD_FIELDS, get_session, list_receipts
+from utils.ocr_queue import get_ocr_queue
+from utils.receipt_images import stale_upload_key, store_receipt_image, store_uploaded_image
+from utils.storage import (
+    ALLOWED_CONTENT_TYPES,
+    MAX_UPLOAD_BYTES,
+    UPLOAD_EXPIRES_SECONDS,
+    get_storage,
+    is_upload_key,
+    receipt_key,
+    upload_key,
+)
 
 router = APIRouter(tags=["receipts"])
+logger = logging.getLogger("receipts")
 
-# Local directory used to persist uploaded receipt images in dev. In production
-# this would be an S3 presigned upload; we mimic it with a predictable URL.
-UPLOAD_DIR = Path("/tmp/receipts")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Batch upload: files per request (ZIP members count individually) and total bytes read.
+MAX_BATCH_FILES = 50
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+# Files stored concurrently; each one preprocesses in the shared process pool.
+BATCH_UPLOAD_CONCURRENCY = int(os.getenv("RECEIPT_BATCH_CONCURRENCY", "4"))
 
 
 class ReceiptLineItem(BaseModel):
@@ -71,7 +91,7 @@ class ReceiptPatch(BaseModel):
     status: Optional[str] = Field(None, description="Updated status")
     imageUrl: Optional[str] = Field(None, description="Updated image URL")
     lineItems: Optional[List[ReceiptLineItem]] = Field(None, description="Updated line items")
-    transactionId: Optional[str] = Field(None, description="Updated linked transaction")
+    transactionId: Optional[str] = Field(None, description="Updated linked transaction; null unlinks it for good")
     ocrProvider: Optional[str] = Field(None, description="Updated OCR provider")
     ocrConfidence: Optional[float] = Field(None, description="Updated OCR confidence")
     ocrRawText: Optional[str] = Field(None, description="Updated OCR raw text")
@@ -96,14 +116,85 @@ class ReceiptOut(ReceiptIn):
     })
 
     receiptId: str = Field(..., description="Receipt identifier")
+    thumbnailUrl: Optional[str] = Field(None, description="Preprocessed thumbnail for list views (null for PDFs)")
+    ocrDispatch: Optional[str] = Field(None, description="OCR queue state: pending, enqueued, acked or failed (null: no OCR)")
+    ocrAttempts: int = Field(0, description="Times the receipt was sent to the OCR queue")
     createdAt: str | None = Field(None, description="Creation timestamp (ISO8601)")
     updatedAt: str | None = Field(None, description="Last update timestamp (ISO8601)")
 
 
+class ReceiptSummaryOut(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "receiptId": "rcpt_ab12cd34",
+            "merchant": "Starbucks",
+            "date": "2026-02-05",
+            "total": 6200,
+            "status": "processed",
+            "thumbnailUrl": "https://s3.example.com/receipts/u_001/rcpt_ab12cd34.thumb.jpg",
+            "needsReview": False
+        }
+    })
+
+    receiptId: str = Field(..., description="Receipt identifier")
+    merchant: str = Field(..., description="Merchant or store name")
+    date: str = Field(..., description="Receipt date YYYY-MM-DD")
+    total: int = Field(..., description="Total amount in minor units")
+    status: str = Field(..., description="Processing status")
+    thumbnailUrl: Optional[str] = Field(None, description="Preprocessed thumbnail (null for PDFs)")
+    needsReview: bool = Field(False, description="Whether manual review is recommended")
+
+
+class ReceiptUploadIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {"filename": "boleta.jpg", "contentType": "image/jpeg"}
+    })
+
+    filename: str = Field(..., description="Original file name")
+    contentType: str = Field(..., description="MIME type; must match the uploaded file")
+
+
+class ReceiptUploadOut(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "receiptId": "rcpt_ab12cd34",
+            "key": "receipts/u_001/rcpt_ab12cd34.jpg",
+            "url": "https://receipts-bucket.s3.amazonaws.com/",
+            "fields": {"key": "receipts/u_001/rcpt_ab12cd34.jpg", "Content-Type": "image/jpeg", "policy": "...", "x-amz-signature": "..."},
+            "expiresIn": 900
+        }
+    })
+
+    receiptId: str = Field(..., description="Id the receipt will get once the upload completes")
+    key: str = Field(..., description="Object key to pass back on completion")
+    url: str = Field(..., description="POST target for the multipart upload")
+    fields: Dict[str, str] = Field(..., description="Form fields to send before the `file` part")
+    expiresIn: int = Field(..., description="Seconds the upload form stays valid")
+
+
+class ReceiptUploadComplete(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {"key": "receipts/u_001/rcpt_ab12cd34.jpg"}
+    })
+
+    key: str = Field(..., description="Object key returned by POST /receipts/uploads")
+
+
+def _dispatch_ocr(db: DB, user_id: str, item: dict) -> dict:
+    """Enqueue a freshly stored receipt for OCR; failed sends stay pending for `jobs.dispatch_ocr`."""
+    db.dispatch_ocr(get_ocr_queue(), receipt_ids=[item["receiptId"]])
+    return db.get_receipt(user_id, item["receiptId"]) or item
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _thumbnail_url(uri: Optional[str]) -> Optional[str]:
+    # Stored as an s3:// reference; browsers get a presigned https link.
+    return get_storage().download_url(uri)
+
+
 def _public_receipt(item: dict) -> ReceiptOut:
     return ReceiptOut(
         receiptId=item.get("receiptId"),
@@ -112,6 +203,7 @@ def _public_receipt(item: dict) -> ReceiptOut:
         total=item.get("total", 0),
         status=item.get("status", ""),
         imageUrl=item.get("imageUrl"),
+        thumbnailUrl=_thumbnail_url(item.get("thumbnailUrl")),
         lineItems=item.get("lineItems", []) or [],
         transactionId=item.get("transactionId"),
         ocrProvider=item.get("ocrProvider"),
@@ -121,6 +213,8 @@ def _public_receipt(item: dict) -> ReceiptOut:
         ocrError=item.get("ocrError"),
         parsedReceipt=item.get("parsedReceipt"),
         needsReview=item.get("needsReview", False),
+        ocrDispatch=item.get("ocrDispatch"),
+        ocrAttempts=item.get("ocrAttempts") or 0,
         createdAt=item.get("createdAt"),
         updatedAt=item.get("updatedAt"),
     )
@@ -128,13 +222,48 @@ def _public_receipt(item: dict) -> ReceiptOut:
 
 @router.get(
     "",
-    response_model=List[ReceiptOut],
+    response_model=List[ReceiptSummaryOut],
     summary="List receipts",
-    description="List uploaded receipts for the authenticated user."
+    description=(
+        "List uploaded receipts for the authenticated user. Returns the compact list projection; "
+        "line items and OCR output come from `GET /receipts/{receiptId}`."
+    )
 )
 def api_list_receipts(current_user=Depends(get_current_user), db: DB = Depends(get_db)):
-    items = list_receipts(db, current_user["user_id"])
-    return [_public_receipt(i) for i in items]
+    return [
+        ReceiptSummaryOut(**(i | {"thumbnailUrl": _thumbnail_url(i["thumbnailUrl"])}))
+        for i in list_receipts(db, current_user["user_id"])
+    ]
+
+
+@router.get(
+    "/{receipt_id}",
+    response_model=ReceiptOut,
+    summary="Get receipt",
+    description=(
+        "Full receipt, including line items and OCR output. `fields` (comma-separated `ReceiptOut` field "
+        "names) returns only those fields plus `receiptId`; the OCR payload (`ocrRawText`, `ocrRawBlocks`, "
+        "`parsedReceipt`) is only read from the database when selected."
+    )
+)
+def api_get_receipt(
+    receipt_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. `lineItems,parsedReceipt`"),
+    current_user=Depends(get_current_user),
+    db: DB = Depends(get_db),
+):
+    selected = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+    unknown = sorted((selected or set()) - set(ReceiptOut.model_fields))
+    if unknown:
+        raise HTTPException(400, f"Unknown receipt fields: {', '.join(unknown)}")
+    payload = None if selected is None else [f for f in RECEIPT_OCR_PAYLOAD_FIELDS if f in selected]
+    item = db.get_receipt(current_user["user_id"], receipt_id, payload=payload)
+    if not item:
+        raise HTTPException(404, "Receipt not found")
+    receipt = _public_receipt(item)
+    if selected is None:
+        return receipt
+    return JSONResponse(jsonable_encoder(receipt.model_dump(include=selected | {"receiptId"})))
 
 
 @router.post(
@@ -148,11 +277,86 @@ def api_create_receipt(payload: ReceiptIn, current_user=Depends(get_current_user
     return _public_receipt(item)
 
 
+@router.post(
+    "/uploads",
+    response_model=ReceiptUploadOut,
+    summary="Start receipt upload",
+    description=(
+        "Reserve a receipt id and return a presigned POST (`url` + `fields`) for uploading the image "
+        "straight to object storage. No receipt exists until the upload is completed."
+    ),
+)
+def api_start_receipt_upload(payload: ReceiptUploadIn, current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    if payload.contentType not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(400, f"contentType must be one of {', '.join(ALLOWED_CONTENT_TYPES)}")
+    rcpt_id = f"rcpt_{uuid.uuid4().hex[:8]}"
+    while db.receipt_id_taken(rcpt_id):
+        rcpt_id = f"rcpt_{uuid.uuid4().hex[:8]}"
+    key = upload_key(current_user["user_id"], rcpt_id, payload.contentType)
+    form = get_storage().presign_post(key, payload.contentType)
+    return ReceiptUploadOut(
+        receiptId=rcpt_id, key=key, url=form["url"], fields=form["fields"], expiresIn=UPLOAD_EXPIRES_SECONDS
+    )
+
+
+@router.post(
+    "/uploads/{receipt_id}/complete",
+    response_model=ReceiptOut,
+    summary="Complete receipt upload",
+    description=(
+        "Confirm the image is in storage, preprocess it (orient, strip EXIF, downsize, thumbnail), create the "
+        "receipt in 'uploaded' status and enqueue it for OCR. "
+        "Idempotent: completing again returns the existing receipt."
+    ),
+)
+def api_complete_receipt_upload(
+    receipt_id: str,
+    payload: ReceiptUploadComplete,
+    current_user=Depends(get_current_user),
+    db: DB = Depends(get_db),
+):
+    user_id = current_user["user_id"]
+    if not is_upload_key(payload.key, user_id, receipt_id):
+        raise HTTPException(400, "key does not belong to this upload")
+    existing = db.get_receipt(user_id, receipt_id)
+    if existing:
+        return _public_receipt(existing)
+    if db.receipt_id_taken(receipt_id):
+        raise HTTPException(409, "Receipt id already in use")
+    storage = get_storage()
+    if not storage.object_size(payload.key):
+        raise HTTPException(404, "Uploaded file not found")
+    image = store_uploaded_image(storage, payload.key)
+    item = db.create_receipt(
+        user_id,
+        {
+            "receiptId": receipt_id,
+            "merchant": "",
+            "date": datetime.now(timezone.utc).date().isoformat(),
+            "total": 0,
+            "status": "uploaded",
+            "lineItems": [],
+            "transactionId": None,
+            "ocrDispatch": "pending",
+            **image,
+        },
+    )
+    # Only now that the receipt row is committed can the uploaded original go.
+    stale = stale_upload_key(storage, payload.key, image)
+    if stale:
+        storage.delete(stale)
+    return _public_receipt(_dispatch_ocr(db, user_id, item))
+
+
 @router.post(
     "/upload",
     response_model=ReceiptOut,
+    deprecated=True,
     summary="Upload receipt image",
-    description="Accept an image file, store it, and create a receipt in 'uploading' status. OCR is not implemented yet."
+    description=(
+        "Legacy single-request upload: the API preprocesses the file into receipt storage and creates the "
+        "receipt in 'uploading' status. Prefer POST /receipts/uploads, which keeps the upload itself off the API."
+    ),
 )
 def api_upload_receipt(
     file: UploadFile = File(...),
@@ -160,13 +364,14 @@ def api_upload_receipt(
     db: DB = Depends(get_db),
 ):
     rcpt_id = f"rcpt_{uuid.uuid4().hex[:8]}"
-    # Persist file locally to mimic S3; in real deployment this would be a presigned upload.
-    filename = f"{rcpt_id}_{file.filename}"
-    dest = UPLOAD_DIR / filename
-    dest.write_bytes(file.file.read())
-    image_url = f"s3://mock-receipts/{filename}"
+    key = receipt_key(current_user["user_id"], rcpt_id, file.filename or "")
+    data = file.file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, "File too large")
+    image = store_receipt_image(
+        get_storage(), key, data, file.content_type or "application/octet-stream", uploaded=False
+    )
 
-    now = _now_iso()
     item = db.create_receipt(
         current_user["user_id"],
         {
@@ -175,12 +380,160 @@ def api_upload_receipt(
             "date": datetime.now(timezone.utc).date().isoformat(),
             "total": 0,
             "status": "uploading",
-            "imageUrl": image_url,
             "lineItems": [],
             "transactionId": None,
+            "ocrDispatch": "pending",
+            **image,
         },
     )
-    return _public_receipt(item)
+    return _public_receipt(_dispatch_ocr(db, current_user["user_id"], item))
+
+
+def _batch_files(files: List[UploadFile]) -> List[Tuple[str, str, Optional[bytes], Optional[str]]]:
+    """(filename, content type, data, error) per image, with ZIP archives expanded in member order."""
+    out: List[Tuple[str, str, Optional[bytes], Optional[str]]] = []
+    total = 0
+
+    def add(name: str, content_type: str, data: Optional[bytes], error: Optional[str] = None) -> None:
+        nonlocal total
+        if len(out) >= MAX_BATCH_FILES:
+            raise HTTPException(413, f"At most {MAX_BATCH_FILES} files per batch")
+        if data is not None and error is None:
+            if len(data) > MAX_UPLOAD_BYTES:
+                data, error = None, "File too large"
+            elif content_type not in ALLOWED_CONTENT_TYPES:
+                data, error = None, f"Unsupported content type {content_type or 'unknown'}"
+            else:
+                total += len(data)
+                if total > MAX_BATCH_BYTES:
+                    raise HTTPException(413, "Batch too large")
+        out.append((name, content_type, data, error))
+
+    for file in files:
+        name = file.filename or ""
+        if file.content_type in ("application/zip", "application/x-zip-compressed") or name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(file.file)
+            except zipfile.BadZipFile:
+                add(name, "application/zip", None, "Not a valid ZIP archive")
+                continue
+            with archive:
+                for info in archive.infolist():
+                    member = info.filename.rsplit("/", 1)[-1]
+                    if info.is_dir() or not member or member.startswith(".") or "__MACOSX/" in info.filename:
+                        continue
+                    content_type = mimetypes.guess_type(member)[0] or ""
+                    if info.file_size > MAX_UPLOAD_BYTES:
+                        add(member, content_type, None, "File too large")
+                        continue
+                    with archive.open(info) as stream:
+                        # Bounded read: the size in the ZIP header is not trusted.
+                        add(member, content_type, stream.read(MAX_UPLOAD_BYTES + 1))
+        else:
+            add(name, file.content_type or "", file.file.read(MAX_UPLOAD_BYTES + 1))
+    return out
+
+
+def _ndjson(event: Dict[str, Any]) -> bytes:
+    return (json.dumps(event) + "\n").encode()
+
+
+def _stream_batch_upload(user_id: str, files: List[Tuple[str, str, Optional[bytes], Optional[str]]]) -> Iterator[bytes]:
+    storage = get_storage()
+    today = datetime.now(timezone.utc).date().isoformat()
+    payloads: List[Dict[str, Any]] = []
+    stored: List[Tuple[int, str, Dict[str, Any]]] = []
+    rejected = 0
+
+    def store(name: str, content_type: str, data: bytes) -> Dict[str, Any]:
+        rcpt_id = f"rcpt_{uuid.uuid4().hex[:8]}"
+        image = store_receipt_image(storage, receipt_key(user_id, rcpt_id, name), data, content_type, uploaded=False)
+        return {"receiptId": rcpt_id, **image}
+
+    with ThreadPoolExecutor(max_workers=BATCH_UPLOAD_CONCURRENCY) as pool:
+        futures = {}
+        for index, (name, content_type, data, error) in enumerate(files):
+            if error is not None:
+                rejected += 1
+                yield _ndjson({"index": index, "filename": name, "status": "rejected", "error": error})
+            else:
+                futures[pool.submit(store, name, content_type, data)] = (index, name)
+        for future in as_completed(futures):
+            index, name = futures[future]
+            try:
+                image = future.result()
+            except Exception as exc:  # storage errors reject this file, not the batch
+                rejected += 1
+                yield _ndjson({"index": index, "filename": name, "status": "rejected", "error": str(exc)})
+                continue
+            stored.append((index, name, image))
+            payloads.append({
+                "merchant": "",
+                "date": today,
+                "total": 0,
+                "status": "uploading",
+                "lineItems": [],
+                "ocrDispatch": "pending",
+                **image,
+            })
+
+    # The request's session is closed before a streamed body runs, so the stream opens its own.
+    # Receipt ids go out only once their rows are committed.
+    session = get_session()
+    try:
+        db = DB(session)
+        try:
+            receipt_ids = db.create_receipts(user_id, payloads)
+        except Exception:
+            logger.exception("Batch upload insert failed for user_id=%s", user_id)
+            session.rollback()
+            for index, name, image in stored:
+                for uri in (image["imageUrl"], image["thumbnailUrl"]):
+                    key = storage.key_of(uri)
+                    if key is not None:
+                        storage.delete(key)
+                rejected += 1
+                yield _ndjson({"index": index, "filename": name, "status": "rejected",
+                               "error": "Could not save the receipt"})
+            receipt_ids, ocr = [], {}
+        else:
+            for index, name, image in stored:
+                yield _ndjson({
+                    "index": index, "filename": name, "status": "stored",
+                    "receiptId": image["receiptId"], "thumbnailUrl": _thumbnail_url(image["thumbnailUrl"]),
+                })
+            ocr = db.dispatch_ocr(get_ocr_queue(), receipt_ids=receipt_ids, limit=len(receipt_ids)) if receipt_ids else {}
+    finally:
+        session.close()
+    yield _ndjson({
+        "status": "complete",
+        "created": len(receipt_ids),
+        "rejected": rejected,
+        "ocrEnqueued": ocr.get("enqueued", 0),
+        "receiptIds": receipt_ids,
+    })
+
+
+@router.post(
+    "/upload:batch",
+    summary="Upload a batch of receipt images",
+    description=(
+        f"Multipart `files`: up to {MAX_BATCH_FILES} images and/or ZIP archives of images (members count "
+        "individually). Images are preprocessed and stored concurrently, the receipts are created with one "
+        "insert and sent to OCR as one dispatch. The response streams NDJSON: a `rejected` line (with "
+        "`error`) per file as soon as it fails, a `stored` line (with `receiptId`) per file once the insert "
+        "has committed, then a `complete` line with `created`, `rejected`, `ocrEnqueued` and `receiptIds`. "
+        "When the insert fails, the stored images are deleted and each file gets a `rejected` line."
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+def api_upload_receipt_batch(
+    files: List[UploadFile] = File(...),
+    current_user=Depends(get_current_user),
+):
+    batch = _batch_files(files)
+    return StreamingResponse(_stream_batch_upload(current_user["user_id"], batch), media_type="application/x-ndjson")
 
 
 @router.patch(
@@ -191,6 +544,8 @@ def api_upload_receipt(
 )
 def api_update_receipt(receipt_id: str, payload: ReceiptPatch, current_user=Depends(get_current_user), db: DB = Depends(get_db)):
     updates = {k: v for k, v in payload.model_dump(exclude_none=True).items()}
+    if "transactionId" in payload.model_fields_set and payload.transactionId is None:
+        updates["transactionId"] = None
     updated = db.update_receipt(current_user["user_id"], receipt_id, updates)
     if not updated:
         raise HTTPException(404, "Receipt not found")
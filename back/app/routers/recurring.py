@@ -1,10 +1,11 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, ConfigDict, Field
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
 from utils.deps import get_db, get_current_user
 from utils.db import DB, list_recurring_rules
+from utils.recurrence import rule_occurrences
 
 router = APIRouter(tags=["recurring"])
 
@@ -21,7 +22,10 @@ class RecurringRuleIn(BaseModel):
             "startDate": "2025-01-01",
             "endDate": None,
             "autopostMode": "PROJECT_ONLY",
-            "isPaused": False
+            "isPaused": False,
+            "amountMode": "FIXED",
+            "predictionMethod": None,
+            "predictionMonths": None
         }
     })
 
@@ -35,6 +39,9 @@ class RecurringRuleIn(BaseModel):
     endDate: str | None = Field(None, description="Optional end date YYYY-MM-DD")
     autopostMode: str = Field("PROJECT_ONLY", description="Autopost behavior (e.g. PROJECT_ONLY)")
     isPaused: bool = Field(False, description="Whether the rule is paused")
+    amountMode: str = Field("FIXED", pattern="^(FIXED|PREDICTED)$", description="FIXED uses `amount`; PREDICTED derives each period from past bills, with `amount` as fallback")
+    predictionMethod: str | None = Field(None, pattern="^(MEDIAN|EWMA|SEASONAL)$", description="PREDICTED only; defaults to MEDIAN")
+    predictionMonths: int | None = Field(None, ge=1, le=24, description="PREDICTED only; months of history used (default 6)")
 
 
 class RecurringRule(RecurringRuleIn):
@@ -51,12 +58,17 @@ class RecurringRule(RecurringRuleIn):
             "endDate": None,
             "autopostMode": "PROJECT_ONLY",
             "isPaused": False,
+            "amountMode": "PREDICTED",
+            "predictionMethod": "SEASONAL",
+            "predictionMonths": 6,
+            "predictedAmount": -27400,
             "createdAt": "2025-01-01T00:00:00Z",
             "updatedAt": "2026-01-15T00:00:00Z"
         }
     })
 
     ruleId: str
+    predictedAmount: int | None = Field(None, description="This month's predicted amount (PREDICTED rules)")
     createdAt: str | None = None
     updatedAt: str | None = None
 
@@ -80,6 +92,9 @@ class RecurringRulePatch(BaseModel):
     endDate: Optional[str] = Field(None, description="Updated end date")
     autopostMode: Optional[str] = Field(None, description="Updated autopost behavior")
     isPaused: Optional[bool] = Field(None, description="Pause/unpause the rule")
+    amountMode: Optional[str] = Field(default=None, pattern="^(FIXED|PREDICTED)$", description="Updated amount mode")
+    predictionMethod: Optional[str] = Field(default=None, pattern="^(MEDIAN|EWMA|SEASONAL)$", description="Updated prediction method")
+    predictionMonths: Optional[int] = Field(default=None, ge=1, le=24, description="Updated prediction lookback in months")
 
 
 class RecurringToggle(BaseModel):
@@ -98,6 +113,54 @@ class RecurringToggle(BaseModel):
     updatedAt: str | None = None
 
 
+class RecurringOccurrences(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "ruleId": "rec_abcdef12",
+            "from": "2026-01-01",
+            "to": "2026-03-31",
+            "dates": ["2026-01-31", "2026-02-28", "2026-03-31"]
+        }
+    })
+
+    ruleId: str
+    from_: str = Field(..., alias="from", description="Range start (inclusive)")
+    to: str = Field(..., description="Range end (inclusive)")
+    dates: List[str] = Field(..., description="Occurrence dates in the range, ascending")
+
+
+class RecurringSuggestion(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "merchantId": 42,
+            "name": "NETFLIX",
+            "amount": -9990,
+            "cadence": "MONTHLY",
+            "dayOfMonth": 14,
+            "startDate": "2026-03-14",
+            "occurrences": 6,
+            "intervalDays": 30.2,
+            "lastDate": "2026-02-14",
+            "confidence": 0.97
+        }
+    })
+
+    merchantId: int = Field(..., description="Interned merchant the charges belong to")
+    name: str = Field(..., description="Proposed rule name (canonical merchant name)")
+    amount: int = Field(..., description="Proposed amount: median charge, negative")
+    cadence: str = Field(..., description="Detected cadence (MONTHLY or WEEKLY)")
+    dayOfMonth: int | None = Field(None, description="Median charge day for MONTHLY cadence")
+    startDate: str = Field(..., description="Next expected charge, usable as the rule start date")
+    occurrences: int = Field(..., description="Charges observed in the mined history")
+    intervalDays: float = Field(..., description="Mean days between charges")
+    lastDate: str = Field(..., description="Most recent charge date")
+    confidence: float = Field(..., description="0-1 score; 1 means perfectly regular gaps and amounts")
+
+
+# Longest range a single occurrences request may span.
+MAX_OCCURRENCE_RANGE_DAYS = 3 * 366
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -115,6 +178,10 @@ def _public_rule(item: dict) -> RecurringRule:
         endDate=item.get("endDate"),
         autopostMode=item.get("autopostMode"),
         isPaused=item.get("isPaused"),
+        amountMode=item.get("amountMode") or "FIXED",
+        predictionMethod=item.get("predictionMethod"),
+        predictionMonths=item.get("predictionMonths"),
+        predictedAmount=item.get("predictedAmount"),
         createdAt=item.get("createdAt"),
         updatedAt=item.get("updatedAt"),
     )
@@ -151,6 +218,47 @@ def api_create_recurring(payload: RecurringRuleIn, current_user=Depends(get_curr
     return _public_rule(item)
 
 
+@router.get(
+    "/suggestions",
+    response_model=List[RecurringSuggestion],
+    summary="Suggest recurring rules",
+    description=(
+        "Recurring charges detected in the last ~13 months of expenses (same merchant, regular weekly or "
+        "monthly gaps, stable amount) that no existing rule covers. Mined nightly; recomputed on demand "
+        "when the stored result is older than a day."
+    ),
+)
+def api_recurring_suggestions(current_user=Depends(get_current_user), db: DB = Depends(get_db)):
+    return db.recurring_suggestions(current_user["user_id"], datetime.now(timezone.utc).date())
+
+
+@router.get(
+    "/{rule_id}/occurrences",
+    response_model=RecurringOccurrences,
+    response_model_by_alias=True,
+    summary="List rule occurrences",
+    description="Dates on which the rule occurs between `from` and `to` (inclusive), with day-of-month clamped to short months."
+)
+def api_recurring_occurrences(
+    rule_id: str,
+    date_from: str = Query(..., alias="from", description="Range start YYYY-MM-DD"),
+    date_to: str = Query(..., alias="to", description="Range end YYYY-MM-DD"),
+    current_user=Depends(get_current_user),
+    db: DB = Depends(get_db),
+):
+    try:
+        start, end = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    except ValueError:
+        raise HTTPException(400, "from and to must be YYYY-MM-DD")
+    if end < start or (end - start).days > MAX_OCCURRENCE_RANGE_DAYS:
+        raise HTTPException(400, f"range must be ascending and at most {MAX_OCCURRENCE_RANGE_DAYS} days")
+    rule = db.get_recurring(current_user["user_id"], rule_id)
+    if not rule:
+        raise HTTPException(404, "Recurring rule not found")
+    dates = rule_occurrences(rule, start, end)
+    return {"ruleId": rule_id, "from": date_from, "to": date_to, "dates": [d.isoformat() for d in dates]}
+
+
 @router.patch(
     "/{rule_id}",
     response_model=RecurringRule,
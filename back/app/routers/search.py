@@ -0,0 +1,61 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, ConfigDict, Field
+
+from utils.deps import get_db, get_current_user
+from utils.db import DB
+from utils.search import decode_cursor
+
+router = APIRouter(tags=["search"])
+
+
+class SearchHit(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "type": "transaction",
+            "id": "txn_3f9a1c2b7d4e",
+            "date": "2026-02-10",
+            "merchant": "STARBUCKS",
+            "detail": "Café con amigos",
+            "amount": -4500,
+            "score": 0.0909
+        }
+    })
+
+    type: str = Field(..., description="Entity kind: transaction or receipt")
+    id: str = Field(..., description="Transaction or receipt identifier")
+    date: str = Field(..., description="Transaction or receipt date (YYYY-MM-DD)")
+    merchant: str = Field(..., description="Merchant as stored")
+    detail: Optional[str] = Field(None, description="Transaction description (null for receipts)")
+    amount: int = Field(..., description="Transaction amount or receipt total in minor units")
+    score: float = Field(..., description="Relevance between 0 and 1; results are sorted by it")
+
+
+class SearchPage(BaseModel):
+    items: List[SearchHit] = Field(..., description="Hits for this page, best first")
+    nextCursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
+
+
+@router.get(
+    "",
+    response_model=SearchPage,
+    summary="Search transactions and receipts",
+    description=(
+        "Full-text search over transaction merchant/description/notes and receipt OCR text and line items, "
+        "with fuzzy merchant matching. Results from both kinds are ranked together and paginated with an opaque cursor."
+    )
+)
+def api_search(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms (web-search syntax: quotes, OR, -)"),
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    current_user=Depends(get_current_user),
+    db: DB = Depends(get_db),
+):
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    return db.search(current_user["user_id"], q.strip(), limit, after)
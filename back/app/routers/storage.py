@@ -0,0 +1,58 @@
+import mimetypes
+
+from fastapi import APIRouter, File, Form, HTTPException, Response, UploadFile
+
+from utils.storage import LocalStorage, UploadRejected, get_storage
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+
+@router.post(
+    "/receipts",
+    status_code=204,
+    summary="Local object-store upload",
+    description=(
+        "Development stand-in for the S3 presigned POST target. Accepts the `url`/`fields` form returned by "
+        "`POST /receipts/uploads` (authorized by its signed policy, not a bearer token). 404 when receipts are "
+        "stored in S3."
+    ),
+)
+def local_storage_upload(
+    key: str = Form(...),
+    content_type: str = Form(..., alias="Content-Type"),
+    policy: str = Form(...),
+    signature: str = Form(...),
+    file: UploadFile = File(...),
+):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(404, "Not found")
+    try:
+        document = storage.verify_policy(key, content_type, policy, signature)
+        storage.receive(key, file.file, document["maxBytes"])
+    except UploadRejected as exc:
+        raise HTTPException(403, str(exc))
+    return Response(status_code=204)
+
+
+@router.get(
+    "/receipts",
+    summary="Local object-store download",
+    description=(
+        "Development stand-in for an S3 presigned GET: serves a stored receipt image or thumbnail for the "
+        "signed `key`/`expires`/`signature` link the API returns as `thumbnailUrl`. 404 when receipts are "
+        "stored in S3."
+    ),
+)
+def local_storage_download(key: str, expires: int, signature: str):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(404, "Not found")
+    try:
+        storage.verify_download(key, expires, signature)
+        size = storage.object_size(key)
+    except UploadRejected as exc:
+        raise HTTPException(403, str(exc))
+    if size is None:
+        raise HTTPException(404, "Not found")
+    return Response(storage.get(key), media_type=mimetypes.guess_type(key)[0] or "application/octet-stream")
@@ -1,13 +1,14 @@
 from typing import List, Optional, Tuple
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel, ConfigDict, Field
-from datetime import datetime, timezone, date
+from datetime import datetime, timezone, date, timedelta
 from io import BytesIO
 import csv
 import re
 
 from utils.deps import get_db, get_current_user
 from utils.db import DB, list_transactions, get_transaction, create_transaction, delete_transaction
+from utils.transfers import DEFAULT_WINDOW_DAYS
 from copy import deepcopy
 
 router = APIRouter(tags=["transactions"])
@@ -104,6 +105,7 @@ class TransactionOut(TransactionIn):
     })
 
     txnId: str = Field(..., description="Transaction identifier")
+    entryType: Optional[str] = Field(None, description="Classification such as 'transfer'; null when unclassified")
 
 
 def _now_iso() -> str:
@@ -349,6 +351,7 @@ def api_list_transactions(
             "accountId": i.get("accountId"),
             "receiptId": i.get("receiptId"),
             "splits": i.get("splits"),
+            "entryType": i.get("entryType"),
         }
         for i in items
     ]
@@ -367,8 +370,9 @@ def api_create_transaction(payload: TransactionIn, current_user=Depends(get_curr
         data["splits"] = [dict(s) for s in splits]
         if len(splits) > 1:
             data["categoryId"] = None
+    db.get_rule_matcher(current_user["user_id"]).apply(data)
     created = create_transaction(db, current_user["user_id"], data)
-    return {k: created.get(k) for k in ["txnId", "date", "merchant", "description", "amount", "currency", "categoryId", "notes", "source", "accountId", "receiptId", "splits"]}
+    return {k: created.get(k) for k in ["txnId", "date", "merchant", "description", "amount", "currency", "categoryId", "notes", "source", "accountId", "receiptId", "splits", "entryType"]}
 
 
 @router.get(
@@ -381,7 +385,7 @@ def api_get_transaction(txn_id: str, date: str, current_user=Depends(get_current
     item = get_transaction(db, current_user["user_id"], txn_id, date)
     if not item:
         raise HTTPException(404, "Transaction not found")
-    return {k: item.get(k) for k in ["txnId", "date", "merchant", "description", "amount", "currency", "categoryId", "notes", "source", "accountId", "receiptId", "splits"]}
+    return {k: item.get(k) for k in ["txnId", "date", "merchant", "description", "amount", "currency", "categoryId", "notes", "source", "accountId", "receiptId", "splits", "entryType"]}
 
 
 @router.patch(
@@ -405,7 +409,7 @@ def api_update_transaction(txn_id: str, payload: TransactionUpdate, date: str, c
     updated = db.update_transaction(current_user["user_id"], txn_id, updates)
     if not updated:
         raise HTTPException(500, "Failed to persist transaction")
-    return {k: updated.get(k) for k in ["txnId", "date", "merchant", "description", "amount", "currency", "categoryId", "notes", "source", "accountId", "receiptId", "splits"]}
+    return {k: updated.get(k) for k in ["txnId", "date", "merchant", "description", "amount", "currency", "categoryId", "notes", "source", "accountId", "receiptId", "splits", "entryType"]}
 
 
 @router.delete(
@@ -427,6 +431,7 @@ def api_delete_transaction(txn_id: str, date: str, current_user=Depends(get_curr
 )
 async def api_import_transactions(
     file: UploadFile = File(...),
+    accountId: Optional[str] = Form(None, description="Account the statement belongs to; enables transfer detection"),
     current_user=Depends(get_current_user),
     db: DB = Depends(get_db),
 ):
@@ -447,16 +452,37 @@ async def api_import_transactions(
     else:
         raise HTTPException(400, "Unsupported file type. Please upload a .csv or .xlsx file.")
 
-    created = 0
+    created_ids: List[str] = []
     errors: List[str] = []
+    matcher = db.get_rule_matcher(current_user["user_id"])
     for txn in transactions:
+        if accountId:
+            txn["accountId"] = accountId
+        matcher.apply(txn)
         try:
-            create_transaction(db, current_user["user_id"], txn)
-            created += 1
+            created_ids.append(create_transaction(db, current_user["user_id"], txn)["txnId"])
         except Exception as e:
             errors.append(str(e))
-
-    return {"imported": created, "skipped": len(transactions) - created, "errors": errors[:10]}
+    created = len(created_ids)
+
+    # Pair the new rows with each other and with the other accounts' history nearby.
+    transfers = 0
+    if created and accountId:
+        dates = [date.fromisoformat(t["date"]) for t in transactions]
+        window = timedelta(days=DEFAULT_WINDOW_DAYS)
+        transfers = db.detect_transfers(current_user["user_id"], min(dates) - window, max(dates) + window)
+
+    bills_paid = db.match_bill_payments(current_user["user_id"], created_ids)
+    receipts_linked = db.match_receipt_transactions(user_ids=[current_user["user_id"]], txn_ids=created_ids)
+
+    return {
+        "imported": created,
+        "skipped": len(transactions) - created,
+        "errors": errors[:10],
+        "transfers": transfers,
+        "billsPaid": bills_paid,
+        "receiptsLinked": receipts_linked,
+    }
 
 
 @router.get(
@@ -0,0 +1 @@
+"""Micro-benchmarks for hot paths. Run as modules, e.g. `python -m benchmarks.bench_merchant_suggest`."""
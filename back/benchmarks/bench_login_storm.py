@@ -0,0 +1,133 @@
+"""Login storm: latency of other endpoints while PBKDF2 logins flood the server.
+
+Usage: python -m benchmarks.bench_login_storm [--attackers 64] [--seconds 5] [--iterations 600000]
+
+Serves a two-route app with uvicorn on a local port: `/login` derives one
+password hash at the production iteration count, `/ping` is a cheap sync
+endpoint standing in for the rest of the API. `--attackers` threads post to
+`/login` back to back while a probe calls `/ping` every few ms. Runs the
+storm with the hash computed inline on the request thread (the old login path)
+and through `utils.password_hashing` (bounded pool, 503 when full), plus an
+idle baseline, and prints `/ping` latency percentiles for each.
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+from utils.password_hashing import HASH_MAX_PENDING, HASH_WORKERS, HashPoolBusy, derive_password, pbkdf2_hex
+
+SALT = bytes(16)
+
+
+def _app(mode: str, iterations: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login")
+    def login():
+        if mode == "inline":
+            return {"hash": pbkdf2_hex("hunter2", SALT, iterations)}
+        try:
+            return {"hash": derive_password("hunter2", SALT, iterations)}
+        except HashPoolBusy:
+            raise HTTPException(status_code=503, headers={"Retry-After": "1"})
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(port: int, method: str, path: str) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        conn.request(method, path)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status
+    finally:
+        conn.close()
+
+
+def _run(mode: str, attackers: int, seconds: float, iterations: int, probe_interval: float) -> dict:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(_app(mode, iterations), host="127.0.0.1", port=port,
+                                           log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    stop = threading.Event()
+    statuses: list[int] = []
+
+    def attack():
+        while not stop.is_set():
+            statuses.append(_request(port, "POST", "/login"))
+
+    storm = [threading.Thread(target=attack, daemon=True) for _ in range(attackers if mode != "idle" else 0)]
+    storm_start = time.perf_counter()
+    for t in storm:
+        t.start()
+    time.sleep(min(1.0, seconds / 4))  # let the storm reach steady state
+
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        _request(port, "GET", "/ping")
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(probe_interval)
+
+    stop.set()
+    for t in storm:
+        t.join()
+    storm_seconds = time.perf_counter() - storm_start
+    server.should_exit = True
+    thread.join()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "probes": len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "max": latencies[-1],
+        "logins_per_s": statuses.count(200) / storm_seconds if storm else 0.0,
+        "rejected": statuses.count(503),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark endpoint latency during a login storm")
+    parser.add_argument("--attackers", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--iterations", type=int, default=600_000)
+    parser.add_argument("--probe-interval-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} attackers={args.attackers} iterations={args.iterations} "
+          f"hash pool workers={HASH_WORKERS} max pending={HASH_MAX_PENDING}")
+    print(f"{'mode':<8} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'logins/s':>9} {'503s':>7}")
+    for mode in ("idle", "inline", "pool"):
+        r = _run(mode, args.attackers, args.seconds, args.iterations, args.probe_interval_ms / 1000)
+        print(f"{r['mode']:<8} {r['probes']:>7} {r['p50']:>9.1f} {r['p99']:>9.1f} {r['max']:>9.1f} "
+              f"{r['logins_per_s']:>9.1f} {r['rejected']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""Bill materialization throughput on a large rule set.
+
+Usage: DATABASE_URL=... python -m benchmarks.bench_materialize_bills [--rules 100000] [--months 12]
+
+Needs a disposable database with the schema applied. Seeds synthetic users
+(ids prefixed `bench_u_`) and rules with bulk inserts, times the batched
+INSERT ... SELECT, then deletes the synthetic users again.
+"""
+import argparse
+import calendar
+import random
+import time
+from datetime import date
+
+from sqlalchemy import delete, insert
+
+from db import SessionLocal, models
+from utils.db import DB
+
+
+def _seed(session, rules: int, rules_per_user: int, rng: random.Random) -> int:
+    users = max(1, rules // rules_per_user)
+    session.execute(insert(models.User), [
+        {
+            "id": f"bench_u_{n:06d}",
+            "email": f"bench_{n}@example.com",
+            "password_algo": "PBKDF2-HMAC-SHA256",
+            "password_salt": "00",
+            "password_iterations": 1,
+            "password_hash": "00",
+        }
+        for n in range(users)
+    ])
+    session.execute(insert(models.RecurringRule), [
+        {
+            "id": f"bench_rec_{n:07d}",
+            "user_id": f"bench_u_{n % users:06d}",
+            "name": f"Rule {n}",
+            "amount_cents": -rng.randint(1_000, 200_000),
+            "currency": "CLP",
+            "cadence": "WEEKLY" if rng.random() < 0.2 else "MONTHLY",
+            "day_of_month": rng.randint(1, 31),
+            "start_date": date(2024, rng.randint(1, 12), rng.randint(1, 28)),
+            "is_paused": rng.random() < 0.05,
+        }
+        for n in range(rules)
+    ])
+    session.commit()
+    return users
+
+
+def _cleanup(session) -> None:
+    session.execute(delete(models.User).where(models.User.id.like("bench_u_%")))
+    session.commit()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark bill materialization")
+    parser.add_argument("--rules", type=int, default=100_000)
+    parser.add_argument("--rules-per-user", type=int, default=10)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    today = date.today().replace(day=1)
+    index = today.year * 12 + today.month - 1 + args.months
+    year, month = index // 12, index % 12 + 1
+    through = date(year, month, calendar.monthrange(year, month)[1])
+
+    with SessionLocal() as session:
+        _cleanup(session)
+        t0 = time.perf_counter()
+        users = _seed(session, args.rules, args.rules_per_user, rng)
+        print(f"seeded users={users} rules={args.rules} in {time.perf_counter() - t0:.1f}s")
+        try:
+            db = DB(session)
+            t0 = time.perf_counter()
+            created = db.materialize_bills(through, today, batch_size=args.batch_size)
+            first = time.perf_counter() - t0
+            print(f"materialize: created={created} in {first:.2f}s ({created / first:,.0f} bills/s)")
+            t0 = time.perf_counter()
+            again = db.materialize_bills(through, today, batch_size=args.batch_size)
+            print(f"rerun (all conflicts): created={again} in {time.perf_counter() - t0:.2f}s")
+        finally:
+            _cleanup(session)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
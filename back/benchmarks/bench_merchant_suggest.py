@@ -0,0 +1,50 @@
+"""Merchant autocomplete latency on a heavy user's history.
+
+Usage: python -m benchmarks.bench_merchant_suggest [--merchants 5000] [--queries 10000]
+"""
+import argparse
+import random
+import string
+import time
+
+from utils.merchant_index import MerchantPrefixIndex
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark merchant prefix suggestions")
+    parser.add_argument("--merchants", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = {
+        " ".join("".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 3)))
+        for _ in range(args.merchants)
+    }
+    # Zipf-like usage: a few merchants dominate, most appear once or twice.
+    counts = [(name, max(1, int(1000 / rank))) for rank, name in enumerate(sorted(names), start=1)]
+
+    start = time.perf_counter()
+    index = MerchantPrefixIndex(counts)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    prefixes = [name[: rng.randint(0, 4)] for name, _ in rng.choices(counts, k=args.queries)]
+    samples = []
+    for prefix in prefixes:
+        t0 = time.perf_counter()
+        index.suggest(prefix)
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    print(f"merchants={len(index)} build={build_ms:.1f}ms")
+    print(f"suggest p50={_percentile(samples, 0.50):.3f}ms p99={_percentile(samples, 0.99):.3f}ms max={max(samples):.3f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+"""Receipt normalizer accuracy and throughput on a synthetic Textract corpus.
+
+Usage: python -m benchmarks.bench_receipt_normalizer [--receipts 2000] [--baseline REV]
+
+Builds AnalyzeExpense-shaped provider output (`raw_blocks` plus the flattened
+`raw_text`, exactly as `TextractProvider.extract` produces them) for Chilean
+and US receipts with known merchant, date, total and items. Receipts include
+the usual traps: cash tendered and change lines larger than the total, CLP
+thousands separators, day-first and US month-first dates, and some documents
+where Textract missed the TOTAL summary field. Each receipt is normalized from
+the blocks and from the text alone, and field accuracy and time per receipt
+are reported for both, next to the `normalizer.py` of git revision
+`--baseline` (by default the text-only normalizer that block parsing replaced)
+run over the same text.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from types import ModuleType
+
+_REPO_DIR = Path(__file__).resolve().parents[2]
+# Last revision whose normalizer parsed the flattened text only.
+_BASELINE_REV = "24be3be~1"
+
+
+def _load_normalizer():
+    lambda_dir = Path(os.getenv("OCR_LAMBDA_DIR", _REPO_DIR / "ocr-lambda"))
+    sys.path.insert(0, str(lambda_dir))
+    from normalizer import normalize_receipt  # noqa: E402 - ocr-lambda is not a package
+
+    return normalize_receipt
+
+
+def _load_baseline(rev: str):
+    path = f"{rev}:ocr-lambda/normalizer.py"
+    source = subprocess.run(["git", "-C", str(_REPO_DIR), "show", path], check=True, capture_output=True,
+                            text=True).stdout
+    module = ModuleType("baseline_normalizer")
+    exec(compile(source, path, "exec"), module.__dict__)
+    return module.normalize_receipt
+
+
+_MERCHANTS = ["LIDER EXPRESS", "JUMBO COSTANERA", "SANTA ISABEL", "UNIMARC", "FARMACIAS AHUMADA", "COPEC"]
+_US_MERCHANTS = ["TRADER JOE'S", "WHOLE FOODS MARKET", "SAFEWAY"]
+_PRODUCTS = ["LECHE ENTERA 1L", "PAN MARRAQUETA", "QUESO GAUDA", "HUEVOS 12", "CAFE GRANO", "ARROZ 1KG",
+             "ACEITE MARAVILLA", "YOGHURT", "TOMATE KG", "PALTA HASS"]
+
+
+def _clp(amount: int) -> str:
+    return "$" + f"{amount:,}".replace(",", ".")
+
+
+def _usd(cents: int) -> str:
+    return f"${cents // 100}.{cents % 100:02d}"
+
+
+def _receipt(rng: random.Random, day: date) -> dict:
+    chilean = rng.random() < 0.8
+    fmt = _clp if chilean else _usd
+    items = [(rng.choice(_PRODUCTS), rng.randint(5, 800) * 10 if chilean else rng.randint(99, 1999))
+             for _ in range(rng.randint(1, 8))]
+    total = sum(amount for _, amount in items)
+    date_text = rng.choice([day.strftime("%d/%m/%Y"), day.strftime("%d-%m-%y"), day.isoformat()]) if chilean \
+        else rng.choice([day.strftime("%m/%d/%Y"), day.isoformat()])
+    merchant = rng.choice(_MERCHANTS if chilean else _US_MERCHANTS)
+
+    summary = [("VENDOR_NAME", merchant), ("INVOICE_RECEIPT_DATE", date_text)]
+    if rng.random() < 0.9:
+        summary.append(("TOTAL", fmt(total)))
+    if rng.random() < 0.5:
+        tendered = total + rng.randint(1, 20) * (1000 if chilean else 100)
+        summary += [("AMOUNT_PAID", fmt(tendered)), ("OTHER", f"VUELTO {fmt(tendered - total)}")]
+    if chilean and rng.random() < 0.5:
+        summary.append(("OTHER", "RUT 76.123.456-7"))
+
+    raw_blocks, lines = [], []
+    for label, value in summary:
+        confidence = rng.uniform(85, 99.9)
+        raw_blocks.append({"type": "summary", "label": label, "text": value, "confidence": confidence})
+        lines.append(f"{label}: {value}".strip(": ").strip())
+    for name, amount in items:
+        fields = [{"type": "ITEM", "text": name, "confidence": rng.uniform(85, 99)},
+                  {"type": "PRICE", "text": fmt(amount), "confidence": rng.uniform(85, 99)}]
+        line_text = " | ".join(f"{f['type']}:{f['text']}" for f in fields)
+        lines.append(line_text)
+        raw_blocks.append({"type": "line_item", "text": line_text, "fields": fields,
+                           "confidence": sum(f["confidence"] for f in fields) / len(fields)})
+    return {
+        "raw_text": "\n".join(lines),
+        "raw_blocks": raw_blocks,
+        "expected": {"merchant": merchant, "date": day.isoformat(), "total": total, "items": len(items)},
+    }
+
+
+def _score(normalize, corpus: list, use_blocks: bool) -> dict:
+    hits = {"merchant": 0, "date": 0, "total": 0, "items": 0}
+    start = time.perf_counter()
+    for receipt in corpus:
+        parsed = normalize(receipt["raw_text"], receipt["raw_blocks"] if use_blocks else None)
+        expected = receipt["expected"]
+        hits["merchant"] += parsed["merchant"].endswith(expected["merchant"])
+        hits["date"] += parsed["purchaseDate"] == expected["date"]
+        hits["total"] += parsed["totals"]["grandTotal"] == expected["total"]
+        hits["items"] += len(parsed["items"]) == expected["items"]
+    elapsed = time.perf_counter() - start
+    return {**{k: v / len(corpus) for k, v in hits.items()}, "us": elapsed / len(corpus) * 1e6}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the receipt normalizer")
+    parser.add_argument("--receipts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=_BASELINE_REV, help="Git revision of the normalizer to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    normalize = _load_normalizer()
+    baseline = _load_baseline(args.baseline)
+    corpus = [_receipt(rng, date(2026, 1, 1) + timedelta(days=rng.randint(0, 364))) for _ in range(args.receipts)]
+
+    print(f"{'mode':<8} {'merchant':>9} {'date':>7} {'total':>7} {'items':>7} {'us/receipt':>11}")
+    for mode, fn, use_blocks in (("baseline", baseline, False), ("text", normalize, False),
+                                 ("blocks", normalize, True)):
+        r = _score(fn, corpus, use_blocks)
+        print(f"{mode:<8} {r['merchant']:>9.1%} {r['date']:>7.1%} {r['total']:>7.1%} {r['items']:>7.1%} {r['us']:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
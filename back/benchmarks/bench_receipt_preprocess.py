@@ -0,0 +1,111 @@
+"""Receipt image preprocessing: bytes saved and OCR stage latency before/after.
+
+Usage: python -m benchmarks.bench_receipt_preprocess [--images 20] [--width 4032] [--height 3024]
+
+Synthesizes phone-sized receipt photos (text on paper with sensor noise and an
+EXIF rotation), preprocesses them through the worker pool and times the OCR
+stage on the original and the processed files: reading the object from local
+storage plus `MockProvider.extract` from `ocr-lambda/`. MockProvider has a
+fixed cost, so the difference is what image size costs the stage (transfer,
+hashing); a real provider's time also scales with pixel count.
+"""
+import argparse
+import hashlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from utils.receipt_images import get_preprocess_pool, preprocess_image
+from utils.storage import LocalStorage
+
+
+def _load_mock_provider():
+    lambda_dir = Path(os.getenv("OCR_LAMBDA_DIR", Path(__file__).resolve().parents[2] / "ocr-lambda"))
+    sys.path.insert(0, str(lambda_dir))
+    from providers import MockProvider  # noqa: E402 - ocr-lambda is not a package
+
+    return MockProvider()
+
+
+def _photo(width: int, height: int, rng: random.Random) -> bytes:
+    img = Image.new("L", (width, height), 235)
+    draw = ImageDraw.Draw(img)
+    for y in range(height // 10, height - height // 10, max(height // 60, 12)):
+        x = width // 6
+        words = " ".join("".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=rng.randint(3, 9)))
+                         for _ in range(rng.randint(2, 6)))
+        draw.text((x, y), words, fill=20, font_size=max(height // 80, 10))
+    noise = Image.effect_noise((width, height), 12)
+    photo = Image.blend(img, noise, 0.15).convert("RGB")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW to display
+    out = io.BytesIO()
+    photo.save(out, "JPEG", quality=92, exif=exif.tobytes())
+    return out.getvalue()
+
+
+def _ocr_stage(storage: LocalStorage, provider, keys: list[str]) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        data = storage.get(key)
+        hashlib.sha256(data).hexdigest()
+        provider.extract(storage.uri(key))
+    return (time.perf_counter() - start) / len(keys) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark receipt image preprocessing")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    provider = _load_mock_provider()
+    originals = [_photo(args.width, args.height, rng) for _ in range(args.images)]
+
+    start = time.perf_counter()
+    list(map(preprocess_image, originals[:2]))  # warm the decoder
+    serial_ms = (time.perf_counter() - start) / 2 * 1000
+    pool = get_preprocess_pool()
+    if pool is None:
+        raise SystemExit("worker processes cannot start here; preprocessing runs in-process")
+    list(pool.map(preprocess_image, originals[:1]))  # start the workers
+    start = time.perf_counter()
+    processed = list(pool.map(preprocess_image, originals))
+    pool_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as root:
+        storage = LocalStorage(Path(root), "http://localhost/upload", "bench", "secret")
+        before_keys, after_keys = [], []
+        for n, (original, result) in enumerate(zip(originals, processed)):
+            before_keys.append(f"receipts/bench/original_{n}.jpg")
+            after_keys.append(f"receipts/bench/processed_{n}.jpg")
+            storage.put(before_keys[-1], io.BytesIO(original), "image/jpeg")
+            storage.put(after_keys[-1], io.BytesIO(result.data), "image/jpeg")
+        before_ms = _ocr_stage(storage, provider, before_keys)
+        after_ms = _ocr_stage(storage, provider, after_keys)
+
+    before_bytes = sum(len(data) for data in originals)
+    after_bytes = sum(len(result.data) for result in processed)
+    thumb_bytes = sum(len(result.thumbnail) for result in processed)
+    print(f"images:             {args.images} x {args.width}x{args.height} -> {processed[0].width}x{processed[0].height}")
+    print(f"bytes before:       {before_bytes / args.images / 1024:8.0f} KiB/image")
+    print(f"bytes after:        {after_bytes / args.images / 1024:8.0f} KiB/image "
+          f"({1 - after_bytes / before_bytes:.0%} saved), thumbnail {thumb_bytes / args.images / 1024:.0f} KiB")
+    print(f"preprocess:         {serial_ms:8.1f} ms/image serial, "
+          f"{args.images / pool_seconds:.1f} images/s in the pool")
+    print(f"OCR stage before:   {before_ms:8.2f} ms/image")
+    print(f"OCR stage after:    {after_ms:8.2f} ms/image")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
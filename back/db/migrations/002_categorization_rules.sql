@@ -0,0 +1,40 @@
+-- User-defined categorization rules, compiled per user into an Aho-Corasick
+-- matcher (back/utils/categorize.py) and applied on create, import and bulk.
+
+CREATE TABLE IF NOT EXISTS categorization_rules (
+    id              TEXT PRIMARY KEY,
+    user_id         TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    pattern         TEXT NOT NULL,
+    field           TEXT NOT NULL DEFAULT 'any',
+    category_id     TEXT NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+    notes           TEXT,
+    priority        INTEGER NOT NULL DEFAULT 0,
+    is_active       BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'categorization_rules_field_ck'
+    ) THEN
+        ALTER TABLE categorization_rules
+            ADD CONSTRAINT categorization_rules_field_ck
+            CHECK (field IN ('merchant','description','notes','any'));
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS categorization_rules_user_idx
+    ON categorization_rules (user_id, is_active, priority DESC);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger WHERE tgname = 'categorization_rules_set_updated_at'
+    ) THEN
+        CREATE TRIGGER categorization_rules_set_updated_at
+        BEFORE UPDATE ON categorization_rules
+        FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+    END IF;
+END $$;
@@ -0,0 +1,14 @@
+-- Interned merchants table and transactions.merchant_id.
+-- Existing rows are backfilled by `python -m jobs.backfill_merchants`, since
+-- canonicalization rules live in Python (back/utils/merchants.py).
+
+CREATE TABLE IF NOT EXISTS merchants (
+    id              INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name            TEXT NOT NULL UNIQUE,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS merchant_id INTEGER REFERENCES merchants(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS transactions_user_merchant_idx
+    ON transactions (user_id, merchant_id, txn_date);
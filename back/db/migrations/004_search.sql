@@ -0,0 +1,19 @@
+-- Full-text search over transactions and receipt OCR text, plus trigram
+-- indexes for fuzzy merchant matches (GET /api/v1/search).
+-- Adding a stored generated column rewrites each table once.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(description, '') || ' ' || coalesce(notes, ''))
+) STORED;
+
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(ocr_raw_text, ''))
+    || jsonb_to_tsvector('simple', coalesce(line_items, '[]'::jsonb), '["string"]')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS transactions_search_idx ON transactions USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS transactions_merchant_trgm_idx ON transactions USING gin (merchant gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS receipts_search_idx ON receipts USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS receipts_merchant_trgm_idx ON receipts USING gin (merchant gin_trgm_ops);
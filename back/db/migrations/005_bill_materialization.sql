@@ -0,0 +1,7 @@
+-- Bill materialization: each bill row is one occurrence of a recurring rule,
+-- identified by (rule_id, period_month) so re-running the expansion is a no-op.
+
+ALTER TABLE bills ADD COLUMN IF NOT EXISTS period_month TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS bills_rule_period_ux ON bills (rule_id, period_month);
+CREATE INDEX IF NOT EXISTS recurring_rules_user_idx ON recurring_rules (user_id);
@@ -0,0 +1,16 @@
+-- Recurring-payment candidates mined from transaction history; one row per
+-- (user, merchant), rewritten on each mining run.
+
+CREATE TABLE IF NOT EXISTS recurring_suggestions (
+    user_id         TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    merchant_id     INTEGER NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    cadence         TEXT NOT NULL,
+    day_of_month    INTEGER,
+    amount_cents    INTEGER NOT NULL,
+    occurrences     INTEGER NOT NULL,
+    interval_days   NUMERIC(6,1) NOT NULL,
+    confidence      NUMERIC(5,4) NOT NULL,
+    last_date       DATE NOT NULL,
+    computed_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, merchant_id)
+);
@@ -0,0 +1,6 @@
+-- Variable-amount recurring rules: PREDICTED rules take each period's amount
+-- from their recent paid bills instead of the fixed amount_cents.
+
+ALTER TABLE recurring_rules ADD COLUMN IF NOT EXISTS amount_mode TEXT NOT NULL DEFAULT 'FIXED';
+ALTER TABLE recurring_rules ADD COLUMN IF NOT EXISTS prediction_method TEXT;
+ALTER TABLE recurring_rules ADD COLUMN IF NOT EXISTS prediction_months INTEGER;
@@ -0,0 +1,11 @@
+-- OCR dispatch state on receipts: the API enqueues uploaded receipts for the
+-- OCR worker and retries until the callback acks them.
+
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS ocr_dispatch TEXT;
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS ocr_attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS ocr_enqueued_at TIMESTAMPTZ;
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS ocr_next_attempt_at TIMESTAMPTZ;
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS ocr_acked_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS receipts_ocr_dispatch_idx ON receipts (ocr_next_attempt_at)
+    WHERE ocr_dispatch IN ('pending', 'enqueued');
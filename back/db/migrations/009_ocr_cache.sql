@@ -0,0 +1,18 @@
+-- Content-addressed OCR result cache: receipts remember the SHA-256 of their
+-- image and provider output is stored once per hash.
+
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
+
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    content_sha256  TEXT PRIMARY KEY,
+    provider        TEXT NOT NULL,
+    raw_text        TEXT NOT NULL,
+    raw_blocks      JSONB,
+    confidence      NUMERIC(5,4),
+    size_bytes      INTEGER NOT NULL,
+    hits            INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_used_at    TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ocr_cache_last_used_idx ON ocr_cache (last_used_at);
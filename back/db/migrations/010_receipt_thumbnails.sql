@@ -0,0 +1,4 @@
+-- Receipt images are preprocessed (oriented, stripped, downsized) before OCR;
+-- the list view reads a small thumbnail stored next to the image.
+
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS thumbnail_url TEXT;
@@ -0,0 +1,13 @@
+-- Raw OCR blocks are rarely read after review; older ones move to a
+-- zstd-compressed side table (jobs/archive_ocr_payloads.py) and are read back
+-- when the receipt detail is opened.
+
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS ocr_archived_at TIMESTAMPTZ;
+
+CREATE TABLE IF NOT EXISTS receipt_ocr_archive (
+    receipt_id      TEXT PRIMARY KEY REFERENCES receipts(id) ON DELETE CASCADE,
+    codec           TEXT NOT NULL DEFAULT 'zstd',
+    payload         BYTEA NOT NULL,
+    raw_bytes       INTEGER NOT NULL,
+    archived_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
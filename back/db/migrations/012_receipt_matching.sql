@@ -0,0 +1,4 @@
+-- Receipts are matched to transactions by exact amount within a date window
+-- (DB.match_receipt_transactions).
+
+CREATE INDEX IF NOT EXISTS transactions_user_amount_date_idx ON transactions (user_id, amount_cents, txn_date);
@@ -0,0 +1,4 @@
+-- Bills whose amount the user edited keep it when PREDICTED rules refresh
+-- their open projected bills (DB._apply_predicted_amounts).
+
+ALTER TABLE bills ADD COLUMN IF NOT EXISTS amount_edited BOOLEAN NOT NULL DEFAULT FALSE;
@@ -0,0 +1,4 @@
+-- Receipts the user unlinked from their transaction are not matched again
+-- (DB.match_receipt_transactions).
+
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS match_dismissed BOOLEAN NOT NULL DEFAULT FALSE;
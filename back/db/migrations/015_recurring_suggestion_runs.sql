@@ -0,0 +1,8 @@
+-- Last recurring-suggestion mining run per user (DB.refresh_recurring_suggestions).
+-- GET /recurring/suggestions compares against it, so a user whose history
+-- yields no candidates is not re-mined on every request.
+
+CREATE TABLE IF NOT EXISTS recurring_suggestion_runs (
+    user_id         TEXT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    computed_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
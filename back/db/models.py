@@ -3,19 +3,25 @@ from sqlalchemy import (
     Column,
     String,
     Integer,
+    LargeBinary,
     Boolean,
     Date,
     Text,
     ForeignKey,
+    Identity,
     Numeric,
     TIMESTAMP,
     Index,
     func,
+    false,
     JSON,
     CheckConstraint,
+    Computed,
+    DDL,
+    event,
 )
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 Base = declarative_base()
 JSON_TYPE = JSON().with_variant(JSONB, "postgresql")
@@ -24,6 +30,24 @@ def now_ts():
     return datetime.now(timezone.utc)
 
 
+# Fuzzy merchant search relies on trigram operators (mirrors schema.sql).
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Generated full-text documents. The 'simple' config skips stemming and stop
+# words, which suits merchant names and mixed Spanish/English notes.
+TRANSACTION_SEARCH_DOCUMENT = (
+    "to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(description, '') || ' ' || coalesce(notes, ''))"
+)
+RECEIPT_SEARCH_DOCUMENT = (
+    "to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(ocr_raw_text, ''))"
+    " || jsonb_to_tsvector('simple', coalesce(line_items, '[]'::jsonb), '[\"string\"]')"
+)
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(String, primary_key=True)
@@ -183,6 +207,14 @@ class ObjectiveMonthPlan(Base):
     updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts, onupdate=now_ts)
 
 
+class Merchant(Base):
+    """Interned canonical merchant names (see utils/merchants.py)."""
+    __tablename__ = "merchants"
+    id = Column(Integer, Identity(), primary_key=True)
+    name = Column(Text, nullable=False, unique=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
+
+
 class Transaction(Base):
     __tablename__ = "transactions"
     __table_args__ = (
@@ -199,6 +231,7 @@ class Transaction(Base):
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     txn_date = Column(Date, nullable=False)
     merchant = Column(Text, nullable=False)
+    merchant_id = Column(Integer, ForeignKey("merchants.id", ondelete="SET NULL"))
     description = Column(Text)
     amount_cents = Column(Integer, nullable=False)
     currency = Column(Text, nullable=False)
@@ -212,6 +245,7 @@ class Transaction(Base):
     account_id = Column(Text)
     receipt_id = Column(String, ForeignKey("receipts.id", ondelete="SET NULL"))
     splits = Column(JSON_TYPE)
+    search_vector = deferred(Column(TSVECTOR, Computed(TRANSACTION_SEARCH_DOCUMENT, persisted=True)))
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
     updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts, onupdate=now_ts)
 
@@ -225,18 +259,61 @@ class Receipt(Base):
     total_cents = Column(Integer, nullable=False)
     status = Column(Text, nullable=False)
     image_url = Column(Text)
+    # Small JPEG for list views (utils/receipt_images.py); NULL when the upload was not an image.
+    thumbnail_url = Column(Text)
     line_items = Column(JSON_TYPE)
     transaction_id = Column(String, ForeignKey("transactions.id", ondelete="SET NULL"))
     ocr_provider = Column(Text)
     ocr_confidence = Column(Numeric(5, 4))
-    ocr_raw_text = Column(Text)
-    ocr_raw_blocks = Column(JSON_TYPE)
+    # OCR payload: large and only needed on the receipt detail, so loaded on demand (group "ocr_payload").
+    ocr_raw_text = deferred(Column(Text), group="ocr_payload")
+    ocr_raw_blocks = deferred(Column(JSON_TYPE), group="ocr_payload")
     ocr_error = Column(Text)
-    parsed_receipt = Column(JSON_TYPE)
+    parsed_receipt = deferred(Column(JSON_TYPE), group="ocr_payload")
     needs_review = Column(Boolean, nullable=False, default=False)
+    # OCR dispatch (see utils/ocr_queue.py): pending -> enqueued -> acked, or failed
+    # after OCR_MAX_ATTEMPTS. NULL for receipts that never go through OCR.
+    ocr_dispatch = Column(Text)
+    ocr_attempts = Column(Integer, nullable=False, default=0)
+    ocr_enqueued_at = Column(TIMESTAMP(timezone=True))
+    ocr_next_attempt_at = Column(TIMESTAMP(timezone=True))
+    ocr_acked_at = Column(TIMESTAMP(timezone=True))
+    # SHA-256 of the image bytes (hex); keys the OCR result cache (ocr_cache).
+    content_sha256 = Column(Text)
+    # Set when ocr_raw_blocks was moved to receipt_ocr_archive (jobs/archive_ocr_payloads.py).
+    ocr_archived_at = Column(TIMESTAMP(timezone=True))
+    # Set when the user unlinks the receipt; automatic matching leaves it alone from then on.
+    match_dismissed = Column(Boolean, nullable=False, default=False, server_default=false())
+    search_vector = deferred(Column(TSVECTOR, Computed(RECEIPT_SEARCH_DOCUMENT, persisted=True)))
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
     updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts, onupdate=now_ts)
 
+    ocr_archive = relationship("ReceiptOcrArchive", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+
+
+class ReceiptOcrArchive(Base):
+    """A receipt's raw OCR blocks after archival, zstd-compressed JSON (utils/ocr_archive.py)."""
+    __tablename__ = "receipt_ocr_archive"
+    receipt_id = Column(String, ForeignKey("receipts.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(Text, nullable=False, default="zstd")
+    payload = Column(LargeBinary, nullable=False)
+    raw_bytes = Column(Integer, nullable=False)
+    archived_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
+
+
+class OcrCacheEntry(Base):
+    """Provider output per image content hash, shared by every receipt with the same bytes."""
+    __tablename__ = "ocr_cache"
+    content_sha256 = Column(Text, primary_key=True)
+    provider = Column(Text, nullable=False)
+    raw_text = Column(Text, nullable=False)
+    raw_blocks = Column(JSON_TYPE)
+    confidence = Column(Numeric(5, 4))
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
+    last_used_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
+
 
 class RecurringRule(Base):
     __tablename__ = "recurring_rules"
@@ -252,6 +329,11 @@ class RecurringRule(Base):
     end_date = Column(Date)
     autopost_mode = Column(Text)
     is_paused = Column(Boolean, nullable=False, default=False)
+    # FIXED uses amount_cents; PREDICTED derives each period's amount from past bills
+    # (see utils/amount_prediction.py) and keeps amount_cents as the no-history fallback.
+    amount_mode = Column(Text, nullable=False, default="FIXED")
+    prediction_method = Column(Text)
+    prediction_months = Column(Integer)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
     updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts, onupdate=now_ts)
 
@@ -268,6 +350,52 @@ class Bill(Base):
     category_id = Column(String, ForeignKey("categories.id", ondelete="SET NULL"))
     status = Column(Text)
     linked_txn_id = Column(String, ForeignKey("transactions.id", ondelete="SET NULL"))
+    # Occurrence identity within the rule: 'YYYY-MM' for MONTHLY, the due date for WEEKLY.
+    period_month = Column(Text)
+    # Set when the user edits the amount; predicted-amount refreshes leave the bill alone.
+    amount_edited = Column(Boolean, nullable=False, default=False, server_default=false())
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts, onupdate=now_ts)
+
+
+class RecurringSuggestion(Base):
+    """Mined recurring-payment candidates (see utils/subscriptions.py), replaced per user on each run."""
+    __tablename__ = "recurring_suggestions"
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    merchant_id = Column(Integer, ForeignKey("merchants.id", ondelete="CASCADE"), primary_key=True)
+    cadence = Column(Text, nullable=False)
+    day_of_month = Column(Integer)
+    amount_cents = Column(Integer, nullable=False)
+    occurrences = Column(Integer, nullable=False)
+    interval_days = Column(Numeric(6, 1), nullable=False)
+    confidence = Column(Numeric(5, 4), nullable=False)
+    last_date = Column(Date, nullable=False)
+    computed_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
+
+
+class RecurringSuggestionRun(Base):
+    """When each user's suggestions were last mined, including runs that found none."""
+    __tablename__ = "recurring_suggestion_runs"
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    computed_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
+
+
+class CategorizationRule(Base):
+    __tablename__ = "categorization_rules"
+    __table_args__ = (
+        CheckConstraint(
+            "field IN ('merchant','description','notes','any')",
+            name="categorization_rules_field_ck",
+        ),
+    )
+    id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    pattern = Column(Text, nullable=False)
+    field = Column(Text, nullable=False, default="any")
+    category_id = Column(String, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    notes = Column(Text)
+    priority = Column(Integer, nullable=False, default=0)
+    is_active = Column(Boolean, nullable=False, default=True)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts)
     updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=now_ts, onupdate=now_ts)
 
@@ -354,12 +482,75 @@ Index(
     Transaction.id,
     postgresql_where=(Transaction.category_id.is_(None) & (Transaction.amount_cents < 0)),
 )
+Index(
+    "transactions_user_merchant_idx",
+    Transaction.user_id,
+    Transaction.merchant_id,
+    Transaction.txn_date,
+)
+Index(
+    # Receipt matching (DB.match_receipt_transactions): exact amount, then a date window.
+    "transactions_user_amount_date_idx",
+    Transaction.user_id,
+    Transaction.amount_cents,
+    Transaction.txn_date,
+)
+Index(
+    "transactions_search_idx",
+    Transaction.search_vector,
+    postgresql_using="gin",
+)
+Index(
+    "transactions_merchant_trgm_idx",
+    Transaction.merchant,
+    postgresql_using="gin",
+    postgresql_ops={"merchant": "gin_trgm_ops"},
+)
+Index(
+    "receipts_search_idx",
+    Receipt.search_vector,
+    postgresql_using="gin",
+)
+Index(
+    "receipts_merchant_trgm_idx",
+    Receipt.merchant,
+    postgresql_using="gin",
+    postgresql_ops={"merchant": "gin_trgm_ops"},
+)
 Index(
     "bills_user_due_date_idx",
     Bill.user_id,
     Bill.due_date,
     Bill.id,
 )
+Index(
+    # Materializer identity: ON CONFLICT (rule_id, period_month) DO NOTHING.
+    "bills_rule_period_ux",
+    Bill.rule_id,
+    Bill.period_month,
+    unique=True,
+)
+Index(
+    # Dispatcher claim: due receipts among the (few) not yet acked.
+    "receipts_ocr_dispatch_idx",
+    Receipt.ocr_next_attempt_at,
+    postgresql_where=Receipt.ocr_dispatch.in_(("pending", "enqueued")),
+)
+Index(
+    # Size-based eviction drops least recently used entries first.
+    "ocr_cache_last_used_idx",
+    OcrCacheEntry.last_used_at,
+)
+Index(
+    "recurring_rules_user_idx",
+    RecurringRule.user_id,
+)
+Index(
+    "categorization_rules_user_idx",
+    CategorizationRule.user_id,
+    CategorizationRule.is_active,
+    CategorizationRule.priority.desc(),
+)
 Index(
     "fund_prices_user_date_idx",
     FundPrice.user_id,
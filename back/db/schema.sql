@@ -3,6 +3,7 @@
 
 -- Enable useful extensions
 CREATE EXTENSION IF NOT EXISTS pgcrypto; -- for gen_random_uuid if needed
+CREATE EXTENSION IF NOT EXISTS pg_trgm;  -- fuzzy merchant search
 
 -- Users
 CREATE TABLE users (
@@ -160,12 +161,22 @@ CREATE TABLE budget_rule_month_overrides (
 CREATE INDEX budget_rule_month_overrides_month_idx ON budget_rule_month_overrides (month, rule_id);
 
 
+-- Interned canonical merchant names (back/utils/merchants.py). Global, not per user:
+-- the table only maps text to an integer id; analytics always filter by user.
+CREATE TABLE merchants (
+    id              INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name            TEXT NOT NULL UNIQUE,   -- e.g. RAPPI, CARNICERIA
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+
 -- Transactions
 CREATE TABLE transactions (
     id              TEXT PRIMARY KEY,       -- txn_xxx
     user_id         TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     txn_date        DATE NOT NULL,
     merchant        TEXT NOT NULL,
+    merchant_id     INTEGER REFERENCES merchants(id) ON DELETE SET NULL,
     description     TEXT,
     amount_cents    INTEGER NOT NULL,       -- negative = expense
     currency        TEXT NOT NULL,
@@ -178,6 +189,9 @@ CREATE TABLE transactions (
     account_id      TEXT,
     receipt_id      TEXT,                   -- FK added after receipts table
     splits          JSONB,
+    search_vector   TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(description, '') || ' ' || coalesce(notes, ''))
+    ) STORED,
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     CONSTRAINT transactions_entry_type_ck CHECK (
@@ -200,6 +214,16 @@ CREATE INDEX transactions_uncat_idx
     WHERE category_id IS NULL AND amount_cents < 0;
 
 
+-- Top-merchant analytics group by merchant_id within a user's date range.
+CREATE INDEX transactions_user_merchant_idx ON transactions (user_id, merchant_id, txn_date);
+
+-- Receipt matching: exact amount, then a date window.
+CREATE INDEX transactions_user_amount_date_idx ON transactions (user_id, amount_cents, txn_date);
+
+-- Full-text and fuzzy merchant search (GET /search).
+CREATE INDEX transactions_search_idx ON transactions USING gin (search_vector);
+CREATE INDEX transactions_merchant_trgm_idx ON transactions USING gin (merchant gin_trgm_ops);
+
 -- Receipts
 CREATE TABLE receipts (
     id              TEXT PRIMARY KEY,       -- rcpt_xxx
@@ -209,6 +233,7 @@ CREATE TABLE receipts (
     total_cents     INTEGER NOT NULL,
     status          TEXT NOT NULL,
     image_url       TEXT,
+    thumbnail_url   TEXT,                   -- preprocessed list thumbnail (NULL for PDFs)
     line_items      JSONB,
     transaction_id  TEXT REFERENCES transactions(id) ON DELETE SET NULL,
     ocr_provider    TEXT,
@@ -218,10 +243,55 @@ CREATE TABLE receipts (
     ocr_error       TEXT,
     parsed_receipt  JSONB,
     needs_review    BOOLEAN NOT NULL DEFAULT FALSE,
+    ocr_dispatch    TEXT,                   -- pending | enqueued | acked | failed (NULL: no OCR)
+    ocr_attempts    INTEGER NOT NULL DEFAULT 0,
+    ocr_enqueued_at TIMESTAMPTZ,
+    ocr_next_attempt_at TIMESTAMPTZ,        -- retry / ack-timeout deadline
+    ocr_acked_at    TIMESTAMPTZ,
+    content_sha256  TEXT,                   -- hex SHA-256 of the image, keys ocr_cache
+    ocr_archived_at TIMESTAMPTZ,            -- ocr_raw_blocks moved to receipt_ocr_archive
+    match_dismissed BOOLEAN NOT NULL DEFAULT FALSE,  -- user unlinked it, skipped by matching
+    search_vector   TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(ocr_raw_text, ''))
+        || jsonb_to_tsvector('simple', coalesce(line_items, '[]'::jsonb), '["string"]')
+    ) STORED,
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- OCR dispatcher claims due receipts that are not yet acked.
+CREATE INDEX receipts_ocr_dispatch_idx ON receipts (ocr_next_attempt_at)
+    WHERE ocr_dispatch IN ('pending', 'enqueued');
+
+CREATE INDEX receipts_search_idx ON receipts USING gin (search_vector);
+CREATE INDEX receipts_merchant_trgm_idx ON receipts USING gin (merchant gin_trgm_ops);
+
+-- Raw OCR blocks of older receipts, moved out of the hot table by
+-- jobs/archive_ocr_payloads.py and read back on the receipt detail.
+CREATE TABLE receipt_ocr_archive (
+    receipt_id      TEXT PRIMARY KEY REFERENCES receipts(id) ON DELETE CASCADE,
+    codec           TEXT NOT NULL DEFAULT 'zstd',
+    payload         BYTEA NOT NULL,         -- compressed JSON of ocr_raw_blocks
+    raw_bytes       INTEGER NOT NULL,       -- size of that JSON uncompressed
+    archived_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Provider OCR output by image content hash: duplicate uploads and retries skip
+-- the provider. Evicted by age and total size (jobs/evict_ocr_cache.py).
+CREATE TABLE ocr_cache (
+    content_sha256  TEXT PRIMARY KEY,
+    provider        TEXT NOT NULL,
+    raw_text        TEXT NOT NULL,
+    raw_blocks      JSONB,
+    confidence      NUMERIC(5,4),
+    size_bytes      INTEGER NOT NULL,
+    hits            INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_used_at    TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX ocr_cache_last_used_idx ON ocr_cache (last_used_at);
+
 -- Wire receipt -> transaction FK now that both exist
 ALTER TABLE transactions
     ADD CONSTRAINT transactions_receipt_fk
@@ -242,10 +312,14 @@ CREATE TABLE recurring_rules (
     end_date        DATE,
     autopost_mode   TEXT,
     is_paused       BOOLEAN NOT NULL DEFAULT FALSE,
+    amount_mode     TEXT NOT NULL DEFAULT 'FIXED',  -- FIXED | PREDICTED
+    prediction_method TEXT,                 -- MEDIAN | EWMA | SEASONAL (PREDICTED only)
+    prediction_months INTEGER,              -- lookback N in months
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+CREATE INDEX recurring_rules_user_idx ON recurring_rules (user_id);
 
 -- Bills (instances)
 CREATE TABLE bills (
@@ -259,6 +333,8 @@ CREATE TABLE bills (
     category_id     TEXT REFERENCES categories(id) ON DELETE SET NULL,
     status          TEXT,
     linked_txn_id   TEXT REFERENCES transactions(id) ON DELETE SET NULL,
+    period_month    TEXT,                   -- 'YYYY-MM' (MONTHLY) or due date (WEEKLY)
+    amount_edited   BOOLEAN NOT NULL DEFAULT FALSE,  -- user-set amount, kept by predictions
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
@@ -266,6 +342,50 @@ CREATE TABLE bills (
 -- Upcoming bills ordering (replaces GSI3)
 CREATE INDEX bills_user_due_date_idx ON bills (user_id, due_date, id);
 
+-- One bill per rule occurrence; the materializer relies on ON CONFLICT against it.
+CREATE UNIQUE INDEX bills_rule_period_ux ON bills (rule_id, period_month);
+
+
+-- Recurring-payment candidates mined from transaction history (utils/subscriptions.py).
+-- Rewritten per user by the nightly job and on demand by GET /recurring/suggestions.
+CREATE TABLE recurring_suggestions (
+    user_id         TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    merchant_id     INTEGER NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    cadence         TEXT NOT NULL,          -- MONTHLY | WEEKLY
+    day_of_month    INTEGER,
+    amount_cents    INTEGER NOT NULL,       -- median charge, negative
+    occurrences     INTEGER NOT NULL,
+    interval_days   NUMERIC(6,1) NOT NULL,
+    confidence      NUMERIC(5,4) NOT NULL,
+    last_date       DATE NOT NULL,
+    computed_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, merchant_id)
+);
+
+-- Last mining run per user, so users without candidates are not re-mined on every request.
+CREATE TABLE recurring_suggestion_runs (
+    user_id         TEXT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    computed_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+
+-- User-defined categorization rules ("description contains UBER -> Transport").
+-- Compiled per user into one Aho-Corasick automaton in back/utils/categorize.py.
+CREATE TABLE categorization_rules (
+    id              TEXT PRIMARY KEY,       -- crule_xxx
+    user_id         TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    pattern         TEXT NOT NULL,          -- case/accent-insensitive substring
+    field           TEXT NOT NULL DEFAULT 'any',
+    category_id     TEXT NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+    notes           TEXT,                   -- applied when the transaction has none
+    priority        INTEGER NOT NULL DEFAULT 0,
+    is_active       BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT categorization_rules_field_ck CHECK (field IN ('merchant','description','notes','any'))
+);
+CREATE INDEX categorization_rules_user_idx ON categorization_rules (user_id, is_active, priority DESC);
+
 
 -- Funds (for investment features present in dummy data)
 CREATE TABLE funds (
@@ -330,6 +450,7 @@ CREATE TRIGGER transactions_set_updated_at BEFORE UPDATE ON transactions FOR EAC
 CREATE TRIGGER receipts_set_updated_at BEFORE UPDATE ON receipts FOR EACH ROW EXECUTE FUNCTION set_updated_at();
 CREATE TRIGGER recurring_rules_set_updated_at BEFORE UPDATE ON recurring_rules FOR EACH ROW EXECUTE FUNCTION set_updated_at();
 CREATE TRIGGER bills_set_updated_at BEFORE UPDATE ON bills FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+CREATE TRIGGER categorization_rules_set_updated_at BEFORE UPDATE ON categorization_rules FOR EACH ROW EXECUTE FUNCTION set_updated_at();
 CREATE TRIGGER funds_set_updated_at BEFORE UPDATE ON funds FOR EACH ROW EXECUTE FUNCTION set_updated_at();
 CREATE TRIGGER investment_txs_set_updated_at BEFORE UPDATE ON investment_txs FOR EACH ROW EXECUTE FUNCTION set_updated_at();
 CREATE TRIGGER objectives_set_updated_at BEFORE UPDATE ON objectives FOR EACH ROW EXECUTE FUNCTION set_updated_at();
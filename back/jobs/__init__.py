@@ -0,0 +1 @@
+# Batch jobs runnable as `python -m jobs.<name>` (cron, one-shot containers).
@@ -0,0 +1,33 @@
+"""Move raw OCR blocks of older receipts to the compressed archive table.
+
+Usage: `python -m jobs.archive_ocr_payloads [--older-than-days N] [--batch-size N]`.
+Meant for a nightly cron. `receipts.ocr_raw_blocks` of receipts OCR'd more
+than `--older-than-days` ago (default 90) is zstd-compressed into
+`receipt_ocr_archive` and cleared from the hot table, `--batch-size` receipts
+per transaction. `GET /receipts/{id}` reads archived blocks back transparently.
+Prints the counters and the size reduction as one JSON line: `hotBytes`
+(what the blocks took in `receipts`), `archiveBytes`, `rawBytes` (uncompressed
+JSON) and `reduction` (1 - archiveBytes / hotBytes).
+"""
+import argparse
+import json
+from datetime import timedelta
+
+from db import SessionLocal
+from utils.db import DB, OCR_ARCHIVE_AFTER_DAYS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--older-than-days", type=int, default=OCR_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        metrics = DB(session).archive_ocr_payloads(timedelta(days=args.older_than_days), args.batch_size)
+    print(json.dumps({"job": "archive_ocr_payloads", **metrics}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
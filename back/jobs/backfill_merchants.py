@@ -0,0 +1,24 @@
+"""Assign `transactions.merchant_id` to rows created before merchant interning.
+
+Usage: `python -m jobs.backfill_merchants [--batch-size N]`. Safe to re-run;
+only rows with a NULL merchant_id are touched.
+"""
+import argparse
+
+from db import SessionLocal
+from utils.db import DB
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        updated = DB(session).backfill_merchant_ids(batch_size=args.batch_size)
+    print(f"Backfilled merchant_id on {updated} transactions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
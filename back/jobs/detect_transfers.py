@@ -0,0 +1,31 @@
+"""Mark transfers between a user's own accounts across their whole history.
+
+Usage: `python -m jobs.detect_transfers [--user USER_ID] [--window-days N]`.
+Imports run detection for the imported date range; this job covers rows
+that predate it. Safe to re-run; already classified rows are skipped.
+"""
+import argparse
+
+from db import SessionLocal
+from utils.db import DB
+from utils.transfers import DEFAULT_WINDOW_DAYS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user", help="Only process this user id")
+    parser.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        db = DB(session)
+        user_ids = [args.user] if args.user else db.transfer_user_ids()
+        total = 0
+        for user_id in user_ids:
+            total += db.detect_transfers(user_id, window_days=args.window_days)
+    print(f"Marked {total} transfer pairs across {len(user_ids)} users")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
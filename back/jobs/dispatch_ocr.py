@@ -0,0 +1,70 @@
+"""Send pending receipts to the OCR queue and retry unacknowledged ones.
+
+Usage: `python -m jobs.dispatch_ocr [--loop SECONDS] [--limit N] [--run-worker]`.
+Uploads enqueue their receipt right away; this job picks up failed sends,
+ack timeouts and `ocr_failed` retries once their backoff has elapsed. Run it
+on a schedule (or with `--loop`) next to the API.
+
+`--run-worker` is for the SQLite queue (local development and the
+single-box compose stack): after each dispatch pass it drains the queue into
+`ocr-lambda/handler.py` in-process, the way SQS would invoke the Lambda.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from db import SessionLocal
+from utils.db import DB
+from utils.ocr_queue import LocalQueue, get_ocr_queue
+
+
+def _load_ocr_handler():
+    lambda_dir = Path(os.getenv("OCR_LAMBDA_DIR", Path(__file__).resolve().parents[2] / "ocr-lambda"))
+    sys.path.insert(0, str(lambda_dir))
+    from handler import handler  # noqa: E402 - ocr-lambda is not a package
+
+    return handler
+
+
+def _drain(queue: LocalQueue, handler) -> int:
+    processed = 0
+    while True:
+        event = queue.receive()
+        if not event["Records"]:
+            return processed
+        response = handler(event, None)
+        # Like SQS with ReportBatchItemFailures: failed records stay on the
+        # queue and come back once their visibility timeout expires.
+        failed = {item["itemIdentifier"] for item in response.get("batchItemFailures", [])}
+        queue.delete([record["messageId"] for record in event["Records"] if record["messageId"] not in failed])
+        processed += len(event["Records"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loop", type=float, default=0, help="Repeat every N seconds instead of running once")
+    parser.add_argument("--limit", type=int, default=500, help="Receipts claimed per pass")
+    parser.add_argument("--run-worker", action="store_true", help="Drain the local queue into the OCR handler")
+    args = parser.parse_args()
+
+    queue = get_ocr_queue()
+    if args.run_worker and not isinstance(queue, LocalQueue):
+        parser.error("--run-worker needs the local queue (OCR_QUEUE=local)")
+    handler = _load_ocr_handler() if args.run_worker else None
+
+    while True:
+        with SessionLocal() as session:
+            counts = DB(session).dispatch_ocr(queue, limit=args.limit)
+        if handler is not None:
+            counts["processed"] = _drain(queue, handler)
+        print(json.dumps({"job": "dispatch_ocr", **counts}), flush=True)
+        if not args.loop:
+            return 0
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,30 @@
+"""Evict OCR cache entries by age and total size.
+
+Usage: `python -m jobs.evict_ocr_cache [--max-age-days N] [--max-bytes N]`.
+Meant for a daily cron. Entries unused for `--max-age-days` are dropped, then
+the least recently used ones until the cache fits `--max-bytes`. Prints the
+eviction counters and the cache's size and cumulative hits as one JSON line
+for log-based metrics (per-batch hit rates come from the OCR worker's logs).
+"""
+import argparse
+import json
+from datetime import timedelta
+
+from db import SessionLocal
+from utils.db import DB, OCR_CACHE_MAX_AGE_DAYS, OCR_CACHE_MAX_BYTES
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-age-days", type=int, default=OCR_CACHE_MAX_AGE_DAYS)
+    parser.add_argument("--max-bytes", type=int, default=OCR_CACHE_MAX_BYTES)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        metrics = DB(session).evict_ocr_cache(timedelta(days=args.max_age_days), args.max_bytes)
+    print(json.dumps({"job": "evict_ocr_cache", **metrics}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,28 @@
+"""Link unlinked receipts to the transactions that paid them.
+
+Usage: `python -m jobs.match_receipts [--batch-size N]`.
+Matching already runs on import and on OCR completion; this job covers the
+backlog (receipts OCR'd before their transaction was imported, history from
+before matching existed). Each batch of users is one candidate query and one
+bulk UPDATE per side. Prints the counters as one JSON line.
+"""
+import argparse
+import json
+
+from db import SessionLocal
+from utils.db import DB
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per candidate query")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        metrics = DB(session).match_receipt_backlog(args.batch_size)
+    print(json.dumps({"job": "match_receipts", **metrics}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+"""Expand active recurring rules into PROJECTED bills for all users.
+
+Usage: `python -m jobs.materialize_bills [--through YYYY-MM] [--months-ahead N] [--batch-size N]`.
+Meant for cron; each batch of users is one INSERT ... SELECT ... ON CONFLICT
+DO NOTHING, so overlapping or repeated runs are harmless.
+"""
+import argparse
+import calendar
+from datetime import date, datetime, timezone
+
+from db import SessionLocal
+from utils.db import DB
+
+
+def _through_date(through: str | None, months_ahead: int, today: date) -> date:
+    if through:
+        year, month = (int(part) for part in through.split("-"))
+    else:
+        index = today.year * 12 + today.month - 1 + months_ahead
+        year, month = index // 12, index % 12 + 1
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--through", help="Last month to materialize (YYYY-MM)")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Used when --through is omitted")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per INSERT statement")
+    args = parser.parse_args()
+
+    today = datetime.now(timezone.utc).date()
+    through = _through_date(args.through, args.months_ahead, today)
+    with SessionLocal() as session:
+        created = DB(session).materialize_bills(through, today.replace(day=1), batch_size=args.batch_size)
+    print(f"Materialized {created} bills through {through.isoformat()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
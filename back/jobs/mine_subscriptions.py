@@ -0,0 +1,31 @@
+"""Re-mine recurring-payment suggestions for every user.
+
+Usage: `python -m jobs.mine_subscriptions [--user USER_ID] [--batch-size N]`.
+Meant for a nightly cron so `GET /recurring/suggestions` is served from the
+stored result. Each batch of users replaces its own rows in one commit, so an
+interrupted run leaves earlier batches fresh and later ones as they were.
+"""
+import argparse
+from datetime import datetime, timezone
+
+from db import SessionLocal
+from utils.db import DB
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user", help="Only process this user id")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users mined per history query")
+    args = parser.parse_args()
+
+    today = datetime.now(timezone.utc).date()
+    with SessionLocal() as session:
+        stored = DB(session).refresh_recurring_suggestions(
+            today, [args.user] if args.user else None, batch_size=args.batch_size
+        )
+    print(f"Stored {stored} recurring suggestions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""Re-run the OCR normalizer over stored receipts after it improves.
+
+Usage: `python -m jobs.renormalize_receipts [--user USER_ID] [--after RECEIPT_ID] [--state FILE]
+[--workers N] [--batch-size N] [--dry-run]`.
+
+Receipts with stored OCR output (`ocr_raw_text`/`ocr_raw_blocks`) are streamed
+in id order through a server-side cursor, normalized in a `multiprocessing`
+pool with `ocr-lambda/normalizer.py`, and written back in bulk updates of
+`--batch-size` rows. Memory stays flat however many receipts there are.
+
+`parsed_receipt` is always replaced. The receipt columns derived from it
+(merchant, date, total, line items, needsReview) are only replaced while they
+still hold the previous parse, so corrections made during review survive. The
+write re-checks every column against the value that was read, so an edit saved
+while the batch was being normalized survives too.
+
+Resuming: after each committed batch the last receipt id is written to
+`--state` (and printed in the progress line); rerunning with the same file,
+or with `--after`, continues from there. `--dry-run` writes nothing and prints
+one JSON line per changed receipt with `{field: [old, new]}`.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from db import SessionLocal
+from utils.db import DB
+
+# Receipt field -> path of the value inside parsed_receipt.
+_DERIVED = {
+    "merchant": ("merchant",),
+    "date": ("purchaseDate",),
+    "total": ("totals", "grandTotal"),
+    "lineItems": ("items",),
+    "needsReview": ("needsReview",),
+}
+_PROGRESS_SECONDS = 5.0
+
+_normalize = None
+
+
+def _init_worker(lambda_dir: str) -> None:
+    global _normalize
+    sys.path.insert(0, lambda_dir)
+    from normalizer import normalize_receipt  # noqa: E402 - ocr-lambda is not a package
+
+    _normalize = normalize_receipt
+
+
+def _parsed_value(parsed: Optional[Dict[str, Any]], path: tuple) -> Any:
+    value: Any = parsed or {}
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _comparable(field: str, value: Any) -> Any:
+    # Line items went through the callback model with exclude_none, so stored items lack None keys.
+    if field == "lineItems" and (value is None or isinstance(value, list)):
+        return [{k: v for k, v in item.items() if v is not None} for item in value or []]
+    return value
+
+
+def renormalize(receipt: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The receipt's new field values (plus `changes` for the diff), or None when nothing changed."""
+    parsed = _normalize(receipt["ocrRawText"] or "", receipt["ocrRawBlocks"] or [])
+    old = receipt["parsedReceipt"]
+    if old and parsed.get("dateStatus") == "missing" and old.get("purchaseDate"):
+        # The normalizer falls back to today when it finds no date; keep the date of the first parse.
+        parsed["purchaseDate"] = old["purchaseDate"]
+    if parsed == old:
+        return None
+    update = {"receiptId": receipt["receiptId"], "parsedReceipt": parsed,
+              "previous": {"parsedReceipt": old, **{field: receipt[field] for field in _DERIVED}}}
+    changes: Dict[str, List[Any]] = {}
+    for field, path in _DERIVED.items():
+        current = receipt[field]
+        new = _comparable(field, _parsed_value(parsed, path))
+        untouched = _comparable(field, current) == _comparable(field, _parsed_value(old, path))
+        if untouched and new is not None and new != _comparable(field, current):
+            update[field] = new
+            changes[field] = [current, new]
+        else:
+            update[field] = current
+    changed_keys = sorted(k for k in set(parsed) | set(old or {}) if parsed.get(k) != (old or {}).get(k))
+    changes["parsedReceipt"] = changed_keys
+    update["changes"] = changes
+    return update
+
+
+def _run(receipt: Dict[str, Any]) -> tuple:
+    return receipt["receiptId"], renormalize(receipt)
+
+
+def _read_state(path: Optional[str]) -> Optional[str]:
+    if path and os.path.exists(path):
+        return Path(path).read_text().strip() or None
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user", help="Only this user's receipts")
+    parser.add_argument("--after", help="Start after this receipt id")
+    parser.add_argument("--state", help="Checkpoint file: read to resume, rewritten after every batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per cursor fetch and per update")
+    parser.add_argument("--dry-run", action="store_true", help="Print per-receipt diffs, write nothing")
+    args = parser.parse_args()
+
+    lambda_dir = str(Path(os.getenv("OCR_LAMBDA_DIR", Path(__file__).resolve().parents[2] / "ocr-lambda")))
+    after = args.after or _read_state(args.state)
+    counts = {"scanned": 0, "changed": 0, "written": 0}
+    last_id = after
+
+    with SessionLocal() as read_session, SessionLocal() as write_session, \
+            Pool(args.workers, initializer=_init_worker, initargs=(lambda_dir,)) as pool:
+        reader, writer = DB(read_session), DB(write_session)
+        total = reader.count_ocr_receipts(after, args.user)
+        started = last_report = time.monotonic()
+        pending: List[Dict[str, Any]] = []
+
+        def flush() -> None:
+            if not args.dry_run:
+                writer.apply_renormalized(pending)
+                counts["written"] += len(pending)
+                if args.state and last_id:
+                    Path(args.state).write_text(last_id)
+            pending.clear()
+
+        receipts = reader.iter_ocr_receipts(after, args.user, batch_size=args.batch_size)
+        chunksize = max(1, args.batch_size // (4 * args.workers))
+        for receipt_id, result in pool.imap(_run, receipts, chunksize=chunksize):
+            counts["scanned"] += 1
+            last_id = receipt_id
+            if result is not None:
+                counts["changed"] += 1
+                changes = result.pop("changes")
+                if args.dry_run:
+                    print(json.dumps({"receiptId": receipt_id, "changes": changes}, default=str), flush=True)
+                pending.append(result)
+            if counts["scanned"] % args.batch_size == 0:
+                flush()
+            now = time.monotonic()
+            if now - last_report >= _PROGRESS_SECONDS:
+                last_report = now
+                rate = counts["scanned"] / (now - started)
+                eta = (total - counts["scanned"]) / rate if rate else 0
+                print(f"{counts['scanned']}/{total} receipts, {counts['changed']} changed, "
+                      f"{rate:.0f}/s, eta {eta:.0f}s, last {last_id}", file=sys.stderr, flush=True)
+        flush()
+
+    print(json.dumps({"job": "renormalize_receipts", "dryRun": args.dry_run, "lastReceiptId": last_id, **counts}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
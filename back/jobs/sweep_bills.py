@@ -0,0 +1,36 @@
+"""Advance open bill statuses for all users: PROJECTED -> DUE -> OVERDUE.
+
+Usage: `python -m jobs.sweep_bills [--due-ahead-days N] [--batch-size N] [--lock-timeout-ms N]`.
+Meant for a daily cron after `jobs.materialize_bills`. Batches that hit the
+lock timeout (a user editing bills at that moment) are skipped and picked up
+by the next run. Prints the run counters as one JSON line for log-based metrics.
+"""
+import argparse
+import json
+from datetime import datetime, timezone
+
+from db import SessionLocal
+from utils.db import BILL_DUE_AHEAD_DAYS, DB, SWEEP_LOCK_TIMEOUT_MS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--due-ahead-days", type=int, default=BILL_DUE_AHEAD_DAYS)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Users per transaction")
+    parser.add_argument("--lock-timeout-ms", type=int, default=SWEEP_LOCK_TIMEOUT_MS)
+    args = parser.parse_args()
+
+    today = datetime.now(timezone.utc).date()
+    with SessionLocal() as session:
+        metrics = DB(session).sweep_bill_statuses(
+            today,
+            due_ahead_days=args.due_ahead_days,
+            batch_size=args.batch_size,
+            lock_timeout_ms=args.lock_timeout_ms,
+        )
+    print(json.dumps({"job": "sweep_bills", "date": today.isoformat(), **metrics}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
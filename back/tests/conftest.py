@@ -2,6 +2,7 @@ import binascii
 import hashlib
 import os
 import secrets
+import tempfile
 from typing import Iterator
 
 import pytest
@@ -58,7 +59,12 @@ _RESET_TABLES = (
     "budget_rules",
     "budgets",
     "bills",
+    "recurring_suggestion_runs",
+    "recurring_suggestions",
     "recurring_rules",
+    "categorization_rules",
+    "ocr_cache",
+    "receipt_ocr_archive",
     "receipts",
     "transactions",
     "investment_txs",
@@ -89,6 +95,9 @@ def _postgres_url() -> Iterator[str]:
         os.environ.setdefault("AUTH_ISSUER", "ledger-backend-tests")
         # Keep PBKDF2 cheap in tests — the production floor is 600k.
         os.environ.setdefault("AUTH_PBKDF2_ITERATIONS", "10000")
+        # Receipt storage and the OCR queue stay local to the test process.
+        os.environ.setdefault("RECEIPT_LOCAL_DIR", tempfile.mkdtemp(prefix="receipts-"))
+        os.environ.setdefault("OCR_QUEUE_PATH", ":memory:")
         yield url
 
 
@@ -143,7 +152,9 @@ def client(_schema) -> Iterator[SyncASGIClient]:
     from sqlalchemy import text
 
     from app.main import app
+    from app.routers import auth
     from db.session import SessionLocal
+    from utils.cache import clear_all_caches
     from utils.deps import create_access_token
 
     with SessionLocal() as session:
@@ -153,6 +164,10 @@ def client(_schema) -> Iterator[SyncASGIClient]:
         _seed_user(session)
         _seed_categories(session)
         session.commit()
+    clear_all_caches()
+    # Login throttling is per process; every test starts with full buckets.
+    auth.LOGIN_EMAIL_LIMITER.clear()
+    auth.LOGIN_IP_LIMITER.clear()
 
     cli = SyncASGIClient(app, base_prefix="/api/v1")
     token = create_access_token({"sub": TEST_USER_EMAIL, "user_id": TEST_USER_ID})
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+
+def _txn(merchant: str, amount: int, date: str = "2026-02-10") -> dict:
+    return {"date": date, "merchant": merchant, "amount": amount, "currency": "CLP", "source": "upload"}
+
+
+def test_top_merchants_groups_bank_descriptors(client: TestClient):
+    for merchant, amount in [
+        ("Pago Recurrente VD DL RAPPI CHILE RAPPI", -10000),
+        ("RAPPI", -5000),
+        ("Compra Nacional MERCADOPAGO*CARNICERIA", -8000),
+        ("Compra Nacional MERPAGO*CARNICERIA", -1000),
+        ("STARBUCKS", -3000),
+        ("SALARIO", 900000),
+    ]:
+        assert client.post("/transactions", json=_txn(merchant, amount)).status_code == 200
+    client.post("/transactions", json=_txn("STARBUCKS", -99999, date="2025-12-01"))
+
+    resp = client.get("/analytics/merchants", params={"from": "2026-02-01", "to": "2026-02-28", "limit": 2})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [(m["name"], m["spend"], m["count"]) for m in data] == [
+        ("RAPPI", 15000, 2),
+        ("CARNICERIA", 9000, 2),
+    ]
+    assert isinstance(data[0]["merchantId"], int)
+
+
+def test_top_merchants_rejects_bad_dates(client: TestClient):
+    resp = client.get("/analytics/merchants", params={"from": "02/2026"})
+    assert resp.status_code == 400
+
+
+def test_interned_merchants_follow_the_callers_transaction():
+    from sqlalchemy import select
+
+    from db import SessionLocal, models
+    from utils.db import DB
+    from utils.merchants import merchant_ids
+
+    with SessionLocal() as session:
+        ids = DB(session).intern_merchants(["Compra Nacional ROLLED BACK SHOP"])
+        assert ids["Compra Nacional ROLLED BACK SHOP"] is not None
+        session.rollback()
+        assert merchant_ids.get("ROLLED BACK SHOP") is None
+        assert session.scalar(select(models.Merchant).where(models.Merchant.name == "ROLLED BACK SHOP")) is None
+
+        ids = DB(session).intern_merchants(["COMMITTED SHOP"])
+        assert merchant_ids.get("COMMITTED SHOP") is None
+        session.commit()
+        assert merchant_ids.get("COMMITTED SHOP") == ids["COMMITTED SHOP"]
@@ -11,3 +11,68 @@ def test_login_success(client: TestClient):
 def test_login_missing_credentials(client: TestClient):
     resp = client.post("/auth/login", json={"email": "", "password": ""})
     assert resp.status_code == 400
+
+
+def test_login_is_throttled_per_email_and_ip(client: TestClient, monkeypatch):
+    from app.routers import auth
+    from utils.rate_limit import TokenBucketLimiter
+
+    monkeypatch.setattr(auth, "LOGIN_EMAIL_LIMITER", TokenBucketLimiter(capacity=2, refill_per_second=0.01))
+    monkeypatch.setattr(auth, "LOGIN_IP_LIMITER", TokenBucketLimiter(capacity=4, refill_per_second=0.01))
+
+    bad = {"email": "user@example.com", "password": "wrong"}
+    assert [client.post("/auth/login", json=bad).status_code for _ in range(2)] == [401, 401]
+    resp = client.post("/auth/login", json=bad | {"email": "USER@example.com"})
+    assert resp.status_code == 429 and int(resp.headers["Retry-After"]) > 0
+
+    # Another account from the same address still gets through, until the IP bucket runs dry.
+    other = {"email": "nobody@example.com", "password": "pw"}
+    assert client.post("/auth/login", json=other).status_code == 401
+    assert client.post("/auth/login", json=other).status_code == 429
+
+
+def test_login_rejects_fast_when_hash_pool_is_full(client: TestClient, monkeypatch):
+    import threading
+
+    from utils import password_hashing
+
+    monkeypatch.setattr(password_hashing, "_slots", threading.BoundedSemaphore(1))
+    password_hashing._slots.acquire()
+    resp = client.post("/auth/login", json={"email": "user@example.com", "password": "pw"})
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "1"
+
+    password_hashing._slots.release()
+    assert client.post("/auth/login", json={"email": "user@example.com", "password": "pw"}).status_code == 200
+
+
+def test_login_survives_a_dead_hash_worker(client: TestClient):
+    from utils import password_hashing
+
+    assert client.post("/auth/login", json={"email": "user@example.com", "password": "pw"}).status_code == 200
+    broken = password_hashing.get_hash_pool()
+    for process in list(broken._processes.values()):
+        process.kill()
+    assert client.post("/auth/login", json={"email": "user@example.com", "password": "pw"}).status_code == 200
+    assert password_hashing.get_hash_pool() is not broken
+
+
+def test_login_derives_in_process_without_a_hash_pool(client: TestClient, monkeypatch):
+    import threading
+
+    from utils import password_hashing, process_pool
+    from utils.process_pool import RestartablePool
+
+    def no_semaphores(*args, **kwargs):
+        raise OSError(38, "Function not implemented")  # what SemLock raises without /dev/shm (Lambda)
+
+    monkeypatch.setattr(process_pool, "ProcessPoolExecutor", no_semaphores)
+    for pool in (RestartablePool(0), RestartablePool(2)):  # AUTH_HASH_WORKERS=0, and a pool that cannot start
+        monkeypatch.setattr(password_hashing, "_pool", pool)
+        assert client.post("/auth/login", json={"email": "user@example.com", "password": "pw"}).status_code == 200
+        assert password_hashing.get_hash_pool() is None
+
+    # In-process derivations are still bounded by the slots.
+    monkeypatch.setattr(password_hashing, "_slots", threading.BoundedSemaphore(1))
+    password_hashing._slots.acquire()
+    assert client.post("/auth/login", json={"email": "user@example.com", "password": "pw"}).status_code == 503
+    password_hashing._slots.release()
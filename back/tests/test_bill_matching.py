@@ -0,0 +1,42 @@
+from datetime import date, datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from utils.bill_matching import OpenBill, PaymentCandidate, match_bills
+
+
+def test_match_bills_uses_tolerance_window_and_merchant_tiebreak():
+    due = date(2026, 3, 10)
+    bills = [
+        OpenBill("b_water", "Aguas Andinas", due, -35000),
+        OpenBill("b_power", "Enel", due, -35000),
+        OpenBill("b_late", "Enel", date(2026, 4, 10), -35000),
+    ]
+    payments = [
+        PaymentCandidate("t_power", "PAGO ENEL DISTRIBUCION", date(2026, 3, 9), -35000),
+        PaymentCandidate("t_water", "AGUAS ANDINAS S.A.", date(2026, 3, 12), -35600),
+        PaymentCandidate("t_other", "Enel", date(2026, 3, 11), -40000),
+    ]
+    assert sorted(match_bills(bills, payments)) == [("b_power", "t_power"), ("b_water", "t_water")]
+
+
+def test_import_marks_matching_bills_paid(client: TestClient):
+    today = datetime.now(timezone.utc).date()
+    month = f"{today.year:04d}-{today.month:02d}"
+    for name in ("Aguas Andinas", "Enel"):
+        client.post("/recurring", json={
+            "name": name, "amount": -35000, "currency": "CLP", "cadence": "MONTHLY",
+            "dayOfMonth": today.day, "startDate": today.isoformat(),
+        })
+    assert client.post("/bills/materialize", params={"through": month}).json()["created"] == 2
+
+    csv_body = f"date,amount,description\n{today.isoformat()},-35000,PAGO ENEL DISTRIBUCION\n{today.isoformat()},-12000,Farmacia\n"
+    resp = client.post("/transactions/import", files={"file": ("cartola.csv", csv_body, "text/csv")})
+    assert resp.status_code == 200
+    assert resp.json()["billsPaid"] == 1
+
+    bills = {b["name"]: b for b in client.get("/bills").json()}
+    assert bills["Enel"]["status"] == "PAID"
+    assert bills["Enel"]["linkedTxnId"]
+    assert bills["Aguas Andinas"]["status"] == "PROJECTED"
+    assert bills["Aguas Andinas"]["linkedTxnId"] is None
@@ -0,0 +1,60 @@
+import calendar
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+
+def _month_offset(months: int) -> date:
+    today = date.today()
+    index = today.year * 12 + today.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rule(cadence: str, start: date, **extra) -> dict:
+    payload = {
+        "name": f"{cadence.title()} rule",
+        "amount": -25000,
+        "currency": "CLP",
+        "cadence": cadence,
+        "dayOfMonth": None,
+        "startDate": start.isoformat(),
+        "autopostMode": "PROJECT_ONLY",
+        "isPaused": False,
+    }
+    payload.update(extra)
+    return payload
+
+
+def test_materialize_expands_rules_idempotently(client: TestClient):
+    first = _month_offset(1)
+    last = _month_offset(3)
+    client.post("/recurring", json=_rule("MONTHLY", first, dayOfMonth=31))
+    weekly = client.post("/recurring", json=_rule("WEEKLY", first, endDate=(first + timedelta(days=20)).isoformat())).json()
+    client.post("/recurring", json=_rule("MONTHLY", first, dayOfMonth=5, isPaused=True))
+
+    through = f"{last.year:04d}-{last.month:02d}"
+    resp = client.post("/bills/materialize", params={"through": through})
+    assert resp.status_code == 200
+    assert resp.json() == {"through": through, "created": 6}
+
+    bills = client.get("/bills").json()
+    monthly_due = [b["dueDate"] for b in bills if b["ruleId"] != weekly["ruleId"]]
+    expected = []
+    for offset in (1, 2, 3):
+        m = _month_offset(offset)
+        expected.append(m.replace(day=calendar.monthrange(m.year, m.month)[1]).isoformat())
+    assert monthly_due == expected
+    weekly_due = [b["dueDate"] for b in bills if b["ruleId"] == weekly["ruleId"]]
+    assert weekly_due == [(first + timedelta(days=d)).isoformat() for d in (0, 7, 14)]
+    assert {b["status"] for b in bills} == {"PROJECTED"}
+
+    resp = client.post("/bills/materialize", params={"through": through})
+    assert resp.json()["created"] == 0
+
+
+def test_materialize_rejects_bad_month(client: TestClient):
+    assert client.post("/bills/materialize", params={"through": "2026-13"}).status_code == 400
+    assert client.post("/bills/materialize", params={"through": "soon"}).status_code == 400
+    far = _month_offset(40)
+    resp = client.post("/bills/materialize", params={"through": f"{far.year:04d}-{far.month:02d}"})
+    assert resp.status_code == 400
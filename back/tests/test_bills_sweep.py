@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+
+def _add_bills(session, today: date) -> None:
+    from db import models
+
+    for bill_id, offset, status, linked in (
+        ("bill_late", -3, "PROJECTED", None),
+        ("bill_late_due", -1, "DUE", None),
+        ("bill_soon", 5, "PROJECTED", None),
+        ("bill_later", 30, "PROJECTED", None),
+        ("bill_paid", -10, "PAID", None),
+    ):
+        session.add(models.Bill(
+            id=bill_id, user_id="u_001", name=bill_id, due_date=today + timedelta(days=offset),
+            amount_cents=-1000, currency="CLP", status=status, linked_txn_id=linked,
+        ))
+    session.commit()
+
+
+def test_sweep_advances_open_bills(client: TestClient):
+    from db.session import SessionLocal
+    from utils.db import DB
+
+    today = date(2026, 3, 15)
+    with SessionLocal() as session:
+        _add_bills(session, today)
+        metrics = DB(session).sweep_bill_statuses(today)
+    assert (metrics["overdue"], metrics["due"], metrics["lockTimeouts"]) == (2, 1, 0)
+
+    statuses = {b["billId"]: b["status"] for b in client.get("/bills").json()}
+    assert statuses["bill_late"] == statuses["bill_late_due"] == "OVERDUE"
+    assert statuses["bill_soon"] == "DUE"
+    assert statuses["bill_later"] == "PROJECTED"
+    assert statuses["bill_paid"] == "PAID"
+
+    with SessionLocal() as session:
+        again = DB(session).sweep_bill_statuses(today)
+    assert (again["overdue"], again["due"]) == (0, 0)
+
+
+def test_sweep_skips_batches_it_cannot_lock(client: TestClient):
+    from sqlalchemy import text
+
+    from db.session import SessionLocal
+    from utils.db import DB
+
+    today = date(2026, 3, 15)
+    with SessionLocal() as holder, SessionLocal() as session:
+        _add_bills(holder, today)
+        holder.execute(text("SELECT id FROM bills WHERE id = 'bill_late' FOR UPDATE"))
+        metrics = DB(session).sweep_bill_statuses(today, lock_timeout_ms=50)
+        assert (metrics["overdue"], metrics["lockTimeouts"]) == (0, 1)
+        holder.rollback()
+        assert DB(session).sweep_bill_statuses(today)["overdue"] == 2
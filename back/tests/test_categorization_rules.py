@@ -0,0 +1,118 @@
+from fastapi.testclient import TestClient
+
+
+def _txn(merchant: str, description: str = "", amount: int = -5000, **extra) -> dict:
+    return {
+        "date": "2026-02-01",
+        "merchant": merchant,
+        "description": description,
+        "amount": amount,
+        "currency": "CLP",
+        "source": "manual",
+    } | extra
+
+
+def test_categorization_rules_crud(client: TestClient):
+    resp = client.post("/categorization-rules", json={
+        "pattern": "UBER",
+        "field": "description",
+        "categoryId": "cat_transport",
+        "notes": "ride",
+    })
+    assert resp.status_code == 200
+    rule = resp.json()
+    rule_id = rule["ruleId"]
+    assert rule["field"] == "description"
+    assert rule["isActive"] is True
+
+    resp = client.patch(f"/categorization-rules/{rule_id}", json={"priority": 5})
+    assert resp.status_code == 200
+    assert resp.json()["priority"] == 5
+
+    resp = client.get("/categorization-rules")
+    assert resp.status_code == 200
+    assert [r["ruleId"] for r in resp.json()] == [rule_id]
+
+    resp = client.delete(f"/categorization-rules/{rule_id}")
+    assert resp.status_code == 200
+    assert client.delete(f"/categorization-rules/{rule_id}").status_code == 404
+
+
+def test_rule_invalid_field_rejected(client: TestClient):
+    resp = client.post("/categorization-rules", json={"pattern": "x", "field": "amount", "categoryId": "cat_transport"})
+    assert resp.status_code == 422
+
+
+def test_rule_category_must_belong_to_user(client: TestClient):
+    token = client.post("/auth/signup", json={"email": "other@example.com", "password": "pw"}).json()["access_token"]
+    other = client.post("/categories", json={"name": "Theirs"},
+                        headers={"Authorization": f"Bearer {token}"}).json()["categoryId"]
+
+    resp = client.post("/categorization-rules", json={"pattern": "UBER", "categoryId": other})
+    assert resp.status_code == 404
+    rule_id = client.post("/categorization-rules", json={"pattern": "UBER", "categoryId": "cat_transport"}).json()["ruleId"]
+    assert client.patch(f"/categorization-rules/{rule_id}", json={"categoryId": other}).status_code == 404
+    assert client.patch(f"/categorization-rules/{rule_id}", json={"categoryId": "cat_dining"}).status_code == 200
+
+
+def test_rules_applied_on_create(client: TestClient):
+    client.post("/categorization-rules", json={
+        "pattern": "uber",
+        "field": "description",
+        "categoryId": "cat_transport",
+        "notes": "ride",
+    })
+    client.post("/categorization-rules", json={"pattern": "UBER EATS", "categoryId": "cat_dining", "priority": 10})
+
+    resp = client.post("/transactions", json=_txn("Pago", "UBER TRIP 123"))
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["categoryId"] == "cat_transport"
+    assert body["notes"] == "ride"
+
+    # Higher priority wins when several rules match.
+    resp = client.post("/transactions", json=_txn("Pago", "Uber Eats pedido"))
+    assert resp.json()["categoryId"] == "cat_dining"
+
+    # Field scoping: the description-only rule ignores the merchant.
+    resp = client.post("/transactions", json=_txn("UBER", "trip"))
+    assert resp.json()["categoryId"] is None
+
+    # Explicit categories are never overridden.
+    resp = client.post("/transactions", json=_txn("Pago", "UBER TRIP", categoryId="cat_groceries"))
+    assert resp.json()["categoryId"] == "cat_groceries"
+
+
+def test_apply_rules_to_history(client: TestClient):
+    first = client.post("/transactions", json=_txn("JUMBO LAS CONDES")).json()
+    second = client.post("/transactions", json=_txn("Jumbo", categoryId="cat_dining")).json()
+
+    client.post("/categorization-rules", json={"pattern": "jumbo", "field": "merchant", "categoryId": "cat_groceries"})
+
+    resp = client.post("/categorization-rules/apply")
+    assert resp.status_code == 200
+    assert resp.json() == {"scanned": 2, "updated": 1}
+    assert client.get(f"/transactions/{first['txnId']}", params={"date": "2026-02-01"}).json()["categoryId"] == "cat_groceries"
+    assert client.get(f"/transactions/{second['txnId']}", params={"date": "2026-02-01"}).json()["categoryId"] == "cat_dining"
+
+    resp = client.post("/categorization-rules/apply", params={"overwrite": "true"})
+    assert resp.json()["updated"] == 1
+    assert client.get(f"/transactions/{second['txnId']}", params={"date": "2026-02-01"}).json()["categoryId"] == "cat_groceries"
+
+
+def test_overwrite_recategorizes_a_single_split(client: TestClient):
+    split = {"id": "s1", "label": "Compra", "amount": -5000, "categoryId": "cat_dining"}
+    single = client.post("/transactions", json=_txn("Jumbo", categoryId="cat_dining", splits=[split])).json()
+    parts = [split | {"amount": -2000}, {"id": "s2", "label": "Otro", "amount": -3000, "categoryId": "cat_dining"}]
+    multi = client.post("/transactions", json=_txn("Jumbo", categoryId="cat_dining", splits=parts)).json()
+
+    client.post("/categorization-rules", json={"pattern": "jumbo", "field": "merchant", "categoryId": "cat_groceries"})
+    assert client.post("/categorization-rules/apply").json()["updated"] == 0
+    assert client.post("/categorization-rules/apply", params={"overwrite": "true"}).json()["updated"] == 1
+
+    body = client.get(f"/transactions/{single['txnId']}", params={"date": "2026-02-01"}).json()
+    assert body["categoryId"] == "cat_groceries"
+    assert body["splits"] == [split | {"categoryId": "cat_groceries"}]
+    # Multi-part splits keep their categories.
+    body = client.get(f"/transactions/{multi['txnId']}", params={"date": "2026-02-01"}).json()
+    assert [s["categoryId"] for s in body["splits"]] == ["cat_dining", "cat_dining"]
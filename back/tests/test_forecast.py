@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def test_forecast_combines_rules_bills_and_baseline(client: TestClient):
+    today = _today()
+    client.post("/transactions", json={"date": today.isoformat(), "merchant": "Salary", "amount": 1_000_000, "currency": "CLP"})
+    # 90-day lookback: 90 * 1000 of groceries -> 1000 per day.
+    client.post("/transactions", json={
+        "date": (today - timedelta(days=10)).isoformat(), "merchant": "Lider", "amount": -90_000,
+        "currency": "CLP", "categoryId": "cat_groceries",
+    })
+    start = today + timedelta(days=5)
+    client.post("/recurring", json={
+        "name": "Gym", "amount": -20_000, "currency": "CLP", "cadence": "WEEKLY",
+        "startDate": start.isoformat(), "endDate": (start + timedelta(days=7)).isoformat(),
+    })
+
+    resp = client.get("/forecast", params={"days": 14})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["startingBalance"] == 910_000
+    assert data["dailyDiscretionary"] == 1000
+    assert data["baseline"] == [{"categoryId": "cat_groceries", "dailyAverage": 1000}]
+    assert len(data["points"]) == 14
+    by_date = {p["date"]: p for p in data["points"]}
+    assert by_date[start.isoformat()]["scheduled"] == -20_000
+    assert data["endingBalance"] == 910_000 - 14 * 1000 - 2 * 20_000
+
+    # A write invalidates the cached projection.
+    client.post("/transactions", json={"date": today.isoformat(), "merchant": "Bonus", "amount": 5_000, "currency": "CLP"})
+    assert client.get("/forecast", params={"days": 14}).json()["startingBalance"] == 915_000
+
+
+def test_forecast_validates_days(client: TestClient):
+    assert client.get("/forecast", params={"days": 0}).status_code == 422
+    assert client.get("/forecast", params={"days": 400}).status_code == 422
+
+
+def test_forecast_skips_stale_past_bills(client: TestClient):
+    from db import models
+    from db.session import SessionLocal
+
+    today = _today()
+    with SessionLocal() as session:
+        for bill_id, offset, status in (
+            ("bill_stale", -200, "PROJECTED"),
+            ("bill_unswept", -2, "PROJECTED"),
+            ("bill_ancient", -400, "OVERDUE"),
+            ("bill_overdue", -3, "OVERDUE"),
+            ("bill_next", 4, "PROJECTED"),
+        ):
+            session.add(models.Bill(
+                id=bill_id, user_id="u_001", name=bill_id, due_date=today + timedelta(days=offset),
+                amount_cents=-1000 * abs(offset), currency="CLP", status=status,
+            ))
+        session.commit()
+
+    by_date = {p["date"]: p for p in client.get("/forecast", params={"days": 14}).json()["points"]}
+    # Only the recent OVERDUE bill lands on the first day.
+    assert by_date[(today + timedelta(days=1)).isoformat()]["scheduled"] == -3000
+    assert by_date[(today + timedelta(days=4)).isoformat()]["scheduled"] == -4000
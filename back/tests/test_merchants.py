@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+
+def _txn(merchant: str) -> dict:
+    return {"date": "2026-02-10", "merchant": merchant, "amount": -1000, "currency": "CLP", "source": "manual"}
+
+
+def test_suggest_ranks_by_frequency_and_tracks_writes(client: TestClient):
+    for merchant in ["Zapatería Sur", "ZARA", "Zara", "zara", "Zoológico"]:
+        assert client.post("/transactions", json=_txn(merchant)).status_code == 200
+
+    resp = client.get("/merchants/suggest", params={"q": "za"})
+    assert resp.status_code == 200
+    assert [(s["merchant"], s["count"]) for s in resp.json()] == [("ZARA", 3), ("Zapatería Sur", 1)]
+
+    # The loaded index is patched in place by later writes.
+    created = client.post("/transactions", json=_txn("Zapateria sur")).json()
+    client.post("/transactions", json=_txn("Zapateria sur"))
+    resp = client.get("/merchants/suggest", params={"q": "ZAPA"})
+    assert [(s["merchant"], s["count"]) for s in resp.json()] == [("Zapatería Sur", 3)]
+
+    client.delete(f"/transactions/{created['txnId']}", params={"date": created["date"]})
+    resp = client.get("/merchants/suggest", params={"q": "zo", "limit": 1})
+    assert [s["merchant"] for s in resp.json()] == ["Zoológico"]
+    resp = client.get("/merchants/suggest", params={"q": "zapa"})
+    assert resp.json()[0]["count"] == 2
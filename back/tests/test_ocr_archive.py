@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+BLOCKS = [
+    {"type": "summary", "label": "TOTAL", "text": "$1.990", "confidence": 97.5},
+    {"type": "line_item", "text": "ITEM:PAN | PRICE:$1.990", "confidence": 95.0,
+     "fields": [{"type": "ITEM", "text": "PAN", "confidence": 95.0},
+                {"type": "PRICE", "text": "$1.990", "confidence": 95.0}]},
+] * 20
+
+
+def _receipt(client: TestClient, merchant: str) -> str:
+    return client.post("/receipts", json={
+        "merchant": merchant, "date": "2026-01-10", "total": 1990, "status": "ocr_done",
+        "ocrRawText": "LIDER\nTOTAL 1.990", "ocrRawBlocks": BLOCKS,
+    }).json()["receiptId"]
+
+
+def test_archive_moves_old_blocks_and_detail_reads_them_back(client: TestClient):
+    from db import SessionLocal, models
+    from utils.db import DB
+
+    old, recent = _receipt(client, "Old"), _receipt(client, "Recent")
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as session:
+        session.get(models.Receipt, old).created_at = now - timedelta(days=120)
+        session.commit()
+        before = session.get(models.Receipt, old).updated_at
+
+        metrics = DB(session).archive_ocr_payloads(timedelta(days=90), batch_size=1, now=now)
+        assert (metrics["archived"], metrics["batches"]) == (1, 1)
+        assert 0 < metrics["archiveBytes"] < metrics["hotBytes"] < metrics["rawBytes"]
+        assert metrics["reduction"] > 0
+
+        session.expire_all()
+        hot = session.get(models.Receipt, old)
+        assert hot.ocr_raw_blocks is None and hot.ocr_archived_at is not None
+        assert hot.ocr_raw_text == "LIDER\nTOTAL 1.990" and hot.updated_at == before
+        assert session.get(models.Receipt, recent).ocr_archived_at is None
+        # Nothing left to move on a second run.
+        assert DB(session).archive_ocr_payloads(timedelta(days=90), now=now)["archived"] == 0
+        assert [r["ocrRawBlocks"] for r in DB(session).iter_ocr_receipts()] == [BLOCKS, BLOCKS]
+
+    assert client.get(f"/receipts/{old}").json()["ocrRawBlocks"] == BLOCKS
+    assert client.get(f"/receipts/{old}", params={"fields": "ocrRawBlocks"}).json()["ocrRawBlocks"] == BLOCKS
+
+    # New blocks replace the archived ones.
+    assert client.patch(f"/receipts/{old}", json={"ocrRawBlocks": BLOCKS[:1]}).status_code == 200
+    assert client.get(f"/receipts/{old}").json()["ocrRawBlocks"] == BLOCKS[:1]
+    with SessionLocal() as session:
+        assert session.get(models.ReceiptOcrArchive, old) is None
+        assert session.get(models.Receipt, old).ocr_archived_at is None
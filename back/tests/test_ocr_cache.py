@@ -0,0 +1,81 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+INTERNAL_HEADERS = {"X-Internal-Token": "dev-internal-token"}
+
+
+def _upload(client: TestClient, content: bytes) -> dict:
+    return client.post("/receipts/upload", files={"file": ("r.jpg", content, "image/jpeg")}).json()
+
+
+def _callback(client: TestClient, results: list) -> None:
+    resp = client.post("/internal/receipts/ocr-callback:batch", headers=INTERNAL_HEADERS, json={"results": results})
+    assert resp.status_code == 200
+
+
+def _lookup(client: TestClient, hashes: list) -> dict:
+    resp = client.post("/internal/ocr-cache:lookup", headers=INTERNAL_HEADERS, json={"hashes": hashes})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_ocr_output_is_cached_by_image_hash(client: TestClient):
+    digest = hashlib.sha256(b"same image").hexdigest()
+    first = _upload(client, b"same image")
+    assert _lookup(client, [digest]) == {"entries": {}, "hits": 0, "misses": 1}
+
+    _callback(client, [{
+        "userId": "u_001", "receiptId": first["receiptId"], "status": "ocr_done", "merchant": "Lider",
+        "ocrProvider": "textract", "ocrConfidence": 0.91, "ocrRawText": "LIDER\nTOTAL 1.990",
+        "ocrRawBlocks": [{"type": "summary", "label": "TOTAL", "text": "1.990"}], "contentSha256": digest,
+    }])
+
+    # A duplicate upload of the same bytes finds the provider output.
+    _upload(client, b"same image")
+    lookup = _lookup(client, [digest, digest, "0" * 64])
+    assert lookup["hits"] == 1 and lookup["misses"] == 1
+    assert lookup["entries"][digest] == {
+        "provider": "textract",
+        "rawText": "LIDER\nTOTAL 1.990",
+        "rawBlocks": [{"type": "summary", "label": "TOTAL", "text": "1.990"}],
+        "confidence": 0.91,
+    }
+
+
+def test_cache_hits_and_failures_do_not_rewrite_the_cache(client: TestClient):
+    from db import SessionLocal, models
+
+    receipt = _upload(client, b"img")
+    _callback(client, [
+        {"userId": "u_001", "receiptId": receipt["receiptId"], "status": "ocr_failed", "ocrError": "blurry",
+         "contentSha256": "a" * 64},
+        {"userId": "u_001", "receiptId": receipt["receiptId"], "status": "ocr_done", "ocrRawText": "X",
+         "contentSha256": "b" * 64, "ocrCacheHit": True},
+    ])
+    with SessionLocal() as session:
+        assert session.query(models.OcrCacheEntry).count() == 0
+
+
+def test_eviction_by_age_then_by_size(client: TestClient):
+    from db import SessionLocal
+    from utils.db import DB
+
+    now = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    with SessionLocal() as session:
+        db = DB(session)
+        receipt = db.create_receipt("u_001", {"merchant": ""})
+        for n, age_days in enumerate((400, 3, 2, 1)):
+            db.apply_ocr_results([{
+                "userId": "u_001", "receiptId": receipt["receiptId"], "status": "ocr_done",
+                "ocrRawText": "x" * 100, "contentSha256": f"{n:064d}",
+            }], now=now - timedelta(days=age_days))
+        db.lookup_ocr_cache([f"{3:064d}"], now=now)
+
+        metrics = db.evict_ocr_cache(timedelta(days=180), max_bytes=250, now=now)
+        remaining = set(db.lookup_ocr_cache([f"{n:064d}" for n in range(4)], now=now))
+
+    # Oldest by age; then the least recently used of the rest until <= 250 bytes.
+    assert metrics == {"evictedByAge": 1, "evictedBySize": 1, "entries": 2, "bytes": 204, "hits": 1}
+    assert remaining == {f"{2:064d}", f"{3:064d}"}
@@ -0,0 +1,167 @@
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "ocr-lambda"))
+try:
+    import boto3  # noqa: F401
+except ImportError:  # the lambda's runtime ships boto3; the API's test env does not
+    _boto3 = types.ModuleType("boto3")
+    _boto3.client = lambda *args, **kwargs: None
+    _botocore = types.ModuleType("botocore")
+    _botocore_config = types.ModuleType("botocore.config")
+    _botocore_config.Config = lambda **kwargs: kwargs
+    _botocore.config = _botocore_config
+    sys.modules.update({"boto3": _boto3, "botocore": _botocore, "botocore.config": _botocore_config})
+import callback  # noqa: E402 - ocr-lambda is not a package
+import handler  # noqa: E402
+import providers  # noqa: E402
+
+RECEIPT_TEXT = "Sample Store\n2026-02-10\nMilk 3.49\nBread 2.50\nTotal 5.99"
+
+
+class _FailingProvider(providers.MockProvider):
+    """Fails for every image, or only for those whose uri contains `only`."""
+
+    def __init__(self, only=""):
+        self.only = only
+
+    def extract(self, image_uri):
+        if self.only not in image_uri:
+            return super().extract(image_uri)
+        raise RuntimeError("textract throttled")
+
+
+def _record(message_id, receipt_id, receives=1, body=None):
+    if body is None:
+        body = json.dumps({"user_id": 1, "receipt_id": receipt_id, "image_url": f"file:///tmp/{receipt_id}.jpg"})
+    return {"messageId": message_id, "attributes": {"ApproximateReceiveCount": str(receives)}, "body": body}
+
+
+@pytest.fixture
+def posted(monkeypatch):
+    batches = []
+    monkeypatch.setattr(handler, "post_ocr_results", lambda payloads: batches.append(list(payloads)))
+    monkeypatch.setattr(handler, "lookup_ocr_cache", lambda hashes: {})
+    monkeypatch.setenv("OCR_MOCK_TEXT", RECEIPT_TEXT)
+    return batches
+
+
+def test_handler_leaves_retryable_errors_to_sqs_until_the_last_receive(monkeypatch, posted):
+    monkeypatch.setattr(handler, "get_provider", lambda: _FailingProvider())
+    out = handler.handler({"Records": [_record("m1", 11, receives=1), _record("m2", 12, receives=handler.MAX_RECEIVES)]},
+                          None)
+
+    by_id = {result["receipt_id"]: result for result in out["results"]}
+    assert (by_id[11]["status"], by_id[12]["status"]) == ("retry", "failed")
+    assert out["batchItemFailures"] == [{"itemIdentifier": "m1"}]
+    # Only the final delivery reports the failure to the backend.
+    assert len(posted) == 1 and [p["receiptId"] for p in posted[0]] == [12]
+    assert (posted[0][0]["status"], posted[0][0]["ocrError"]) == ("ocr_failed", "textract throttled")
+
+
+def test_handler_batches_callbacks_and_fails_malformed_records(monkeypatch, posted):
+    out = handler.handler({"Records": [
+        _record("m1", 21), _record("m2", 22), _record("m3", None, body="{not json"), "garbage",
+    ]}, None)
+
+    statuses = [(result["message_id"], result["status"]) for result in out["results"]]
+    assert statuses == [("m1", "ok"), ("m2", "ok"), ("m3", "error"), (None, "error")]
+    # A record without a messageId cannot be redelivered, so it is not reported.
+    assert out["batchItemFailures"] == [{"itemIdentifier": "m3"}]
+    assert len(posted) == 1 and [p["receiptId"] for p in posted[0]] == [21, 22]
+    assert posted[0][0]["merchant"] == "Sample Store" and posted[0][0]["ocrCacheHit"] is False
+
+
+def test_handler_fails_the_batch_when_the_callback_cannot_be_posted(monkeypatch, posted):
+    def unreachable(payloads):
+        raise RuntimeError("OCR callback failed: HTTP 502")
+
+    monkeypatch.setattr(handler, "post_ocr_results", unreachable)
+    monkeypatch.setattr(handler, "get_provider", lambda: _FailingProvider(only="33"))
+    out = handler.handler({"Records": [
+        _record("m1", 31), _record("m2", 32, receives=handler.MAX_RECEIVES), _record("m3", 33),
+    ]}, None)
+
+    assert [result["status"] for result in out["results"]] == ["error", "error", "retry"]
+    assert out["results"][0]["error"] == "callback: OCR callback failed: HTTP 502"
+    assert "callback" not in out["results"][1]
+    assert out["batchItemFailures"] == [{"itemIdentifier": "m1"}, {"itemIdentifier": "m2"}, {"itemIdentifier": "m3"}]
+
+
+def test_get_provider_is_created_once_per_container(monkeypatch):
+    clients = []
+    monkeypatch.setattr(providers, "_providers", {})
+    monkeypatch.setattr(providers.boto3, "client", lambda name, **kwargs: clients.append(name) or object())
+
+    monkeypatch.setenv("OCR_PROVIDER", "textract")
+    textract = providers.get_provider()
+    assert providers.get_provider() is textract and clients == ["textract"]
+
+    monkeypatch.setenv("OCR_PROVIDER", "mock")
+    assert isinstance(providers.get_provider(), providers.MockProvider)
+    assert providers.get_provider() is not textract and clients == ["textract"]
+
+
+def test_handler_cache_hit_skips_the_provider(monkeypatch, posted, capsys):
+    entry = {"provider": "textract", "rawText": RECEIPT_TEXT, "rawBlocks": [], "confidence": 0.9}
+    lookups = []
+    monkeypatch.setattr(handler, "CACHE_ENABLED", True)
+    monkeypatch.setattr(handler, "lookup_ocr_cache", lambda hashes: lookups.append(hashes) or {"abc": entry})
+    monkeypatch.setattr(handler, "get_provider", lambda: _FailingProvider(only="42"))
+    hit = json.dumps({"user_id": 1, "receipt_id": 42, "image_url": "file:///tmp/42.jpg", "content_sha256": "abc"})
+    out = handler.handler({"Records": [_record("m1", 42, body=hit), _record("m2", 43)]}, None)
+
+    assert lookups == [["abc"]]
+    assert [result["status"] for result in out["results"]] == ["ok", "ok"]
+    assert out["cache"] == {"hits": 1, "misses": 1} and out["batchItemFailures"] == []
+    callbacks = {payload["receiptId"]: payload for payload in posted[0]}
+    assert (callbacks[42]["ocrCacheHit"], callbacks[42]["ocrProvider"], callbacks[42]["merchant"]) == (
+        True, "textract", "Sample Store")
+    assert callbacks[43]["ocrCacheHit"] is False
+
+    metrics = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert (metrics["OcrCacheHits"], metrics["OcrCacheMisses"]) == (1, 1)
+    assert metrics["_aws"]["CloudWatchMetrics"][0]["Namespace"] == handler.METRICS_NAMESPACE
+
+
+class _FakeHttp:
+    """Stands in for callback._http; answers with `statuses` in turn, then 200."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def request(self, method, url, body=None, headers=None):
+        payload = json.loads(body)
+        self.requests.append((url, payload))
+        status = self.statuses.pop(0) if self.statuses else 200
+        results = [{"receiptId": r["receiptId"], "updated": True} for r in payload.get("results", [])]
+        return types.SimpleNamespace(status=status, data=json.dumps({"results": results}).encode("utf-8"))
+
+
+def test_post_ocr_results_chunks_and_raises_on_http_errors(monkeypatch):
+    http = _FakeHttp()
+    monkeypatch.setattr(callback, "_http", http)
+    monkeypatch.setattr(callback, "CALLBACK_BATCH_SIZE", 2)
+    outcomes = callback.post_ocr_results([{"receiptId": n} for n in range(5)])
+
+    assert [len(payload["results"]) for _, payload in http.requests] == [2, 2, 1]
+    assert all(url.endswith("/internal/receipts/ocr-callback:batch") for url, _ in http.requests)
+    assert [outcome["receiptId"] for outcome in outcomes] == [0, 1, 2, 3, 4]
+
+    monkeypatch.setattr(callback, "_http", _FakeHttp(200, 500))
+    with pytest.raises(RuntimeError, match="HTTP 500"):
+        callback.post_ocr_results([{"receiptId": n} for n in range(5)])
+
+    # Through the handler, a rejected callback fails every record that had a result.
+    monkeypatch.setattr(callback, "_http", _FakeHttp(503))
+    monkeypatch.setattr(handler, "post_ocr_results", callback.post_ocr_results)
+    monkeypatch.setattr(handler, "lookup_ocr_cache", lambda hashes: {})
+    out = handler.handler({"Records": [_record("m1", 51), _record("m2", 52)]}, None)
+    assert [result["status"] for result in out["results"]] == ["error", "error"]
+    assert out["results"][0]["error"].startswith("callback: OCR callback /internal/receipts/ocr-callback:batch failed")
+    assert out["batchItemFailures"] == [{"itemIdentifier": "m1"}, {"itemIdentifier": "m2"}]
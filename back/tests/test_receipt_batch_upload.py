@@ -0,0 +1,95 @@
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from utils import ocr_queue, storage
+
+
+class CountingQueue(ocr_queue.LocalQueue):
+    sends = 0
+
+    def send_batch(self, messages):
+        self.sends += 1
+        return super().send_batch(messages)
+
+
+@pytest.fixture()
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_storage", storage.LocalStorage(tmp_path, "http://testserver/api/v1/storage/receipts", "b", "k"))
+    q = CountingQueue(":memory:")
+    monkeypatch.setattr(ocr_queue, "_queue", q)
+    return q
+
+
+def _jpeg() -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (600, 900), (240, 240, 240)).save(out, "JPEG")
+    return out.getvalue()
+
+
+def _zip(members: dict) -> bytes:
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return out.getvalue()
+
+
+def test_batch_upload_streams_statuses_and_dispatches_once(client: TestClient, queue):
+    stack = _zip({"stack/a.jpg": _jpeg(), "stack/b.png": b"not really a png", "stack/notes.txt": b"hi",
+                  "__MACOSX/stack/._a.jpg": b"", "stack/": b""})
+    resp = client.post("/receipts/upload:batch", files=[
+        ("files", ("one.jpg", _jpeg(), "image/jpeg")),
+        ("files", ("stack.zip", stack, "application/zip")),
+    ])
+    assert resp.status_code == 200 and resp.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in resp.text.splitlines()]
+
+    per_file = {e["filename"]: e for e in events[:-1]}
+    assert set(per_file) == {"one.jpg", "a.jpg", "b.png", "notes.txt"}
+    assert per_file["notes.txt"] == {"index": 3, "filename": "notes.txt", "status": "rejected",
+                                     "error": "Unsupported content type text/plain"}
+    stored = [e for e in per_file.values() if e["status"] == "stored"]
+    assert len(stored) == 3 and all(e["receiptId"] for e in stored)
+    assert per_file["one.jpg"]["thumbnailUrl"] and per_file["b.png"]["thumbnailUrl"] is None  # undecodable: kept as-is
+
+    summary = events[-1]
+    assert summary["status"] == "complete"
+    assert (summary["created"], summary["rejected"], summary["ocrEnqueued"]) == (3, 1, 3)
+    assert sorted(summary["receiptIds"]) == sorted(e["receiptId"] for e in stored)
+    assert queue.sends == 1  # one dispatch: 3 messages fit one queue batch
+
+    listed = {r["receiptId"]: r for r in client.get("/receipts").json()}
+    assert all(listed[rid]["status"] == "uploading" for rid in summary["receiptIds"])
+
+
+def test_batch_upload_failed_insert_names_no_receipts_and_cleans_up(client: TestClient, queue, tmp_path, monkeypatch):
+    from utils.db import DB
+
+    def fail(self, user_id, payloads):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(DB, "create_receipts", fail)
+    resp = client.post("/receipts/upload:batch", files=[
+        ("files", ("one.jpg", _jpeg(), "image/jpeg")),
+        ("files", ("two.png", b"not really a png", "image/png")),
+    ])
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    assert all("receiptId" not in e for e in events[:-1])
+    assert sorted((e["filename"], e["status"], e["error"]) for e in events[:-1]) == [
+        ("one.jpg", "rejected", "Could not save the receipt"), ("two.png", "rejected", "Could not save the receipt"),
+    ]
+    assert (events[-1]["created"], events[-1]["rejected"], events[-1]["receiptIds"]) == (0, 2, [])
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+    assert queue.sends == 0
+
+
+def test_batch_upload_limits(client: TestClient, queue):
+    too_many = [("files", (f"{n}.jpg", b"x", "image/jpeg")) for n in range(51)]
+    assert client.post("/receipts/upload:batch", files=too_many).status_code == 413
+    resp = client.post("/receipts/upload:batch", files=[("files", ("bad.zip", b"PK nope", "application/zip"))])
+    assert [json.loads(line)["status"] for line in resp.text.splitlines()] == ["rejected", "complete"]
@@ -0,0 +1,81 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from utils.receipt_matching import ExpenseCandidate, ReceiptCandidate, match_receipts
+
+INTERNAL_HEADERS = {"X-Internal-Token": "dev-internal-token"}
+
+
+def test_match_receipts_needs_exact_total_and_prefers_similar_merchant():
+    day = date(2026, 3, 10)
+    receipts = [
+        ReceiptCandidate("r_jumbo", "u", "JUMBO COSTANERA", day, 12990),
+        ReceiptCandidate("r_noisy", "u", "B0LETA ELECTR0NICA", day, 4500),
+        ReceiptCandidate("r_other_user", "v", "Jumbo", day, 12990),
+    ]
+    expenses = [
+        ExpenseCandidate("t_lider", "u", "LIDER", date(2026, 3, 11), -12990),
+        ExpenseCandidate("t_jumbo", "u", "COMPRA JUMBO COSTANERA", date(2026, 3, 12), -12990),
+        ExpenseCandidate("t_off_by_one", "u", "Jumbo", day, -12991),
+        ExpenseCandidate("t_late", "v", "Jumbo", date(2026, 3, 20), -12990),
+        ExpenseCandidate("t_only", "u", "SUMUP *CAFE", date(2026, 3, 11), -4500),
+    ]
+    assert sorted(match_receipts(receipts, expenses)) == [("r_jumbo", "t_jumbo"), ("r_noisy", "t_only")]
+
+
+def _receipt(client: TestClient, merchant: str, total: int, status: str = "ocr_done") -> str:
+    return client.post("/receipts", json={
+        "merchant": merchant, "date": "2026-03-10", "total": total, "status": status,
+    }).json()["receiptId"]
+
+
+def test_receipts_link_on_import_ocr_and_backlog(client: TestClient):
+    from db import SessionLocal
+    from utils.db import DB
+
+    on_import = _receipt(client, "Jumbo", 12990)
+    csv_body = "date,amount,description\n2026-03-11,-12990,COMPRA JUMBO\n2026-03-11,-3500,STARBUCKS\n"
+    resp = client.post("/transactions/import", files={"file": ("cartola.csv", csv_body, "text/csv")})
+    assert resp.json()["receiptsLinked"] == 1
+    txn_id = client.get(f"/receipts/{on_import}").json()["transactionId"]
+    assert txn_id and client.get(f"/transactions/{txn_id}", params={"date": "2026-03-11"}).json()["receiptId"] == on_import
+
+    # OCR completion links against transactions already imported.
+    on_ocr = _receipt(client, "", 0, status="uploaded")
+    assert client.post("/internal/receipts/ocr-callback", headers=INTERNAL_HEADERS, json={
+        "userId": "u_001", "receiptId": on_ocr, "status": "ocr_done", "merchant": "STARBUCKS", "total": 3500,
+    }).status_code == 200
+    assert client.get(f"/receipts/{on_ocr}").json()["transactionId"] is not None
+
+    # A second receipt for the same total finds the transaction already taken.
+    duplicate = _receipt(client, "Jumbo", 12990)
+    client.post("/transactions", json={"date": "2026-03-09", "merchant": "Jumbo", "amount": -12990, "currency": "CLP",
+                                       "source": "manual"})
+    with SessionLocal() as session:
+        assert DB(session).match_receipt_backlog(batch_size=1) == {"linked": 1, "batches": 1}
+        assert DB(session).match_receipt_backlog() == {"linked": 0, "batches": 0}
+    assert client.get(f"/receipts/{duplicate}").json()["transactionId"] not in (None, txn_id)
+
+
+def test_backlog_does_not_relink_receipts_the_user_unlinked(client: TestClient):
+    from db import SessionLocal, models
+    from utils.db import DB
+
+    receipt_id = _receipt(client, "Jumbo", 12990)
+    csv_body = "date,amount,description\n2026-03-11,-12990,COMPRA JUMBO\n"
+    assert client.post("/transactions/import", files={"file": ("cartola.csv", csv_body, "text/csv")}).json()["receiptsLinked"] == 1
+    txn_id = client.get(f"/receipts/{receipt_id}").json()["transactionId"]
+
+    assert client.patch(f"/receipts/{receipt_id}", json={"transactionId": None}).json()["transactionId"] is None
+    assert client.get(f"/transactions/{txn_id}", params={"date": "2026-03-11"}).json()["receiptId"] is None
+    # Patching other fields leaves the link state alone.
+    assert client.patch(f"/receipts/{receipt_id}", json={"merchant": "Jumbo Costanera"}).status_code == 200
+    with SessionLocal() as session:
+        assert DB(session).match_receipt_backlog() == {"linked": 0, "batches": 0}
+    assert client.get(f"/receipts/{receipt_id}").json()["transactionId"] is None
+
+    # Linking by hand clears the mark.
+    assert client.patch(f"/receipts/{receipt_id}", json={"transactionId": txn_id}).json()["transactionId"] == txn_id
+    with SessionLocal() as session:
+        assert session.get(models.Receipt, receipt_id).match_dismissed is False
@@ -0,0 +1,125 @@
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "ocr-lambda"))
+import normalizer  # noqa: E402 - ocr-lambda is not a package
+
+
+def _summary(label: str, text: str, confidence: float = 99.0) -> dict:
+    return {"type": "summary", "label": label, "text": text, "confidence": confidence}
+
+
+def _line_item(name: str, price: str, confidence: float = 95.0, **extra: str) -> dict:
+    fields = [{"type": "ITEM", "text": name, "confidence": confidence},
+              {"type": "PRICE", "text": price, "confidence": confidence}]
+    fields += [{"type": kind, "text": text, "confidence": confidence} for kind, text in extra.items()]
+    return {"type": "line_item", "text": f"ITEM:{name} | PRICE:{price}", "fields": fields, "confidence": confidence}
+
+
+def test_detect_currency_from_amount_format():
+    assert normalizer.detect_currency(["$12.345", "$1.990"], default="CLP") == "CLP"
+    assert normalizer.detect_currency(["$12.34", "$1.99"], default="CLP") == "USD"
+    assert normalizer.detect_currency(["$12.34"], default="EUR") == "EUR"
+    assert normalizer.detect_currency(["1,234"], default="USD") == "CLP"
+    # Mixed or bare amounts do not tell.
+    assert normalizer.detect_currency(["$12.345", "$1.99"], default="CLP") == "CLP"
+    assert normalizer.detect_currency(["500"], default="USD") == "USD"
+
+
+def test_parse_amount_in_minor_units():
+    assert normalizer.parse_amount("TOTAL $12.345", "CLP") == 12345
+    assert normalizer.parse_amount("TOTAL $1.234.567", "CLP") == 1234567
+    assert normalizer.parse_amount("TOTAL $12.34", "USD") == 1234
+    assert normalizer.parse_amount("TOTAL 1,234.50", "USD") == 123450
+    assert normalizer.parse_amount("$12.50", "CLP") == 13
+    assert normalizer.parse_amount("DESCUENTO -$1.000", "CLP") == -1000
+    assert normalizer.parse_amount("5 USD", "USD") == 500
+    assert normalizer.parse_amount("2 x 990", "CLP") == 990
+    assert normalizer.parse_amount("no amount", "CLP") is None
+
+
+def test_parse_date_orders():
+    assert normalizer.parse_date("Fecha: 2026-02-03") == "2026-02-03"
+    assert normalizer.parse_date("03/02/2026") == "2026-02-03"
+    assert normalizer.parse_date("03-02-26") == "2026-02-03"
+    assert normalizer.parse_date("03.02.2026", month_first=True) == "2026-03-02"
+    # Only month-first is a valid date.
+    assert normalizer.parse_date("12/31/2025") == "2025-12-31"
+    assert normalizer.parse_date("31/12/2025", month_first=True) == "2025-12-31"
+    assert normalizer.parse_date("2026-02-30") is None
+    assert normalizer.parse_date("13/13/2026") is None
+    assert normalizer.parse_date("no date") is None
+
+
+def test_summary_fields_keep_most_confident_detection():
+    fields = normalizer._summary_fields([
+        _summary("total", "$9.990", 60.0),
+        _summary("TOTAL", " $12.990 ", 97.0),
+        _summary("TOTAL", "$1.000", 50.0),
+        _summary("VENDOR_NAME", "   "),
+        {"type": "line_item", "label": "TOTAL", "text": "$5"},
+    ])
+    assert fields == {"TOTAL": ("$12.990", 0.97)}
+
+
+def test_block_items_read_fields_and_skip_unpriced_lines():
+    items, confidences = normalizer._block_items([
+        _line_item("QUESO", "$12.990", QUANTITY="2", UNIT_PRICE="$6.495"),
+        _line_item("BOLSA", "", 90.0),
+        {"type": "line_item", "fields": [{"type": "PRICE", "text": "$990"}], "confidence": 80.0},
+        _summary("TOTAL", "$13.980"),
+    ], "CLP")
+    assert [(i["description"], i["amount"], i["qty"], i["unitPrice"]) for i in items] == [
+        ("QUESO", 12990, 2.0, 6495), ("Item", 990, None, None),
+    ]
+    assert [i["id"] for i in items] == ["li_1", "li_2"]
+    assert confidences == [0.95, 0.8]
+
+
+def test_text_items_skip_totals_payments_and_dates():
+    lines = ["LIDER EXPRESS", "03/02/2026", "LECHE ENTERA 1L 1.190", "PAN $2.490", "SUBTOTAL 3.680",
+             "IVA 588", "TOTAL $3.680", "EFECTIVO $5.000", "VUELTO $1.320"]
+    items = normalizer._text_items(lines, "CLP")
+    assert [(i["description"], i["amount"]) for i in items] == [("LECHE ENTERA 1L", 1190), ("PAN", 2490)]
+
+
+def test_normalize_blocks_confident_receipt_needs_no_review():
+    parsed = normalizer.normalize_receipt("", [
+        _summary("VENDOR_NAME", "JUMBO"), _summary("INVOICE_RECEIPT_DATE", "03/02/2026"),
+        _summary("TOTAL", "$12.990"), _line_item("QUESO", "$12.990"),
+    ])
+    assert (parsed["merchant"], parsed["purchaseDate"], parsed["dateStatus"]) == ("JUMBO", "2026-02-03", "found")
+    assert (parsed["currency"], parsed["totals"]["grandTotal"], parsed["source"]) == ("CLP", 12990, "blocks")
+    assert parsed["needsReview"] is False
+
+
+def test_normalize_flags_review_cases():
+    base = [_summary("VENDOR_NAME", "SAFEWAY"), _summary("TOTAL", "$4.50")]
+    # US receipts are read month-first; both orders being valid makes the date a guess.
+    us = normalizer.normalize_receipt("", base + [_summary("INVOICE_RECEIPT_DATE", "03/02/2026"),
+                                                  _line_item("MILK", "$4.50")])
+    assert (us["purchaseDate"], us["dateStatus"], us["needsReview"]) == ("2026-03-02", "ambiguous", True)
+    us_clear = normalizer.normalize_receipt("", base + [_summary("INVOICE_RECEIPT_DATE", "12/31/2025"),
+                                                        _line_item("MILK", "$4.50")])
+    assert (us_clear["purchaseDate"], us_clear["dateStatus"], us_clear["needsReview"]) == (
+        "2025-12-31", "found", False)
+
+    undated = normalizer.normalize_receipt("", base + [_line_item("MILK", "$4.50")])
+    assert undated["dateStatus"] == "missing" and undated["needsReview"] is True
+    assert undated["purchaseDate"] == datetime.now(timezone.utc).date().isoformat()
+
+    mismatched = normalizer.normalize_receipt("", base + [_summary("INVOICE_RECEIPT_DATE", "2026-02-03"),
+                                                          _line_item("MILK", "$9.00")])
+    assert mismatched["needsReview"] is True
+    unsure = normalizer.normalize_receipt("", [_summary(label, text, 60.0) for label, text in (
+        ("VENDOR_NAME", "SAFEWAY"), ("INVOICE_RECEIPT_DATE", "2026-02-03"), ("TOTAL", "$4.50"))])
+    assert unsure["confidence"] == 0.6 and unsure["needsReview"] is True
+
+
+def test_normalize_text_fallback_always_needs_review():
+    parsed = normalizer.normalize_receipt("SANTA ISABEL\n12/31/2025\nPAN 1.990\nTOTAL 1.990\nEFECTIVO 5.000")
+    assert (parsed["merchant"], parsed["purchaseDate"], parsed["totals"]["grandTotal"]) == (
+        "SANTA ISABEL", "2025-12-31", 1990)
+    assert [i["description"] for i in parsed["items"]] == ["PAN"]
+    assert (parsed["source"], parsed["needsReview"]) == ("text", True)
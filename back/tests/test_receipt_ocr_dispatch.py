@@ -0,0 +1,85 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from utils import ocr_queue, storage
+
+INTERNAL_HEADERS = {"X-Internal-Token": "dev-internal-token"}
+
+
+class FlakyQueue(ocr_queue.LocalQueue):
+    """Local queue whose sends fail while `down` is set."""
+
+    down = False
+
+    def send_batch(self, messages):
+        if self.down:
+            return [m["receipt_id"] for m in messages]
+        return super().send_batch(messages)
+
+
+@pytest.fixture()
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_storage", storage.LocalStorage(tmp_path, "http://testserver/api/v1/storage/receipts", "b", "k"))
+    q = FlakyQueue(":memory:")
+    monkeypatch.setattr(ocr_queue, "_queue", q)
+    return q
+
+
+def _upload(client: TestClient) -> dict:
+    return client.post("/receipts/upload", files={"file": ("r.jpg", b"jpeg", "image/jpeg")}).json()
+
+
+def test_upload_enqueues_handler_shaped_message_and_callback_acks(client: TestClient, queue):
+    receipt = _upload(client)
+    assert (receipt["ocrDispatch"], receipt["ocrAttempts"]) == ("enqueued", 1)
+
+    event = queue.receive()
+    assert len(event["Records"]) == 1
+    assert event["Records"][0]["attributes"] == {"ApproximateReceiveCount": "1"}
+    assert event["Records"][0]["body"] == (
+        '{"user_id": "u_001", "receipt_id": "%s", "image_url": "%s", "content_sha256": "%s"}'
+        % (receipt["receiptId"], receipt["imageUrl"], hashlib.sha256(b"jpeg").hexdigest())
+    )
+
+    resp = client.post("/internal/receipts/ocr-callback", headers=INTERNAL_HEADERS, json={
+        "userId": "u_001", "receiptId": receipt["receiptId"], "status": "ocr_done", "merchant": "Lider", "total": 1990,
+    })
+    assert resp.status_code == 200
+    stored = client.get(f"/receipts/{receipt['receiptId']}").json()
+    assert (stored["ocrDispatch"], stored["merchant"]) == ("acked", "Lider")
+
+
+def test_dispatch_retries_with_backoff_then_gives_up(client: TestClient, queue):
+    from db.session import SessionLocal
+    from utils.db import DB
+
+    queue.down = True
+    receipt = _upload(client)
+    assert (receipt["ocrDispatch"], receipt["ocrAttempts"]) == ("pending", 1)
+
+    now = datetime.now(timezone.utc)
+    queue.down = False
+    with SessionLocal() as session:
+        db = DB(session)
+        assert db.dispatch_ocr(queue, now=now)["enqueued"] == 0  # still backing off
+        assert db.dispatch_ocr(queue, now=now + timedelta(seconds=31))["enqueued"] == 1
+        # No ack within the timeout: sent again, until the attempts run out.
+        later = now + timedelta(seconds=31)
+        for _ in range(ocr_queue.OCR_MAX_ATTEMPTS - 2):
+            later += ocr_queue.OCR_ACK_TIMEOUT
+            assert db.dispatch_ocr(queue, now=later)["enqueued"] == 1
+        assert db.dispatch_ocr(queue, now=later + ocr_queue.OCR_ACK_TIMEOUT)["exhausted"] == 1
+        final = db.get_receipt("u_001", receipt["receiptId"])
+    assert (final["ocrDispatch"], final["ocrAttempts"], final["status"]) == ("failed", ocr_queue.OCR_MAX_ATTEMPTS, "ocr_failed")
+    assert len(queue) == ocr_queue.OCR_MAX_ATTEMPTS - 1
+
+
+def test_incomplete_queue_backend_fails_at_construction():
+    class NoSend(ocr_queue.OcrQueue):
+        pass
+
+    with pytest.raises(TypeError):
+        NoSend()
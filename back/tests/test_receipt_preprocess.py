@@ -0,0 +1,143 @@
+import hashlib
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from utils import storage
+from utils.process_pool import RestartablePool
+from utils.receipt_images import preprocess_image
+
+
+@pytest.fixture()
+def local_storage(tmp_path, monkeypatch):
+    backend = storage.LocalStorage(
+        root=tmp_path, upload_url="http://testserver/api/v1/storage/receipts", bucket="test-receipts", secret="s3cret",
+    )
+    monkeypatch.setattr(storage, "_storage", backend)
+    return backend
+
+
+def _photo(size=(3000, 1200), fmt="JPEG") -> bytes:
+    img = Image.new("RGB", size, (240, 240, 240))
+    img.paste((10, 10, 10), (0, 0, size[0] // 2, size[1] // 4))  # dark band at the top-left
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW to display
+    exif[0x010F] = "PhoneMaker"
+    out = io.BytesIO()
+    img.save(out, fmt, exif=exif.tobytes())
+    return out.getvalue()
+
+
+def test_preprocess_orients_strips_and_downsizes():
+    result = preprocess_image(_photo(), max_edge=1000, thumbnail_edge=100)
+
+    image = Image.open(io.BytesIO(result.data))
+    assert image.format == "JPEG"
+    assert (result.width, result.height) == image.size == (400, 1000)  # rotated portrait, long edge capped
+    assert not image.getexif()
+    # The dark band ends up along the top-right after applying the rotation.
+    assert image.getpixel((390, 10))[0] < 60 and image.getpixel((10, 990))[0] > 200
+    assert max(Image.open(io.BytesIO(result.thumbnail)).size) == 100
+    assert result.original_bytes > 0
+
+
+def test_preprocess_skips_files_pillow_cannot_decode():
+    assert preprocess_image(b"%PDF-1.7 not an image") is None
+
+
+def test_uploads_store_processed_image_and_thumbnail(client: TestClient, local_storage):
+    upload = client.post("/receipts/uploads", json={"filename": "boleta.png", "contentType": "image/png"}).json()
+    client.post(upload["url"], data=upload["fields"], files={"file": ("boleta.png", _photo(fmt="PNG"), "image/png")})
+    receipt = client.post(f"/receipts/uploads/{upload['receiptId']}/complete", json={"key": upload["key"]}).json()
+
+    stem = f"receipts/u_001/{upload['receiptId']}"
+    assert receipt["imageUrl"] == f"s3://test-receipts/{stem}.jpg"
+    # Thumbnails come back as signed links the browser can load.
+    assert receipt["thumbnailUrl"].startswith(f"{local_storage.upload_url}?")
+    thumb = client.get(receipt["thumbnailUrl"])
+    assert thumb.status_code == 200 and thumb.headers["content-type"] == "image/jpeg"
+    assert thumb.content == local_storage.get(f"{stem}.thumb.jpg")
+    assert client.get(receipt["thumbnailUrl"].replace("signature=", "signature=0")).status_code == 403
+    assert local_storage.object_size(upload["key"]) is None  # original replaced
+    stored = local_storage.get(f"{stem}.jpg")
+    assert max(Image.open(io.BytesIO(stored)).size) == 2000
+
+    # The legacy endpoint runs the same stage; PDFs are kept as uploaded.
+    pdf = client.post("/receipts/upload", files={"file": ("r.pdf", b"%PDF-1.7", "application/pdf")}).json()
+    assert pdf["imageUrl"].endswith(".pdf") and pdf["thumbnailUrl"] is None
+
+    from db import SessionLocal, models
+
+    with SessionLocal() as session:
+        row = session.get(models.Receipt, receipt["receiptId"])
+        assert row.content_sha256 == hashlib.sha256(stored).hexdigest()
+
+
+def test_upload_original_survives_a_failed_insert(client: TestClient, local_storage, monkeypatch):
+    from utils.db import DB
+
+    upload = client.post("/receipts/uploads", json={"filename": "boleta.png", "contentType": "image/png"}).json()
+    client.post(upload["url"], data=upload["fields"], files={"file": ("boleta.png", _photo(fmt="PNG"), "image/png")})
+    complete_url = f"/receipts/uploads/{upload['receiptId']}/complete"
+
+    def fail(self, user_id, payload):
+        raise RuntimeError("insert failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(DB, "create_receipt", fail)
+        with pytest.raises(RuntimeError):
+            client.post(complete_url, json={"key": upload["key"]})
+    assert local_storage.object_size(upload["key"])
+
+    assert client.post(complete_url, json={"key": upload["key"]}).status_code == 200
+    assert local_storage.object_size(upload["key"]) is None
+
+
+def test_restartable_pool_replaces_a_broken_pool():
+    pool = RestartablePool(1)
+    assert pool.run(abs, -1) == 1
+    broken = pool.executor()
+    for process in list(broken._processes.values()):
+        process.kill()
+    assert pool.run(abs, -2) == 2
+    assert pool.executor() is not broken
+
+
+def _no_semaphores(*args, **kwargs):
+    raise OSError(38, "Function not implemented")  # what SemLock raises without /dev/shm (Lambda)
+
+
+def test_restartable_pool_runs_in_process_when_workers_cannot_start(monkeypatch):
+    from utils import process_pool
+
+    monkeypatch.setattr(process_pool, "ProcessPoolExecutor", _no_semaphores)
+    pool = RestartablePool(1)
+    assert pool.run(abs, -3) == 3
+    assert pool.executor() is None and pool.inline
+
+
+def test_uploads_preprocess_in_process_when_the_pool_cannot_start(client: TestClient, local_storage, monkeypatch):
+    from utils import process_pool, receipt_images
+
+    monkeypatch.setattr(process_pool, "ProcessPoolExecutor", _no_semaphores)
+    monkeypatch.setattr(receipt_images, "_pool", RestartablePool(1))
+    upload = client.post("/receipts/uploads", json={"filename": "boleta.png", "contentType": "image/png"}).json()
+    client.post(upload["url"], data=upload["fields"], files={"file": ("boleta.png", _photo(fmt="PNG"), "image/png")})
+    resp = client.post(f"/receipts/uploads/{upload['receiptId']}/complete", json={"key": upload["key"]})
+    assert resp.status_code == 200 and resp.json()["imageUrl"].endswith(".jpg")
+    legacy = client.post("/receipts/upload", files={"file": ("r.jpg", _photo(), "image/jpeg")})
+    assert legacy.status_code == 200 and legacy.json()["thumbnailUrl"]
+
+
+def test_complete_upload_does_not_read_the_object_with_preprocessing_off(client: TestClient, local_storage, monkeypatch):
+    from utils import receipt_images
+
+    monkeypatch.setattr(receipt_images, "PREPROCESS_ENABLED", False)
+    monkeypatch.setattr(local_storage, "get", lambda key: pytest.fail("upload bytes read through the API"))
+    upload = client.post("/receipts/uploads", json={"filename": "boleta.png", "contentType": "image/png"}).json()
+    client.post(upload["url"], data=upload["fields"], files={"file": ("boleta.png", _photo(fmt="PNG"), "image/png")})
+    receipt = client.post(f"/receipts/uploads/{upload['receiptId']}/complete", json={"key": upload["key"]}).json()
+    assert receipt["imageUrl"] == f"s3://test-receipts/{upload['key']}" and receipt["thumbnailUrl"] is None
+    assert local_storage.object_size(upload["key"])
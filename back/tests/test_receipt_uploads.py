@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from utils import storage
+
+
+@pytest.fixture()
+def local_storage(tmp_path, monkeypatch):
+    backend = storage.LocalStorage(
+        root=tmp_path, upload_url="http://testserver/api/v1/storage/receipts", bucket="test-receipts", secret="s3cret",
+    )
+    monkeypatch.setattr(storage, "_storage", backend)
+    return backend
+
+
+def test_presigned_upload_then_complete_creates_receipt(client: TestClient, local_storage):
+    resp = client.post("/receipts/uploads", json={"filename": "Boleta Lider.JPG", "contentType": "image/jpeg"})
+    assert resp.status_code == 200
+    upload = resp.json()
+    assert upload["key"] == f"receipts/u_001/{upload['receiptId']}.jpg"
+
+    # Completing before the object exists fails and creates nothing.
+    complete_url = f"/receipts/uploads/{upload['receiptId']}/complete"
+    assert client.post(complete_url, json={"key": upload["key"]}).status_code == 404
+
+    # The upload itself is the presigned form POST, no bearer token.
+    resp = client.post(upload["url"], data=upload["fields"], files={"file": ("x.jpg", b"\xff\xd8jpeg-bytes", "image/jpeg")})
+    assert resp.status_code == 204
+    assert local_storage.object_size(upload["key"]) == 12
+
+    resp = client.post(complete_url, json={"key": upload["key"]})
+    assert resp.status_code == 200
+    receipt = resp.json()
+    assert receipt["receiptId"] == upload["receiptId"]
+    assert receipt["status"] == "uploaded"
+    assert receipt["imageUrl"] == f"s3://test-receipts/{upload['key']}"
+    assert client.post(complete_url, json={"key": upload["key"]}).json()["receiptId"] == upload["receiptId"]
+
+
+def test_upload_form_is_bound_to_its_policy(client: TestClient, local_storage):
+    upload = client.post("/receipts/uploads", json={"filename": "a.png", "contentType": "image/png"}).json()
+    other_key = dict(upload["fields"], key="receipts/u_002/rcpt_evil.png")
+    resp = client.post(upload["url"], data=other_key, files={"file": ("a.png", b"png", "image/png")})
+    assert resp.status_code == 403
+
+    too_big = storage.LocalStorage(local_storage.root, local_storage.upload_url, "b", "s3cret").presign_post(
+        upload["key"], "image/png", max_bytes=2
+    )
+    resp = client.post(upload["url"], data=too_big["fields"], files={"file": ("a.png", b"png", "image/png")})
+    assert resp.status_code == 403
+    assert local_storage.object_size(upload["key"]) is None
+
+    assert client.post("/receipts/uploads", json={"filename": "a.exe", "contentType": "application/x-msdownload"}).status_code == 400
+    complete_url = f"/receipts/uploads/{upload['receiptId']}/complete"
+    assert client.post(complete_url, json={"key": "receipts/u_002/x.png"}).status_code == 400
+    # Keys that merely share the expected prefix are not this upload's key.
+    for key in (upload["key"] + "x", upload["key"].replace(".png", "0.png"), upload["key"] + "/../a.png"):
+        assert client.post(complete_url, json={"key": key}).status_code == 400
+
+
+def test_complete_rejects_a_receipt_id_already_in_use(client: TestClient, local_storage):
+    from sqlalchemy import select
+
+    from db import SessionLocal, models
+
+    client.post("/auth/signup", json={"email": "other@example.com", "password": "pw"})
+    upload = client.post("/receipts/uploads", json={"filename": "a.png", "contentType": "image/png"}).json()
+    client.post(upload["url"], data=upload["fields"], files={"file": ("a.png", b"png", "image/png")})
+    with SessionLocal() as session:
+        other = session.scalar(select(models.User.id).where(models.User.email == "other@example.com"))
+        session.add(models.Receipt(id=upload["receiptId"], user_id=other, merchant="", total_cents=0,
+                                   status="uploaded", receipt_date=date(2026, 2, 1)))
+        session.commit()
+    resp = client.post(f"/receipts/uploads/{upload['receiptId']}/complete", json={"key": upload["key"]})
+    assert resp.status_code == 409
+
+
+def test_incomplete_storage_backend_fails_at_construction():
+    class NoDelete(storage.ReceiptStorage):
+        def presign_post(self, key, content_type, max_bytes=0, expires_in=0): ...
+        def object_size(self, key): ...
+        def put(self, key, fileobj, content_type): ...
+        def get(self, key): ...
+        def uri(self, key): ...
+
+    with pytest.raises(TypeError, match="delete"):
+        NoDelete()
@@ -38,3 +38,42 @@ def test_receipts_crud(client: TestClient):
     resp = client.patch(f"/receipts/{rcpt_id}", json=link_payload)
     assert resp.status_code == 200
     assert resp.json().get("transactionId") == txn_id
+
+
+def test_receipt_list_is_compact_and_detail_selects_fields(client: TestClient):
+    from db import engine, models
+    from sqlalchemy import event
+
+    rcpt = client.post("/receipts", json={
+        "merchant": "Lider", "date": "2026-02-01", "total": 1990, "status": "ocr_done",
+        "lineItems": [{"id": "li_1", "description": "Pan", "amount": 1990}],
+        "ocrRawText": "LIDER\nTOTAL 1.990", "ocrRawBlocks": [{"type": "summary", "label": "TOTAL", "text": "1.990"}],
+        "parsedReceipt": {"merchant": "LIDER"},
+    }).json()
+    rcpt_id = rcpt["receiptId"]
+
+    listed = next(r for r in client.get("/receipts").json() if r["receiptId"] == rcpt_id)
+    assert listed == {"receiptId": rcpt_id, "merchant": "Lider", "date": "2026-02-01", "total": 1990,
+                      "status": "ocr_done", "thumbnailUrl": None, "needsReview": False}
+
+    full = client.get(f"/receipts/{rcpt_id}").json()
+    assert full["ocrRawText"] == "LIDER\nTOTAL 1.990" and full["parsedReceipt"] == {"merchant": "LIDER"}
+    assert full["lineItems"][0]["description"] == "Pan"
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        resp = client.get(f"/receipts/{rcpt_id}", params={"fields": "total,lineItems"})
+        client.get("/receipts")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert resp.json() == {"receiptId": rcpt_id, "total": 1990, "lineItems": full["lineItems"]}
+    receipt_reads = [s for s in statements if "FROM receipts" in s]
+    assert receipt_reads and not any(col in s for s in receipt_reads for col in ("ocr_raw_text", "parsed_receipt"))
+    assert models.Receipt.parsed_receipt.property.deferred
+
+    parsed_only = client.get(f"/receipts/{rcpt_id}", params={"fields": "parsedReceipt"}).json()
+    assert parsed_only == {"receiptId": rcpt_id, "parsedReceipt": {"merchant": "LIDER"}}
+    assert client.get(f"/receipts/{rcpt_id}", params={"fields": "total,nope"}).status_code == 400
+    assert client.get("/receipts/rcpt_missing").status_code == 404
@@ -46,9 +46,9 @@ def test_internal_ocr_callback_updates_receipt(client: TestClient):
     )
     assert callback.status_code == 200
 
-    receipts = client.get("/receipts")
-    assert receipts.status_code == 200
-    updated = next(r for r in receipts.json() if r["receiptId"] == receipt_id)
+    receipt = client.get(f"/receipts/{receipt_id}")
+    assert receipt.status_code == 200
+    updated = receipt.json()
     assert updated["status"] == "ocr_done"
     assert updated["merchant"] == "Sample Store"
     assert updated["ocrProvider"] == "mock"
@@ -67,3 +67,29 @@ def test_internal_ocr_callback_requires_token(client: TestClient):
         },
     )
     assert callback.status_code == 401
+
+
+def test_internal_ocr_callback_batch_applies_results_in_one_call(client: TestClient):
+    done = client.post("/receipts/upload", files={"file": ("a.jpg", b"jpeg", "image/jpeg")}).json()
+    failed = client.post("/receipts/upload", files={"file": ("b.jpg", b"jpeg", "image/jpeg")}).json()
+
+    callback = client.post(
+        "/internal/receipts/ocr-callback:batch",
+        json={"results": [
+            {"userId": "u_001", "receiptId": done["receiptId"], "status": "ocr_done", "merchant": "Lider", "total": 1990},
+            {"userId": "u_001", "receiptId": "rcpt_missing", "status": "ocr_done"},
+            {"userId": "u_001", "receiptId": failed["receiptId"], "status": "ocr_failed", "ocrError": "blurry"},
+        ]},
+        headers={"X-Internal-Token": "dev-internal-token"},
+    )
+    assert callback.status_code == 200
+    assert callback.json() == {"updated": 2, "results": [
+        {"receiptId": done["receiptId"], "updated": True},
+        {"receiptId": "rcpt_missing", "updated": False},
+        {"receiptId": failed["receiptId"], "updated": True},
+    ]}
+
+    receipts = {rid: client.get(f"/receipts/{rid}").json() for rid in (done["receiptId"], failed["receiptId"])}
+    assert (receipts[done["receiptId"]]["merchant"], receipts[done["receiptId"]]["ocrDispatch"]) == ("Lider", "acked")
+    assert receipts[failed["receiptId"]]["ocrError"] == "blurry"
+    assert receipts[failed["receiptId"]]["ocrDispatch"] == "pending"
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from utils.recurrence import expand_rules, rule_occurrences
+
+
+def test_monthly_clamps_and_yearly_handles_leap_day():
+    monthly = {"cadence": "MONTHLY", "dayOfMonth": 31, "startDate": "2024-01-15", "endDate": "2024-05-10"}
+    assert rule_occurrences(monthly, date(2024, 1, 1), date(2024, 12, 31)) == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30),
+    ]
+    yearly = {"cadence": "YEARLY", "startDate": "2020-02-29"}
+    assert rule_occurrences(yearly, date(2022, 1, 1), date(2024, 12, 31)) == [
+        date(2022, 2, 28), date(2023, 2, 28), date(2024, 2, 29),
+    ]
+
+
+def test_expand_rules_batches_cadences():
+    rules = [
+        {"ruleId": "w", "cadence": "WEEKLY", "startDate": "2026-01-02"},
+        {"ruleId": "m", "cadence": "MONTHLY", "dayOfMonth": 5, "startDate": "2026-03-01"},
+        {"ruleId": "later", "cadence": "MONTHLY", "startDate": "2027-01-01"},
+    ]
+    result = expand_rules(rules, date(2026, 1, 10), date(2026, 3, 31))
+    assert [str(d) for d in result["w"][:3]] == ["2026-01-16", "2026-01-23", "2026-01-30"]
+    assert [str(d) for d in result["m"]] == ["2026-03-05"]
+    assert len(result["later"]) == 0
+
+
+def test_occurrences_endpoint_matches_materialized_bills(client: TestClient):
+    today = date.today()
+    start = (today.replace(day=1) + timedelta(days=40)).replace(day=1)
+    rule = client.post("/recurring", json={
+        "name": "Rent", "amount": -300000, "currency": "CLP", "cadence": "MONTHLY",
+        "dayOfMonth": 30, "startDate": start.isoformat(), "autopostMode": "PROJECT_ONLY",
+    }).json()
+    end = start + timedelta(days=120)
+    resp = client.get(f"/recurring/{rule['ruleId']}/occurrences", params={"from": start.isoformat(), "to": end.isoformat()})
+    assert resp.status_code == 200
+    dates = resp.json()["dates"]
+    assert len(dates) == 4
+
+    client.post("/bills/materialize", params={"through": f"{end.year:04d}-{end.month:02d}"})
+    due = [b["dueDate"] for b in client.get("/bills").json() if b["dueDate"] <= end.isoformat()]
+    assert due == dates
+
+    assert client.get("/recurring/rec_missing/occurrences", params={"from": "2026-01-01", "to": "2026-02-01"}).status_code == 404
+    bad = client.get(f"/recurring/{rule['ruleId']}/occurrences", params={"from": "2026-02-01", "to": "2026-01-01"})
+    assert bad.status_code == 400
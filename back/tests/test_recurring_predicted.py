@@ -0,0 +1,69 @@
+from datetime import date, datetime, timezone
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from utils.amount_prediction import predict_amounts
+
+NAN = np.nan
+
+
+def test_predict_amounts_methods():
+    # 14 months of history ending the month before as_of; winter (months 6-8 of each year) costs more.
+    seasonal = [-30, -30, -60, -80, -70, -40, -30, -30, -30, -30, -33, -33, -66, -88]
+    history = np.array([
+        [NAN] * 8 + [-100, -100, -400, -100, -100, -100],
+        [NAN] * 8 + [-100, -100, -100, -100, -100, -400],
+        seasonal,
+        [NAN] * 14,
+    ])
+    amounts = predict_amounts(["MEDIAN", "EWMA", "SEASONAL", "MEDIAN"], [6, 3, 2, 6], [0, 0, 0, -555], history, horizon=4)
+
+    assert amounts[0].tolist() == [-100] * 4  # the median ignores the one-off spike
+    assert amounts[1, 0] == -271  # EWMA, alpha 0.5: (400 + .5 * 100 + .25 * 100) / 1.75
+    # Same month last year (-60, -80, ...) scaled by the last 2 months vs. the same 2 months a year earlier (77 / 30).
+    assert amounts[2].tolist() == [-154, -205, -180, -103]
+    assert amounts[3].tolist() == [-555] * 4  # no history -> the rule's fixed amount
+
+
+def test_predicted_rule_amount_from_paid_bills(client: TestClient):
+    from db import models
+    from db.session import SessionLocal
+
+    today = datetime.now(timezone.utc).date()
+    rule = client.post("/recurring", json={
+        "name": "Enel", "amount": -20000, "currency": "CLP", "cadence": "MONTHLY", "dayOfMonth": 1,
+        "startDate": "2020-01-01", "amountMode": "PREDICTED", "predictionMethod": "MEDIAN", "predictionMonths": 3,
+    }).json()
+    assert rule["amountMode"] == "PREDICTED"
+
+    index = today.year * 12 + today.month - 1
+    with SessionLocal() as session:
+        for back, amount in ((1, -31000), (2, -35000), (3, -30000), (4, -90000)):
+            month = index - back
+            session.add(models.Bill(
+                id=f"bill_hist_{back}", user_id="u_001", rule_id=rule["ruleId"], name="Enel",
+                due_date=date(month // 12, month % 12 + 1, 1), amount_cents=amount, currency="CLP", status="PAID",
+            ))
+        session.commit()
+
+    listed = {r["ruleId"]: r for r in client.get("/recurring").json()}
+    assert listed[rule["ruleId"]]["predictedAmount"] == -31000
+
+    resp = client.post("/bills/materialize", params={"through": today.strftime("%Y-%m")})
+    assert resp.status_code == 200
+    projected = [b for b in client.get("/bills").json() if b["status"] == "PROJECTED"]
+    assert [b["amount"] for b in projected] == [-31000]
+
+    # A user-edited projected bill keeps its amount when predictions move.
+    assert client.patch(f"/bills/{projected[0]['billId']}", json={"amount": -32500}).status_code == 200
+    with SessionLocal() as session:
+        session.get(models.Bill, "bill_hist_1").amount_cents = -50000
+        session.commit()
+    assert client.post("/bills/materialize", params={"through": today.strftime("%Y-%m")}).status_code == 200
+    assert {r["ruleId"]: r for r in client.get("/recurring").json()}[rule["ruleId"]]["predictedAmount"] == -35000
+    assert [b["amount"] for b in client.get("/bills").json() if b["status"] == "PROJECTED"] == [-32500]
+
+    assert client.post("/recurring", json={
+        "name": "X", "amount": -1, "cadence": "MONTHLY", "startDate": "2026-01-01", "amountMode": "GUESS",
+    }).status_code == 422
@@ -0,0 +1,62 @@
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from utils.subscriptions import mine_recurring
+
+
+def test_mine_recurring_detects_regular_charges_only():
+    today = date(2026, 6, 20)
+    rows = []
+    for i in range(6):
+        rows.append(("u1", 1, date(2026, 1, 15) + timedelta(days=30 * i), -9990))  # monthly, fixed
+        rows.append(("u1", 2, date(2026, 5, 10) + timedelta(days=7 * i), -5000 - 10 * i))  # weekly
+        rows.append(("u1", 3, date(2026, 1, 3) + timedelta(days=(0, 4, 31, 33, 80, 130)[i]), -2000))  # irregular
+        rows.append(("u2", 1, date(2026, 1, 15) + timedelta(days=30 * i), -(3000 + 4000 * (i % 2))))  # amount varies
+    rows.append(("u1", 1, date(2026, 6, 14), -9990))  # same-day duplicate
+
+    found = {(s["userId"], s["merchantId"]): s for s in mine_recurring(*zip(*rows), today=today)}
+
+    assert set(found) == {("u1", 1), ("u1", 2)}
+    monthly = found[("u1", 1)]
+    assert (monthly["cadence"], monthly["dayOfMonth"], monthly["amount"], monthly["occurrences"]) == ("MONTHLY", 15, -9990, 6)
+    weekly = found[("u1", 2)]
+    assert (weekly["cadence"], weekly["dayOfMonth"], weekly["lastDate"]) == ("WEEKLY", None, date(2026, 6, 14))
+
+
+def test_suggestions_endpoint_skips_merchants_with_rules(client: TestClient):
+    today = datetime.now(timezone.utc).date()
+    for i in range(1, 5):
+        day = (today - timedelta(days=30 * i)).isoformat()
+        for merchant, amount in (("NETFLIX.COM", -9990), ("PAGO AUTOMATICO SPOTIFY", -5490)):
+            resp = client.post("/transactions", json={"date": day, "merchant": merchant, "amount": amount, "currency": "CLP"})
+            assert resp.status_code in (200, 201)
+    client.post("/recurring", json={
+        "name": "Spotify", "amount": -5490, "currency": "CLP", "cadence": "MONTHLY", "startDate": today.isoformat(),
+    })
+
+    resp = client.get("/recurring/suggestions")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [s["name"] for s in body] == ["NETFLIX.COM"]
+    assert body[0]["cadence"] == "MONTHLY"
+    assert body[0]["amount"] == -9990
+    assert body[0]["startDate"] > body[0]["lastDate"]
+
+
+def test_suggestions_without_candidates_are_not_remined_within_max_age(client: TestClient, monkeypatch):
+    from utils import db as db_module
+
+    client.post("/transactions", json={"date": datetime.now(timezone.utc).date().isoformat(),
+                                       "merchant": "CAFE", "amount": -2500, "currency": "CLP"})
+    runs = []
+    refresh = db_module.DB.refresh_recurring_suggestions
+
+    def counting_refresh(self, *args, **kwargs):
+        runs.append(args)
+        return refresh(self, *args, **kwargs)
+
+    monkeypatch.setattr(db_module.DB, "refresh_recurring_suggestions", counting_refresh)
+    assert client.get("/recurring/suggestions").json() == []
+    assert client.get("/recurring/suggestions").json() == []
+    assert len(runs) == 1
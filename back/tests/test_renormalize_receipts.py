@@ -0,0 +1,84 @@
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+INTERNAL_HEADERS = {"X-Internal-Token": "dev-internal-token"}
+LAMBDA_DIR = str(Path(__file__).resolve().parents[2] / "ocr-lambda")
+
+BLOCKS = [
+    {"type": "summary", "label": "VENDOR_NAME", "text": "JUMBO COSTANERA", "confidence": 99.0},
+    {"type": "summary", "label": "INVOICE_RECEIPT_DATE", "text": "03/02/2026", "confidence": 98.0},
+    {"type": "summary", "label": "TOTAL", "text": "$12.990", "confidence": 97.0},
+    {"type": "line_item", "text": "ITEM:QUESO | PRICE:$12.990", "confidence": 95.0,
+     "fields": [{"type": "ITEM", "text": "QUESO", "confidence": 95.0},
+                {"type": "PRICE", "text": "$12.990", "confidence": 95.0}]},
+]
+# What an older normalizer made of the flattened text: "12.990" read as 12.99 dollars.
+OLD_PARSED = {"merchant": "VENDOR_NAME: JUMBO COSTANERA", "purchaseDate": "2026-03-02",
+              "totals": {"grandTotal": 1299}, "items": [], "needsReview": True}
+
+
+def _seed(client: TestClient) -> str:
+    receipt_id = client.post("/receipts/upload", files={"file": ("r.jpg", b"img", "image/jpeg")}).json()["receiptId"]
+    resp = client.post("/internal/receipts/ocr-callback", headers=INTERNAL_HEADERS, json={
+        "userId": "u_001", "receiptId": receipt_id, "status": "ocr_done",
+        "merchant": OLD_PARSED["merchant"], "date": "2026-03-02", "total": 1299, "lineItems": [],
+        "needsReview": True, "ocrRawText": "VENDOR_NAME: JUMBO COSTANERA\nTOTAL: $12.990",
+        "ocrRawBlocks": BLOCKS, "parsedReceipt": OLD_PARSED,
+    })
+    assert resp.status_code == 200
+    return receipt_id
+
+
+def test_renormalize_rewrites_parsed_fields_but_keeps_user_edits(client: TestClient):
+    from db import SessionLocal
+    from jobs import renormalize_receipts
+    from utils.db import DB
+
+    untouched, edited = _seed(client), _seed(client)
+    assert client.patch(f"/receipts/{edited}", json={"merchant": "Jumbo"}).status_code == 200
+    client.post("/receipts/upload", files={"file": ("r.jpg", b"no ocr yet", "image/jpeg")})
+
+    renormalize_receipts._init_worker(LAMBDA_DIR)
+    with SessionLocal() as read_session, SessionLocal() as write_session:
+        reader = DB(read_session)
+        assert reader.count_ocr_receipts() == 2
+        assert reader.count_ocr_receipts(after_id=min(untouched, edited)) == 1
+        updates = [renormalize_receipts.renormalize(r) for r in reader.iter_ocr_receipts(batch_size=1)]
+        assert [u["receiptId"] for u in updates] == sorted([untouched, edited])
+        by_id = {u["receiptId"]: u for u in updates}
+        assert by_id[untouched]["changes"]["merchant"] == [OLD_PARSED["merchant"], "JUMBO COSTANERA"]
+        assert "merchant" not in by_id[edited]["changes"]
+        for u in updates:
+            u.pop("changes")
+        DB(write_session).apply_renormalized(updates)
+
+    fixed = client.get(f"/receipts/{untouched}").json()
+    assert (fixed["merchant"], fixed["total"], fixed["date"]) == ("JUMBO COSTANERA", 12990, "2026-02-03")
+    assert [i["description"] for i in fixed["lineItems"]] == ["QUESO"]
+    assert fixed["parsedReceipt"]["source"] == "blocks"
+    kept = client.get(f"/receipts/{edited}").json()
+    assert (kept["merchant"], kept["total"]) == ("Jumbo", 12990)
+
+    # A second pass finds nothing left to change.
+    with SessionLocal() as session:
+        assert [renormalize_receipts.renormalize(r) for r in DB(session).iter_ocr_receipts()] == [None, None]
+
+
+def test_renormalize_keeps_edits_saved_after_the_read(client: TestClient):
+    from db import SessionLocal
+    from jobs import renormalize_receipts
+    from utils.db import DB
+
+    receipt_id = _seed(client)
+    renormalize_receipts._init_worker(LAMBDA_DIR)
+    with SessionLocal() as read_session, SessionLocal() as write_session:
+        updates = [renormalize_receipts.renormalize(r) for r in DB(read_session).iter_ocr_receipts()]
+        assert updates[0]["merchant"] == "JUMBO COSTANERA"
+        # Reviewed while the batch was being normalized.
+        assert client.patch(f"/receipts/{receipt_id}", json={"merchant": "Jumbo", "date": "2026-02-04"}).status_code == 200
+        DB(write_session).apply_renormalized(updates)
+
+    receipt = client.get(f"/receipts/{receipt_id}").json()
+    assert (receipt["merchant"], receipt["date"], receipt["total"]) == ("Jumbo", "2026-02-04", 12990)
+    assert receipt["parsedReceipt"]["dateStatus"] == "found"
@@ -0,0 +1,82 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+
+def _txn(merchant: str, description: str = "", notes: str = "") -> dict:
+    return {
+        "date": "2026-02-10",
+        "merchant": merchant,
+        "description": description,
+        "notes": notes,
+        "amount": -4500,
+        "currency": "CLP",
+        "source": "manual",
+    }
+
+
+def _receipt(merchant: str, ocr_text: str, items: list[str]) -> dict:
+    return {
+        "merchant": merchant,
+        "date": "2026-02-11",
+        "total": 9900,
+        "status": "processed",
+        "ocrRawText": ocr_text,
+        "lineItems": [{"id": f"li_{i}", "description": d, "amount": 100} for i, d in enumerate(items)],
+    }
+
+
+def test_search_mixes_transactions_and_receipts(client: TestClient):
+    client.post("/transactions", json=_txn("Starbucks", description="cafe con amigos"))
+    client.post("/transactions", json=_txn("Jumbo", notes="pan y cafe"))
+    client.post("/transactions", json=_txn("Copec", description="bencina"))
+    client.post("/receipts", json=_receipt("Lider", "LIDER EXPRESS TOTAL 9900", ["CAFE MOLIDO 250G", "LECHE"]))
+
+    resp = client.get("/search", params={"q": "cafe"})
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert {(i["type"], i["merchant"]) for i in items} == {
+        ("transaction", "Starbucks"),
+        ("transaction", "Jumbo"),
+        ("receipt", "Lider"),
+    }
+    scores = [i["score"] for i in items]
+    assert scores == sorted(scores, reverse=True)
+
+    # Misspelled merchant still matches through trigram similarity.
+    resp = client.get("/search", params={"q": "starbuks"})
+    assert [i["merchant"] for i in resp.json()["items"]] == ["Starbucks"]
+
+
+def test_search_keyset_pagination(client: TestClient):
+    for n in range(5):
+        client.post("/transactions", json=_txn(f"Tienda {n}", description="regalo cumpleaños"))
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "regalo", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/search", params=params).json()
+        seen.extend(i["id"] for i in page["items"])
+        cursor = page["nextCursor"]
+        if not cursor:
+            break
+    assert len(seen) == 5 and len(set(seen)) == 5
+
+    assert client.get("/search", params={"q": "regalo", "cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_search_plan_uses_gin_indexes(client: TestClient):
+    from db.session import SessionLocal
+    from utils.search import search_statement
+
+    stmt = search_statement("u_001", "cafe", 20)
+    with SessionLocal() as session:
+        session.execute(text("SET LOCAL enable_seqscan = off"))
+        conn = session.connection()
+        compiled = stmt.compile(dialect=conn.dialect)
+        plan = "\n".join(row[0] for row in conn.exec_driver_sql("EXPLAIN " + str(compiled), compiled.params))
+    assert "transactions_search_idx" in plan
+    assert "transactions_merchant_trgm_idx" in plan
+    assert "receipts_search_idx" in plan
@@ -0,0 +1,58 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from utils.transfers import TransferCandidate, pair_transfers
+
+
+def test_pair_transfers_requires_other_account_and_window():
+    d = date(2026, 3, 10)
+    rows = [
+        TransferCandidate("out_1", "checking", d, -50000),
+        TransferCandidate("in_same", "checking", d, 50000),
+        TransferCandidate("in_far", "savings", date(2026, 3, 20), 50000),
+        TransferCandidate("in_1", "savings", date(2026, 3, 11), 50000),
+        TransferCandidate("out_2", "checking", d, -12000),
+        TransferCandidate("in_2", "savings", d, 12001),
+    ]
+    assert pair_transfers(rows) == [("out_1", "in_1")]
+
+
+def test_pair_transfers_takes_earliest_credit_on_another_account():
+    d = date(2026, 3, 10)
+    rows = [TransferCandidate(f"same_{n}", "checking", d, 20000) for n in range(500)] + [
+        TransferCandidate("out_1", "checking", d, -20000),
+        TransferCandidate("out_2", "checking", date(2026, 3, 11), -20000),
+        TransferCandidate("in_late", "savings", date(2026, 3, 12), 20000),
+        TransferCandidate("in_b", "brokerage", date(2026, 3, 9), 20000),
+        TransferCandidate("in_a", "savings", date(2026, 3, 9), 20000),
+    ]
+    assert pair_transfers(rows) == [("out_1", "in_a"), ("out_2", "in_b")]
+
+
+def test_import_marks_transfers_against_other_account(client: TestClient):
+    client.post("/transactions", json={
+        "date": "2026-03-11", "merchant": "Transferencia desde cuenta corriente", "amount": 50000,
+        "currency": "CLP", "accountId": "acc_savings",
+    })
+    client.post("/transactions", json={
+        "date": "2026-03-11", "merchant": "Intereses", "amount": 300,
+        "currency": "CLP", "accountId": "acc_savings",
+    })
+    csv_body = "date,amount,description\n2026-03-10,-50000,Transferencia a cuenta ahorro\n2026-03-10,-4500,Cafe\n"
+    resp = client.post(
+        "/transactions/import",
+        files={"file": ("cartola.csv", csv_body, "text/csv")},
+        data={"accountId": "acc_checking"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["transfers"] == 1
+
+    items = client.get("/transactions").json()
+    kinds = {(i["accountId"], i["amount"]): i["entryType"] for i in items}
+    assert kinds == {
+        ("acc_savings", 50000): "transfer",
+        ("acc_checking", -50000): "transfer",
+        ("acc_savings", 300): None,
+        ("acc_checking", -4500): None,
+    }
@@ -0,0 +1,133 @@
+"""Per-period amounts for recurring rules whose amount varies (utilities, cards).
+
+A rule in PREDICTED mode takes its amount for a future month from what its
+bills actually cost in past months (the linked transaction when there is one,
+else the bill amount). All of a user's variable rules are predicted together
+from one (rules x months) history matrix, with NaN where a month has no paid
+bill:
+
+- MEDIAN: median of the last N months.
+- EWMA: exponentially weighted mean of the last N months, alpha = 2 / (N + 1).
+- SEASONAL: the same calendar month a year earlier, scaled by how the last N
+  months compare with the N months a year before them; MEDIAN when last
+  year's month is missing.
+
+Rules with no history fall back to their fixed `amount_cents`. Predictions only
+use months before the current one, so they are stable for the whole month and
+cached per user and month.
+"""
+import warnings
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .cache import UserCache
+
+PREDICTION_METHODS = ("MEDIAN", "EWMA", "SEASONAL")
+DEFAULT_PREDICTION_MONTHS = 6
+# Future months predicted per computation; the materializer never goes further.
+PREDICTION_HORIZON_MONTHS = 24
+
+# Per-user {as_of 'YYYY-MM': {rule_id: {'YYYY-MM': amount}}}; the DB facade
+# invalidates it together with the forecast.
+prediction_cache = UserCache(maxsize=1024, ttl_seconds=3600.0)
+
+
+def month_index(month: str) -> int:
+    """'YYYY-MM' -> months since year 0, so month arithmetic is integer arithmetic."""
+    year, mon = month.split("-")
+    return int(year) * 12 + int(mon) - 1
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def history_matrix(observations: Iterable[Tuple[int, int, int]], rules: int, width: int) -> np.ndarray:
+    """(rule row, month column, amount) triples -> (rules, width) mean amount per month, NaN when empty.
+
+    WEEKLY rules have several bills a month; the mean keeps the value per occurrence.
+    """
+    obs = list(observations)
+    totals = np.zeros((rules, width))
+    counts = np.zeros((rules, width))
+    if obs:
+        rows, cols, amounts = (np.array(column) for column in zip(*obs))
+        np.add.at(totals, (rows, cols), amounts.astype(np.float64))
+        np.add.at(counts, (rows, cols), 1)
+    with np.errstate(invalid="ignore"):
+        return totals / counts
+
+
+def predict_amounts(
+    methods: Sequence[str],
+    lookbacks: Sequence[int],
+    fallbacks: Sequence[int],
+    history: np.ndarray,
+    horizon: int = PREDICTION_HORIZON_MONTHS,
+) -> np.ndarray:
+    """Predict `horizon` months (as_of, as_of + 1, ...) for every rule.
+
+    `history` is (rules, H) with column H - 1 the month before as_of, NaN
+    where there is no observation; H should cover the longest lookback plus
+    12 months for SEASONAL. Returns an int64 (rules, horizon) matrix.
+    """
+    rules, width = history.shape
+    result = np.empty((rules, horizon), dtype=np.float64)
+    if rules == 0:
+        return result.astype(np.int64)
+    methods_arr = np.asarray(methods)
+    lookback = np.clip(np.asarray(lookbacks, dtype=np.int64), 1, width)
+    age = np.arange(width)[::-1]  # 0 = most recent month
+    recent = age[None, :] < lookback[:, None]
+    observed = ~np.isnan(history)
+
+    recent_values = np.where(recent, history, np.nan)
+    # All-NaN rows (no history) yield NaN here and take the fallback below.
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(recent_values, axis=1)
+        alpha = 2.0 / (lookback + 1.0)
+        weights = np.where(recent & observed, (1.0 - alpha[:, None]) ** age[None, :], 0.0)
+        ewma = (weights * np.nan_to_num(history)).sum(axis=1) / weights.sum(axis=1)
+
+        year_ago = (age[None, :] >= 12) & (age[None, :] < lookback[:, None] + 12)
+        level = np.nanmean(recent_values, axis=1) / np.nanmean(np.where(year_ago, history, np.nan), axis=1)
+
+    base = np.where(methods_arr == "EWMA", ewma, median)
+    base = np.where(np.isnan(base), np.asarray(fallbacks, dtype=np.float64), base)
+    result[:] = base[:, None]
+
+    seasonal = methods_arr == "SEASONAL"
+    if seasonal.any():
+        # Target month k (0 = as_of) maps to history column width - 12 + (k % 12).
+        columns = width - 12 + np.arange(horizon) % 12
+        valid = columns >= 0
+        last_year = np.full((rules, horizon), np.nan)
+        last_year[:, valid] = history[:, columns[valid]]
+        scaled = last_year * np.where(np.isnan(level), 1.0, level)[:, None]
+        use = seasonal[:, None] & ~np.isnan(scaled)
+        result = np.where(use, scaled, result)
+    return np.rint(result).astype(np.int64)
+
+
+def prediction_table(
+    rule_ids: Sequence[str],
+    amounts: np.ndarray,
+    as_of: str,
+) -> Dict[str, Dict[str, int]]:
+    first = month_index(as_of)
+    labels: List[str] = [month_label(first + k) for k in range(amounts.shape[1])]
+    return {
+        rule_id: dict(zip(labels, row))
+        for rule_id, row in zip(rule_ids, amounts.tolist())
+    }
+
+
+def amount_for(table: Dict[str, int], month: str) -> int:
+    """Amount for `month`, reusing the same calendar month within the horizon past its end."""
+    index = month_index(month)
+    last = month_index(max(table))
+    while month_label(index) not in table and index > last:
+        index -= 12
+    return table.get(month_label(index), table[min(table)])
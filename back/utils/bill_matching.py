@@ -0,0 +1,84 @@
+"""Match imported transactions to the open bills they pay.
+
+Open bills are indexed by amount bucket: buckets are geometric with ratio
+(1 + AMOUNT_TOLERANCE), so any amount within tolerance of a bill falls in the
+bill's bucket or a neighbour and a lookup touches three dict slots. Each
+transaction then picks, among unused bills due within the date window, the
+one whose name is most similar to its merchant; amount and date distance
+break remaining ties. Cost is O((bills + transactions) * bills per bucket).
+"""
+import math
+from datetime import date
+from difflib import SequenceMatcher
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .merchants import canonicalize_merchant
+
+# Relative difference allowed between a bill and the payment (rounding, fees).
+AMOUNT_TOLERANCE = 0.02
+DUE_WINDOW_DAYS = 5
+
+_LOG_STEP = math.log1p(AMOUNT_TOLERANCE)
+
+
+class OpenBill(NamedTuple):
+    id: str
+    name: str
+    due_date: date
+    amount: int
+
+
+class PaymentCandidate(NamedTuple):
+    id: str
+    merchant: str
+    txn_date: date
+    amount: int
+
+
+def _bucket(amount: int) -> Tuple[int, int]:
+    return (1 if amount > 0 else -1, round(math.log(abs(amount)) / _LOG_STEP))
+
+
+def merchant_similarity(a: str, b: str) -> float:
+    ca, cb = canonicalize_merchant(a), canonicalize_merchant(b)
+    if not ca or not cb:
+        return 0.0
+    if ca in cb or cb in ca:
+        return 1.0
+    return SequenceMatcher(None, ca, cb).ratio()
+
+
+def match_bills(
+    bills: Sequence[OpenBill],
+    payments: Sequence[PaymentCandidate],
+    window_days: int = DUE_WINDOW_DAYS,
+) -> List[Tuple[str, str]]:
+    """Return (bill_id, txn_id) pairs; each bill and transaction is used at most once."""
+    index: Dict[Tuple[int, int], List[OpenBill]] = {}
+    for bill in bills:
+        if bill.amount:
+            index.setdefault(_bucket(bill.amount), []).append(bill)
+
+    used: set[str] = set()
+    pairs: List[Tuple[str, str]] = []
+    for txn in sorted(payments, key=lambda p: (p.txn_date, p.id)):
+        if not txn.amount:
+            continue
+        sign, bucket = _bucket(txn.amount)
+        best: Optional[Tuple[Tuple[float, int, int, str], OpenBill]] = None
+        for neighbour in (bucket - 1, bucket, bucket + 1):
+            for bill in index.get((sign, neighbour), ()):
+                if bill.id in used:
+                    continue
+                if abs(bill.amount - txn.amount) > AMOUNT_TOLERANCE * abs(bill.amount):
+                    continue
+                days_off = abs((txn.txn_date - bill.due_date).days)
+                if days_off > window_days:
+                    continue
+                rank = (-merchant_similarity(bill.name, txn.merchant), abs(bill.amount - txn.amount), days_off, bill.id)
+                if best is None or rank < best[0]:
+                    best = (rank, bill)
+        if best is not None:
+            used.add(best[1].id)
+            pairs.append((best[1].id, txn.id))
+    return pairs
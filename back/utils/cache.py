@@ -0,0 +1,59 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Optional
+
+_registry: "weakref.WeakSet[UserCache]" = weakref.WeakSet()
+
+
+class UserCache:
+    """Thread-safe LRU of per-user derived state (compiled matchers, indexes, projections).
+
+    Writes that go through the DB facade invalidate the owning user's entry
+    explicitly. The TTL bounds staleness for writes made by other workers
+    (separate uvicorn processes or Lambda containers) that this process never sees.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        _registry.add(self)
+
+    def get(self, user_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+            return value
+
+    def put(self, user_id: str, value: Any) -> None:
+        with self._lock:
+            self._data[user_id] = (time.monotonic(), value)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def clear_all_caches() -> None:
+    """Drop every UserCache in the process (tests reset the database underneath them)."""
+    for cache in list(_registry):
+        cache.clear()
@@ -0,0 +1,129 @@
+"""User-defined categorization rules compiled into an Aho–Corasick automaton.
+
+Every active rule contributes one pattern. The automaton is built once per
+user and scans each transaction field in O(len(text) + matches), so adding
+rules does not slow down matching.
+"""
+import unicodedata
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+from .cache import UserCache
+
+RULE_FIELDS = ("merchant", "description", "notes")
+
+# Compiled matchers per user; invalidated by the DB facade on rule writes.
+matcher_cache = UserCache(maxsize=2048, ttl_seconds=300.0)
+
+
+def fold_text(value: Optional[str]) -> str:
+    """Lowercase and strip accents so 'CAFÉ' and 'cafe' compare equal."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher. `search` yields the ids of every pattern found."""
+
+    def __init__(self, patterns: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pid, pattern in enumerate(patterns):
+            if pattern:
+                self._add(pattern, pid)
+        self._build()
+
+    def _add(self, pattern: str, pid: int) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pid)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Merge outputs along the failure link so search never walks it.
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> set[int]:
+        found: set[int] = set()
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class RuleMatcher:
+    """Picks the winning rule for a transaction: highest priority, then oldest rule."""
+
+    def __init__(self, rules: Sequence[Dict[str, Any]]):
+        active = [r for r in rules if r.get("isActive", True) and r.get("pattern")]
+        self.rules: List[Dict[str, Any]] = sorted(
+            active, key=lambda r: (-int(r.get("priority") or 0), r.get("createdAt") or "", r["ruleId"])
+        )
+        self._automaton = AhoCorasick([fold_text(r["pattern"]) for r in self.rules])
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, txn: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.rules:
+            return None
+        best: Optional[int] = None
+        for field in RULE_FIELDS:
+            text = fold_text(txn.get(field))
+            if not text:
+                continue
+            for idx in self._automaton.search(text):
+                scope = self.rules[idx].get("field") or "any"
+                if scope != "any" and scope != field:
+                    continue
+                if best is None or idx < best:
+                    best = idx
+        return self.rules[best] if best is not None else None
+
+    def apply(self, txn: Dict[str, Any], overwrite: bool = False) -> Optional[Dict[str, Any]]:
+        """Mutate a transaction payload with the winning rule's category and notes.
+
+        Transactions that already carry a category (directly or through splits)
+        are left alone unless `overwrite` is set; multi-part splits never are.
+        A single split takes the transaction's new category as well.
+        """
+        splits = txn.get("splits") or []
+        if len(splits) > 1:
+            return None
+        already = txn.get("categoryId") or any(s.get("categoryId") for s in splits)
+        if already and not overwrite:
+            return None
+        rule = self.match(txn)
+        if not rule:
+            return None
+        txn["categoryId"] = rule["categoryId"]
+        if splits:
+            txn["splits"] = [{**splits[0], "categoryId": rule["categoryId"]}]
+        if rule.get("notes") and not txn.get("notes"):
+            txn["notes"] = rule["notes"]
+        return rule
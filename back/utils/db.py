@@ -1,19 +1,123 @@
+import json
+import time
 import uuid
-from datetime import date
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
-from sqlalchemy import delete, select
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, case, delete, event, exists, func, insert, null, or_, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased, load_only, undefer
 
 from db import SessionLocal
 from db import models
 from config.db import load_db_config
+from utils.categorize import RuleMatcher, matcher_cache
+from utils.merchants import canonicalize_merchant, merchant_ids
+from utils.merchant_index import MerchantPrefixIndex, merchant_indexes, record_merchant_change
+from utils.search import SearchKey, encode_cursor, search_statement
+from utils.transfers import DEFAULT_WINDOW_DAYS, TransferCandidate, pair_transfers
+from utils.recurrence import expand_rules, rule_occurrences
+from utils.forecast import DEFAULT_LOOKBACK_DAYS, forecast_cache, project_balance
+from utils.amount_prediction import (
+    DEFAULT_PREDICTION_MONTHS,
+    PREDICTION_HORIZON_MONTHS,
+    amount_for,
+    history_matrix,
+    month_index,
+    predict_amounts,
+    prediction_cache,
+    prediction_table,
+)
+from utils.bill_matching import DUE_WINDOW_DAYS, OpenBill, PaymentCandidate, match_bills
+from utils.receipt_matching import DATE_WINDOW_DAYS as RECEIPT_WINDOW_DAYS, ExpenseCandidate, ReceiptCandidate, match_receipts
+from utils.subscriptions import HISTORY_DAYS, mine_recurring
+from utils.ocr_queue import MAX_BATCH, OCR_ACK_TIMEOUT, OCR_MAX_ATTEMPTS, OcrQueue, retry_delay
+from utils.ocr_archive import CODEC as OCR_ARCHIVE_CODEC, compress_blocks, decompress_blocks
+
+
+# Expands active recurring rules into bill rows for a batch of users in one
+# statement. MONTHLY rules clamp day_of_month to the month length and use
+# 'YYYY-MM' as period_month; WEEKLY rules step 7 days from start_date and use
+# the due date. Bill ids are derived from (rule, period) so reruns collide.
+_MATERIALIZE_BILLS_SQL = text("""
+INSERT INTO bills (
+    id, user_id, rule_id, name, due_date, amount_cents, currency, category_id,
+    status, period_month, created_at, updated_at
+)
+SELECT
+    'bill_' || left(md5(o.rule_id || ':' || o.period), 16),
+    o.user_id, o.rule_id, o.name, o.due_date, o.amount_cents, o.currency, o.category_id,
+    'PROJECTED', o.period, NOW(), NOW()
+FROM (
+    SELECT
+        r.id AS rule_id, r.user_id, r.name, r.amount_cents, r.currency, r.category_id,
+        r.start_date, r.end_date,
+        m.month_start + (
+            LEAST(
+                COALESCE(r.day_of_month, EXTRACT(DAY FROM r.start_date)::int),
+                EXTRACT(DAY FROM m.month_start + INTERVAL '1 month - 1 day')::int
+            ) - 1
+        ) AS due_date,
+        to_char(m.month_start, 'YYYY-MM') AS period
+    FROM recurring_rules r
+    CROSS JOIN LATERAL (
+        SELECT gs::date AS month_start
+        FROM generate_series(
+            date_trunc('month', GREATEST(r.start_date, :from_date))::date,
+            date_trunc('month', LEAST(COALESCE(r.end_date, :through_date), :through_date))::date,
+            INTERVAL '1 month'
+        ) AS gs
+    ) m
+    WHERE r.user_id = ANY(:user_ids) AND r.cadence = 'MONTHLY' AND NOT r.is_paused
+    UNION ALL
+    SELECT
+        r.id, r.user_id, r.name, r.amount_cents, r.currency, r.category_id,
+        r.start_date, r.end_date,
+        w.due_date,
+        to_char(w.due_date, 'YYYY-MM-DD')
+    FROM recurring_rules r
+    CROSS JOIN LATERAL (
+        SELECT gs::date AS due_date
+        FROM generate_series(
+            r.start_date + 7 * GREATEST(0, CEIL((:from_date - r.start_date) / 7.0))::int,
+            LEAST(COALESCE(r.end_date, :through_date), :through_date),
+            INTERVAL '7 days'
+        ) AS gs
+    ) w
+    WHERE r.user_id = ANY(:user_ids) AND r.cadence = 'WEEKLY' AND NOT r.is_paused
+) o
+WHERE o.due_date >= GREATEST(o.start_date, :from_date)
+  AND o.due_date <= LEAST(COALESCE(o.end_date, :through_date), :through_date)
+ON CONFLICT (rule_id, period_month) DO NOTHING
+""")
+
+
+# Bill sweep: PROJECTED bills become DUE this many days before the due date.
+BILL_DUE_AHEAD_DAYS = 7
+SWEEP_LOCK_TIMEOUT_MS = 2000
+# Forecast: unpaid bills past their due date count only while DUE/OVERDUE and
+# due within this many days; older ones (or never-swept PROJECTED) are stale.
+FORECAST_OVERDUE_DAYS = 60
+
+# OCR cache eviction defaults: entries unused this long go first, then the
+# least recently used ones until the table fits the byte budget.
+OCR_CACHE_MAX_AGE_DAYS = 180
+OCR_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+# Raw OCR blocks of receipts OCR'd longer ago than this move to receipt_ocr_archive.
+OCR_ARCHIVE_AFTER_DAYS = 90
 
 
 def _uid(prefix: str) -> str:
     return f"{prefix}_{uuid.uuid4().hex[:8]}"
 
 
+def _invalidate_projections(user_id: str) -> None:
+    """Drop cached forecasts and rule amount predictions after a write that moves their inputs."""
+    forecast_cache.invalidate(user_id)
+    prediction_cache.invalidate(user_id)
+
+
 def _user_dict(u: models.User) -> Dict[str, Any]:
     return {
         "PK": f"USER#{u.id}",
@@ -94,6 +198,7 @@ def _txn_dict(t: models.Transaction) -> Dict[str, Any]:
         "txnId": t.id,
         "date": t.txn_date.isoformat(),
         "merchant": t.merchant,
+        "merchantId": t.merchant_id,
         "description": t.description or "",
         "amount": t.amount_cents,
         "currency": t.currency,
@@ -103,31 +208,85 @@ def _txn_dict(t: models.Transaction) -> Dict[str, Any]:
         "accountId": t.account_id,
         "receiptId": t.receipt_id,
         "splits": t.splits or [],
+        "entryType": t.entry_type,
         "entityType": "Transaction",
     }
 
 
-def _receipt_dict(r: models.Receipt) -> Dict[str, Any]:
+# Deferred receipt columns (models.Receipt, group "ocr_payload") by API field.
+RECEIPT_OCR_PAYLOAD_FIELDS = {
+    "ocrRawText": "ocr_raw_text",
+    "ocrRawBlocks": "ocr_raw_blocks",
+    "parsedReceipt": "parsed_receipt",
+}
+
+
+def _receipt_values(user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for a new receipt from an API-shaped payload."""
     return {
+        "id": payload.get("receiptId") or _uid("rcpt"),
+        "user_id": user_id,
+        "merchant": payload.get("merchant", ""),
+        "receipt_date": date.fromisoformat(payload.get("date") or date.today().isoformat()),
+        "total_cents": payload.get("total", 0),
+        "status": payload.get("status", "uploading"),
+        "image_url": payload.get("imageUrl"),
+        "thumbnail_url": payload.get("thumbnailUrl"),
+        "line_items": payload.get("lineItems", []),
+        "transaction_id": payload.get("transactionId"),
+        "ocr_provider": payload.get("ocrProvider"),
+        "ocr_confidence": payload.get("ocrConfidence"),
+        "ocr_raw_text": payload.get("ocrRawText"),
+        "ocr_raw_blocks": payload.get("ocrRawBlocks"),
+        "ocr_error": payload.get("ocrError"),
+        "parsed_receipt": payload.get("parsedReceipt"),
+        "needs_review": payload.get("needsReview", False),
+        "ocr_dispatch": payload.get("ocrDispatch"),
+        "content_sha256": payload.get("contentSha256"),
+    }
+
+
+def _receipt_summary_dict(r: models.Receipt) -> Dict[str, Any]:
+    """The receipts list projection; only reads the columns `list_receipts` loads."""
+    return {
+        "receiptId": r.id,
+        "merchant": r.merchant,
+        "date": r.receipt_date.isoformat(),
+        "total": r.total_cents,
+        "status": r.status,
+        "thumbnailUrl": r.thumbnail_url,
+        "needsReview": r.needs_review,
+    }
+
+
+def _receipt_dict(r: models.Receipt, payload: Iterable[str] = tuple(RECEIPT_OCR_PAYLOAD_FIELDS)) -> Dict[str, Any]:
+    """Full receipt; `payload` limits which deferred OCR payload fields are read (and so loaded)."""
+    out = {
         "receiptId": r.id,
         "merchant": r.merchant,
         "date": r.receipt_date.isoformat(),
         "total": r.total_cents,
         "status": r.status,
         "imageUrl": r.image_url,
+        "thumbnailUrl": r.thumbnail_url,
         "lineItems": r.line_items or [],
         "transactionId": r.transaction_id,
         "ocrProvider": r.ocr_provider,
         "ocrConfidence": float(r.ocr_confidence) if r.ocr_confidence is not None else None,
-        "ocrRawText": r.ocr_raw_text,
-        "ocrRawBlocks": r.ocr_raw_blocks,
         "ocrError": r.ocr_error,
-        "parsedReceipt": r.parsed_receipt,
         "needsReview": r.needs_review,
+        "ocrDispatch": r.ocr_dispatch,
+        "ocrAttempts": r.ocr_attempts,
         "createdAt": r.created_at.isoformat() if r.created_at else None,
         "updatedAt": r.updated_at.isoformat() if r.updated_at else None,
         "entityType": "Receipt",
     }
+    for field in payload:
+        if field == "ocrRawBlocks" and r.ocr_archived_at is not None:
+            out[field] = decompress_blocks(r.ocr_archive.payload)
+        else:
+            out[field] = getattr(r, RECEIPT_OCR_PAYLOAD_FIELDS[field])
+    return out
 
 
 def _recurring_dict(r: models.RecurringRule) -> Dict[str, Any]:
@@ -143,12 +302,37 @@ def _recurring_dict(r: models.RecurringRule) -> Dict[str, Any]:
         "endDate": r.end_date.isoformat() if r.end_date else None,
         "autopostMode": r.autopost_mode,
         "isPaused": r.is_paused,
+        "amountMode": r.amount_mode,
+        "predictionMethod": r.prediction_method,
+        "predictionMonths": r.prediction_months,
         "createdAt": r.created_at.isoformat() if r.created_at else None,
         "updatedAt": r.updated_at.isoformat() if r.updated_at else None,
         "entityType": "RecurringRule",
     }
 
 
+def _suggestion_dict(s: models.RecurringSuggestion, merchant: str) -> Dict[str, Any]:
+    if s.cadence == "WEEKLY":
+        start = s.last_date + timedelta(days=7)
+    else:
+        after = s.last_date + timedelta(days=1)
+        start = rule_occurrences(
+            {"cadence": s.cadence, "dayOfMonth": s.day_of_month, "startDate": after}, after, after + timedelta(days=62)
+        )[0]
+    return {
+        "merchantId": s.merchant_id,
+        "name": merchant,
+        "amount": s.amount_cents,
+        "cadence": s.cadence,
+        "dayOfMonth": s.day_of_month,
+        "startDate": start.isoformat(),
+        "occurrences": s.occurrences,
+        "intervalDays": float(s.interval_days),
+        "lastDate": s.last_date.isoformat(),
+        "confidence": float(s.confidence),
+    }
+
+
 def _bill_dict(b: models.Bill) -> Dict[str, Any]:
     return {
         "billId": b.id,
@@ -166,6 +350,120 @@ def _bill_dict(b: models.Bill) -> Dict[str, Any]:
     }
 
 
+def _categorization_rule_dict(r: models.CategorizationRule) -> Dict[str, Any]:
+    return {
+        "ruleId": r.id,
+        "pattern": r.pattern,
+        "field": r.field,
+        "categoryId": r.category_id,
+        "notes": r.notes,
+        "priority": r.priority,
+        "isActive": r.is_active,
+        "createdAt": r.created_at.isoformat() if r.created_at else None,
+        "updatedAt": r.updated_at.isoformat() if r.updated_at else None,
+        "entityType": "CategorizationRule",
+    }
+
+
+_RECEIPT_UPDATE_FIELDS = (
+    ("merchant", "merchant"),
+    ("status", "status"),
+    ("imageUrl", "image_url"),
+    ("lineItems", "line_items"),
+    ("transactionId", "transaction_id"),
+    ("total", "total_cents"),
+    ("ocrProvider", "ocr_provider"),
+    ("ocrConfidence", "ocr_confidence"),
+    ("ocrRawText", "ocr_raw_text"),
+    ("ocrRawBlocks", "ocr_raw_blocks"),
+    ("ocrError", "ocr_error"),
+    ("parsedReceipt", "parsed_receipt"),
+    ("needsReview", "needs_review"),
+    ("contentSha256", "content_sha256"),
+)
+
+
+def _apply_receipt_updates(r: models.Receipt, updates: Dict[str, Any]) -> None:
+    if "ocrRawBlocks" in updates and r.ocr_archived_at is not None:
+        # New blocks replace the archived ones.
+        r.ocr_archive, r.ocr_archived_at = None, None
+    for key, field in _RECEIPT_UPDATE_FIELDS:
+        if key in updates:
+            setattr(r, field, updates[key])
+    if "date" in updates:
+        r.receipt_date = date.fromisoformat(updates["date"])
+
+
+def _apply_ocr_ack(r: models.Receipt, succeeded: bool, now: datetime) -> None:
+    """Acked on success, retried with backoff on failure, failed once attempts run out."""
+    if succeeded or r.ocr_dispatch is None:
+        r.ocr_dispatch, r.ocr_acked_at, r.ocr_next_attempt_at = "acked", now, None
+    elif r.ocr_attempts < OCR_MAX_ATTEMPTS:
+        r.ocr_dispatch, r.ocr_next_attempt_at = "pending", now + retry_delay(r.ocr_attempts)
+    else:
+        r.ocr_dispatch, r.ocr_next_attempt_at = "failed", None
+
+
+# Receipt fields a re-normalization may rewrite (jobs/renormalize_receipts.py).
+_RENORMALIZED_FIELDS = (
+    ("parsedReceipt", "parsed_receipt"),
+    ("merchant", "merchant"),
+    ("date", "receipt_date"),
+    ("total", "total_cents"),
+    ("lineItems", "line_items"),
+    ("needsReview", "needs_review"),
+)
+
+
+def _ocr_receipts_filter(stmt: Any, after_id: Optional[str], user_id: Optional[str]) -> Any:
+    R = models.Receipt
+    stmt = stmt.where(R.ocr_raw_text.is_not(None))
+    if after_id is not None:
+        stmt = stmt.where(R.id > after_id)
+    if user_id is not None:
+        stmt = stmt.where(R.user_id == user_id)
+    return stmt
+
+
+def _ocr_message(row: Any) -> Dict[str, Any]:
+    """OCR worker job payload; `content_sha256` only when the upload path could hash the image."""
+    message = {"user_id": row.user_id, "receipt_id": row.id, "image_url": row.image_url}
+    if row.content_sha256:
+        message["content_sha256"] = row.content_sha256
+    return message
+
+
+def _ocr_cache_row(res: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    raw_blocks = res.get("ocrRawBlocks") or []
+    return {
+        "content_sha256": res["contentSha256"],
+        "provider": res.get("ocrProvider") or "unknown",
+        "raw_text": res["ocrRawText"],
+        "raw_blocks": raw_blocks,
+        "confidence": res.get("ocrConfidence"),
+        "size_bytes": len(res["ocrRawText"].encode()) + len(json.dumps(raw_blocks)),
+        "hits": 0,
+        "created_at": now,
+        "last_used_at": now,
+    }
+
+
+# Merchant ids interned in a session's open transaction; cached process-wide on commit.
+_PENDING_MERCHANT_IDS = "pending_merchant_ids"
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_interned_merchants(session: Session) -> None:
+    pending = session.info.pop(_PENDING_MERCHANT_IDS, None)
+    if pending:
+        merchant_ids.update(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_interned_merchants(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_MERCHANT_IDS, None)
+
+
 class DB:
     """SQLAlchemy-backed DB facade."""
 
@@ -229,6 +527,12 @@ class DB:
         stmt = select(models.Category).where(models.Category.user_id == user_id)
         return [_category_dict(c) for c in self.session.scalars(stmt).all()]
 
+    def get_category(self, user_id: str, category_id: str) -> Optional[Dict[str, Any]]:
+        cat = self.session.get(models.Category, category_id)
+        if not cat or cat.user_id != user_id:
+            return None
+        return _category_dict(cat)
+
     def create_category(self, user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         cat_id = payload.get("categoryId") or _uid("cat")
         cat = models.Category(
@@ -625,6 +929,8 @@ class DB:
             ("budgets", delete(models.Budget).where(models.Budget.user_id == user_id)),
             ("bills", delete(models.Bill).where(models.Bill.user_id == user_id)),
             ("recurring_rules", delete(models.RecurringRule).where(models.RecurringRule.user_id == user_id)),
+            ("recurring_suggestions", delete(models.RecurringSuggestion).where(models.RecurringSuggestion.user_id == user_id)),
+            ("categorization_rules", delete(models.CategorizationRule).where(models.CategorizationRule.user_id == user_id)),
             ("receipts", delete(models.Receipt).where(models.Receipt.user_id == user_id)),
             ("transactions", delete(models.Transaction).where(models.Transaction.user_id == user_id)),
             ("investment_txs", delete(models.InvestmentTx).where(models.InvestmentTx.user_id == user_id)),
@@ -637,8 +943,105 @@ class DB:
             result = self.session.execute(stmt)
             counts[key] = int(result.rowcount or 0)
         self.session.commit()
+        matcher_cache.invalidate(user_id)
+        merchant_indexes.invalidate(user_id)
+        _invalidate_projections(user_id)
         return counts
 
+    # ---------- Merchants ----------
+    def intern_merchants(self, raw_names: List[str]) -> Dict[str, Optional[int]]:
+        """Map raw merchant descriptors to interned `merchants.id` values.
+
+        Unknown canonical names are inserted with ON CONFLICT DO NOTHING inside
+        the caller's transaction; the caller commits. New ids only reach the
+        process-wide cache once that commit succeeds (see `_publish_interned_merchants`),
+        so a cached id always exists.
+        """
+        canonical = {raw: canonicalize_merchant(raw) for raw in raw_names}
+        pending: Dict[str, int] = self.session.info.setdefault(_PENDING_MERCHANT_IDS, {})
+
+        def lookup(name: str) -> Optional[int]:
+            return pending.get(name) or merchant_ids.get(name)
+
+        missing = sorted({c for c in canonical.values() if c and lookup(c) is None})
+        if missing:
+            self.session.execute(
+                pg_insert(models.Merchant)
+                .values([{"name": name} for name in missing])
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            rows = self.session.execute(
+                select(models.Merchant.name, models.Merchant.id).where(models.Merchant.name.in_(missing))
+            ).all()
+            pending.update({row.name: row.id for row in rows})
+        return {raw: (lookup(c) if c else None) for raw, c in canonical.items()}
+
+    def backfill_merchant_ids(self, batch_size: int = 1000) -> int:
+        """Assign merchant_id to every transaction that lacks one, across all users."""
+        T = models.Transaction
+        updated = 0
+        last_id: Optional[str] = None
+        while True:
+            stmt = select(T.id, T.merchant).where(T.merchant_id.is_(None)).order_by(T.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(T.id > last_id)
+            rows = self.session.execute(stmt).all()
+            if not rows:
+                return updated
+            last_id = rows[-1].id
+            ids = self.intern_merchants([row.merchant for row in rows])
+            changes = [{"id": row.id, "merchant_id": ids[row.merchant]} for row in rows if ids[row.merchant]]
+            if changes:
+                self.session.execute(update(T), changes)
+                self.session.commit()
+                updated += len(changes)
+
+    def top_merchants(
+        self,
+        user_id: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """Top-N merchants by spend: an integer group-by, names joined afterwards."""
+        T = models.Transaction
+        spend = func.sum(-T.amount_cents).label("spend")
+        agg = (
+            select(T.merchant_id, spend, func.count().label("txn_count"))
+            .where(T.user_id == user_id, T.amount_cents < 0, T.merchant_id.is_not(None))
+        )
+        if date_from:
+            agg = agg.where(T.txn_date >= date_from)
+        if date_to:
+            agg = agg.where(T.txn_date <= date_to)
+        agg = agg.group_by(T.merchant_id).order_by(spend.desc(), T.merchant_id).limit(limit).subquery()
+        stmt = (
+            select(agg.c.merchant_id, models.Merchant.name, agg.c.spend, agg.c.txn_count)
+            .join(models.Merchant, models.Merchant.id == agg.c.merchant_id)
+            .order_by(agg.c.spend.desc(), agg.c.merchant_id)
+        )
+        return [
+            {
+                "merchantId": row.merchant_id,
+                "name": row.name,
+                "spend": int(row.spend or 0),
+                "count": int(row.txn_count),
+            }
+            for row in self.session.execute(stmt).all()
+        ]
+
+    def merchant_suggestions(self, user_id: str, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Autocomplete the user's own merchants by prefix, most used first."""
+        index = merchant_indexes.get(user_id)
+        if index is None:
+            T = models.Transaction
+            rows = self.session.execute(
+                select(T.merchant, func.count()).where(T.user_id == user_id).group_by(T.merchant)
+            ).all()
+            index = MerchantPrefixIndex((row[0], row[1]) for row in rows)
+            merchant_indexes.put(user_id, index)
+        return index.suggest(prefix, limit)
+
     # ---------- Transactions ----------
     def list_transactions(
         self,
@@ -671,11 +1074,13 @@ class DB:
 
     def create_transaction(self, user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         txn_id = payload.get("txnId") or _uid("txn")
+        merchant_id = self.intern_merchants([payload["merchant"]])[payload["merchant"]]
         t = models.Transaction(
             id=txn_id,
             user_id=user_id,
             txn_date=date.fromisoformat(payload["date"]),
             merchant=payload["merchant"],
+            merchant_id=merchant_id,
             description=payload.get("description", ""),
             amount_cents=payload["amount"],
             currency=payload.get("currency", "CLP"),
@@ -689,20 +1094,26 @@ class DB:
         self.session.add(t)
         self.session.commit()
         self.session.refresh(t)
+        record_merchant_change(user_id, None, t.merchant)
+        _invalidate_projections(user_id)
         return _txn_dict(t)
 
     def delete_transaction(self, user_id: str, txn_id: str) -> bool:
         t = self.session.get(models.Transaction, txn_id)
         if not t or t.user_id != user_id:
             return False
+        merchant = t.merchant
         self.session.delete(t)
         self.session.commit()
+        record_merchant_change(user_id, merchant, None)
+        _invalidate_projections(user_id)
         return True
 
     def update_transaction(self, user_id: str, txn_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         t = self.session.get(models.Transaction, txn_id)
         if not t or t.user_id != user_id:
             return None
+        old_merchant = t.merchant
         for key, field in [
             ("merchant", "merchant"),
             ("description", "description"),
@@ -717,69 +1128,325 @@ class DB:
         ]:
             if key in updates:
                 setattr(t, field, updates[key])
+        if "merchant" in updates:
+            t.merchant_id = self.intern_merchants([t.merchant])[t.merchant]
         if "date" in updates:
             t.txn_date = date.fromisoformat(updates["date"])
         self.session.commit()
         self.session.refresh(t)
+        record_merchant_change(user_id, old_merchant, t.merchant)
+        _invalidate_projections(user_id)
         return _txn_dict(t)
 
+    def detect_transfers(
+        self,
+        user_id: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+    ) -> int:
+        """Mark matching debit/credit pairs across the user's accounts as transfers.
+
+        Only unclassified rows (entry_type IS NULL) with an account are
+        considered, so re-running over the same range is a no-op. Returns the
+        number of pairs marked.
+        """
+        T = models.Transaction
+        stmt = select(T.id, T.account_id, T.txn_date, T.amount_cents).where(
+            T.user_id == user_id,
+            T.entry_type.is_(None),
+            T.account_id.is_not(None),
+            T.amount_cents != 0,
+        )
+        if date_from:
+            stmt = stmt.where(T.txn_date >= date_from)
+        if date_to:
+            stmt = stmt.where(T.txn_date <= date_to)
+        candidates = [TransferCandidate(*row) for row in self.session.execute(stmt).all()]
+        pairs = pair_transfers(candidates, window_days)
+        if pairs:
+            changes = [
+                {"id": txn_id, "entry_type": "transfer", "budget_effect": "none"}
+                for pair in pairs
+                for txn_id in pair
+            ]
+            self.session.execute(update(T), changes)
+            self.session.commit()
+            _invalidate_projections(user_id)
+        return len(pairs)
+
+    def transfer_user_ids(self) -> List[str]:
+        """Users with at least one unclassified transaction tied to an account."""
+        T = models.Transaction
+        stmt = (
+            select(T.user_id)
+            .where(T.entry_type.is_(None), T.account_id.is_not(None))
+            .distinct()
+            .order_by(T.user_id)
+        )
+        return list(self.session.scalars(stmt).all())
+
     # ---------- Receipts ----------
     def list_receipts(self, user_id: str) -> List[Dict[str, Any]]:
-        stmt = select(models.Receipt).where(models.Receipt.user_id == user_id)
-        return [_receipt_dict(r) for r in self.session.scalars(stmt).all()]
+        R = models.Receipt
+        stmt = select(R).where(R.user_id == user_id).options(
+            load_only(R.id, R.merchant, R.receipt_date, R.total_cents, R.status, R.thumbnail_url, R.needs_review)
+        )
+        return [_receipt_summary_dict(r) for r in self.session.scalars(stmt).all()]
+
+    def get_receipt(
+        self, user_id: str, receipt_id: str, payload: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Full receipt; `payload` (default: all) names the OCR payload fields to load with it."""
+        R = models.Receipt
+        payload = tuple(RECEIPT_OCR_PAYLOAD_FIELDS if payload is None else payload)
+        options = [undefer(getattr(R, RECEIPT_OCR_PAYLOAD_FIELDS[field])) for field in payload]
+        r = self.session.get(R, receipt_id, options=options)
+        if not r or r.user_id != user_id:
+            return None
+        return _receipt_dict(r, payload)
+
+    def receipt_id_taken(self, receipt_id: str) -> bool:
+        """Whether any user's receipt already has this id."""
+        return bool(self.session.scalar(select(exists().where(models.Receipt.id == receipt_id))))
 
     def create_receipt(self, user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        rcpt_id = payload.get("receiptId") or _uid("rcpt")
-        r = models.Receipt(
-            id=rcpt_id,
-            user_id=user_id,
-            merchant=payload.get("merchant", ""),
-            receipt_date=date.fromisoformat(payload.get("date") or date.today().isoformat()),
-            total_cents=payload.get("total", 0),
-            status=payload.get("status", "uploading"),
-            image_url=payload.get("imageUrl"),
-            line_items=payload.get("lineItems", []),
-            transaction_id=payload.get("transactionId"),
-            ocr_provider=payload.get("ocrProvider"),
-            ocr_confidence=payload.get("ocrConfidence"),
-            ocr_raw_text=payload.get("ocrRawText"),
-            ocr_raw_blocks=payload.get("ocrRawBlocks"),
-            ocr_error=payload.get("ocrError"),
-            parsed_receipt=payload.get("parsedReceipt"),
-            needs_review=payload.get("needsReview", False),
-        )
+        r = models.Receipt(**_receipt_values(user_id, payload))
         self.session.add(r)
         self.session.commit()
         self.session.refresh(r)
         return _receipt_dict(r)
 
+    def create_receipts(self, user_id: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Insert many receipts in one statement (batch upload); returns their ids in order."""
+        if not payloads:
+            return []
+        rows = [_receipt_values(user_id, payload) for payload in payloads]
+        self.session.execute(insert(models.Receipt), rows)
+        self.session.commit()
+        return [row["id"] for row in rows]
+
     def update_receipt(self, user_id: str, receipt_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         r = self.session.get(models.Receipt, receipt_id)
         if not r or r.user_id != user_id:
             return None
-        for key, field in [
-            ("merchant", "merchant"),
-            ("status", "status"),
-            ("imageUrl", "image_url"),
-            ("lineItems", "line_items"),
-            ("transactionId", "transaction_id"),
-            ("total", "total_cents"),
-            ("ocrProvider", "ocr_provider"),
-            ("ocrConfidence", "ocr_confidence"),
-            ("ocrRawText", "ocr_raw_text"),
-            ("ocrRawBlocks", "ocr_raw_blocks"),
-            ("ocrError", "ocr_error"),
-            ("parsedReceipt", "parsed_receipt"),
-            ("needsReview", "needs_review"),
-        ]:
-            if key in updates:
-                setattr(r, field, updates[key])
-        if "date" in updates:
-            r.receipt_date = date.fromisoformat(updates["date"])
+        if "transactionId" in updates:
+            # An explicit unlink also clears the transaction side and keeps matching from relinking.
+            if updates["transactionId"] is None and r.transaction_id is not None:
+                self.session.execute(
+                    update(models.Transaction)
+                    .where(models.Transaction.id == r.transaction_id, models.Transaction.receipt_id == r.id)
+                    .values(receipt_id=None)
+                )
+            r.match_dismissed = updates["transactionId"] is None
+        _apply_receipt_updates(r, updates)
         self.session.commit()
         self.session.refresh(r)
         return _receipt_dict(r)
 
+    def count_ocr_receipts(self, after_id: Optional[str] = None, user_id: Optional[str] = None) -> int:
+        return self.session.scalar(_ocr_receipts_filter(select(func.count()).select_from(models.Receipt), after_id, user_id))
+
+    def iter_ocr_receipts(
+        self,
+        after_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """Receipts with stored OCR output in id order, streamed through a server-side cursor.
+
+        Only `batch_size` rows are buffered at a time; the caller should write
+        through a different session, since committing this one ends the cursor.
+        """
+        R, A = models.Receipt, models.ReceiptOcrArchive
+        stmt = _ocr_receipts_filter(
+            select(
+                R.id, R.merchant, R.receipt_date, R.total_cents, R.line_items, R.needs_review,
+                R.ocr_raw_text, R.ocr_raw_blocks, R.parsed_receipt, A.payload.label("archived_blocks"),
+            ).outerjoin(A, A.receipt_id == R.id),
+            after_id,
+            user_id,
+        ).order_by(R.id)
+        for row in self.session.execute(stmt.execution_options(yield_per=batch_size)):
+            yield {
+                "receiptId": row.id,
+                "merchant": row.merchant,
+                "date": row.receipt_date.isoformat(),
+                "total": row.total_cents,
+                "lineItems": row.line_items,
+                "needsReview": row.needs_review,
+                "ocrRawText": row.ocr_raw_text,
+                "ocrRawBlocks": row.ocr_raw_blocks if row.archived_blocks is None else decompress_blocks(row.archived_blocks),
+                "parsedReceipt": row.parsed_receipt,
+            }
+
+    def apply_renormalized(self, updates: List[Dict[str, Any]]) -> None:
+        """Bulk-write re-normalized receipts.
+
+        Each update has `receiptId`, every field in `_RENORMALIZED_FIELDS`, and
+        `previous`: the values those fields had when they were read. A column is
+        only set while it still holds its previous value, checked by the UPDATE
+        itself, so an edit saved after the read is kept.
+        """
+        if not updates:
+            return
+        table = models.Receipt.__table__
+        values = {}
+        for _, column in _RENORMALIZED_FIELDS:
+            col = table.c[column]
+            values[column] = case(
+                (col.is_not_distinct_from(bindparam(f"old_{column}", type_=col.type)),
+                 bindparam(f"new_{column}", type_=col.type)),
+                else_=col,
+            )
+        params = []
+        for u in updates:
+            row = {"receipt_id": u["receiptId"]}
+            for key, column in _RENORMALIZED_FIELDS:
+                new, old = u[key], u["previous"][key]
+                if column == "receipt_date":
+                    new, old = date.fromisoformat(new), date.fromisoformat(old)
+                row[f"new_{column}"], row[f"old_{column}"] = new, old
+            params.append(row)
+        self.session.execute(update(table).where(table.c.id == bindparam("receipt_id")).values(values), params)
+        self.session.commit()
+
+    def archive_ocr_payloads(
+        self, older_than: timedelta, batch_size: int = 500, now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Move raw OCR blocks of receipts OCR'd before `now - older_than` to `receipt_ocr_archive`.
+
+        Blocks are zstd-compressed and the hot column is cleared, one commit per
+        `batch_size` receipts. `ocr_raw_text` stays: it feeds the receipts
+        search vector. Returns counters and sizes: `hotBytes` is what the moved
+        values took in `receipts` (`pg_column_size`, after TOAST compression),
+        `archiveBytes` what they take now. The table shrinks on disk once
+        autovacuum reuses the space.
+        """
+        R, A = models.Receipt, models.ReceiptOcrArchive
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - older_than
+        metrics = {"archived": 0, "batches": 0, "rawBytes": 0, "hotBytes": 0, "archiveBytes": 0}
+        while True:
+            rows = self.session.execute(
+                select(R.id, R.ocr_raw_blocks, func.pg_column_size(R.ocr_raw_blocks).label("hot_bytes"))
+                .where(
+                    R.ocr_raw_blocks.is_not(None),
+                    R.ocr_archived_at.is_(None),
+                    func.coalesce(R.ocr_acked_at, R.created_at) < cutoff,
+                )
+                .order_by(R.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                break
+            archive = []
+            for row in rows:
+                payload, raw_bytes = compress_blocks(row.ocr_raw_blocks)
+                archive.append({
+                    "receipt_id": row.id, "codec": OCR_ARCHIVE_CODEC, "payload": payload,
+                    "raw_bytes": raw_bytes, "archived_at": now,
+                })
+                metrics["rawBytes"] += raw_bytes
+                metrics["hotBytes"] += row.hot_bytes
+                metrics["archiveBytes"] += len(payload)
+            stmt = pg_insert(A).values(archive)
+            self.session.execute(stmt.on_conflict_do_update(
+                index_elements=[A.receipt_id],
+                set_={"codec": stmt.excluded.codec, "payload": stmt.excluded.payload,
+                      "raw_bytes": stmt.excluded.raw_bytes, "archived_at": stmt.excluded.archived_at},
+            ))
+            self.session.execute(
+                update(R)
+                .where(R.id.in_([row.id for row in rows]))
+                .values(ocr_raw_blocks=null(), ocr_archived_at=now, updated_at=R.updated_at)
+            )
+            self.session.commit()
+            metrics["archived"] += len(rows)
+            metrics["batches"] += 1
+        hot = metrics["hotBytes"]
+        metrics["reduction"] = round(1 - metrics["archiveBytes"] / hot, 4) if hot else 0.0
+        return metrics
+
+    def match_receipt_transactions(
+        self,
+        user_ids: Optional[List[str]] = None,
+        receipt_ids: Optional[List[str]] = None,
+        txn_ids: Optional[List[str]] = None,
+        window_days: int = RECEIPT_WINDOW_DAYS,
+    ) -> int:
+        """Link unlinked receipts to the expenses that paid them (utils/receipt_matching.py).
+
+        Receipts the user unlinked (`match_dismissed`) are skipped. Scoped by any of `user_ids`, `receipt_ids` (just OCR'd) and `txn_ids`
+        (just imported). Candidate pairs come from one join that probes
+        transactions_user_amount_date_idx per receipt, and links are written
+        with one bulk UPDATE per side (`receipts.transaction_id` and
+        `transactions.receipt_id`). Returns the number of receipts linked.
+        """
+        if any(ids is not None and not ids for ids in (user_ids, receipt_ids, txn_ids)):
+            return 0
+        R, T = models.Receipt, models.Transaction
+        Linked = aliased(models.Receipt)
+        stmt = (
+            select(
+                R.id, R.user_id, R.merchant, R.receipt_date, R.total_cents,
+                T.id.label("txn_id"), T.merchant.label("txn_merchant"), T.txn_date, T.amount_cents,
+            )
+            .join(T, and_(
+                T.user_id == R.user_id,
+                T.amount_cents == -R.total_cents,
+                T.txn_date.between(R.receipt_date - window_days, R.receipt_date + window_days),
+            ))
+            .where(
+                R.transaction_id.is_(None),
+                R.match_dismissed.is_(False),
+                R.total_cents > 0,
+                T.receipt_id.is_(None),
+                T.entry_type.is_distinct_from("transfer"),
+                ~exists().where(Linked.transaction_id == T.id),
+            )
+        )
+        if user_ids is not None:
+            stmt = stmt.where(R.user_id.in_(user_ids))
+        if receipt_ids is not None:
+            stmt = stmt.where(R.id.in_(receipt_ids))
+        if txn_ids is not None:
+            stmt = stmt.where(T.id.in_(txn_ids))
+        receipts: Dict[str, ReceiptCandidate] = {}
+        expenses: Dict[str, ExpenseCandidate] = {}
+        for row in self.session.execute(stmt).all():
+            receipts[row.id] = ReceiptCandidate(row.id, row.user_id, row.merchant, row.receipt_date, row.total_cents)
+            expenses[row.txn_id] = ExpenseCandidate(row.txn_id, row.user_id, row.txn_merchant or "", row.txn_date, row.amount_cents)
+        pairs = match_receipts(list(receipts.values()), list(expenses.values()), window_days)
+        if pairs:
+            self.session.execute(update(R), [{"id": rid, "transaction_id": tid} for rid, tid in pairs])
+            self.session.execute(update(T), [{"id": tid, "receipt_id": rid} for rid, tid in pairs])
+            self.session.commit()
+        return len(pairs)
+
+    def match_receipt_backlog(self, batch_size: int = 500) -> Dict[str, int]:
+        """`match_receipt_transactions` over every user with unlinked receipts, `batch_size` users per query."""
+        R = models.Receipt
+        metrics = {"linked": 0, "batches": 0}
+        last: Optional[str] = None
+        while True:
+            stmt = (
+                select(R.user_id)
+                .where(R.transaction_id.is_(None), R.match_dismissed.is_(False), R.total_cents > 0)
+                .distinct()
+                .order_by(R.user_id)
+                .limit(batch_size)
+            )
+            if last is not None:
+                stmt = stmt.where(R.user_id > last)
+            batch = list(self.session.scalars(stmt).all())
+            if not batch:
+                return metrics
+            last = batch[-1]
+            metrics["linked"] += self.match_receipt_transactions(user_ids=batch)
+            metrics["batches"] += 1
+
     def delete_receipt(self, user_id: str, receipt_id: str) -> bool:
         r = self.session.get(models.Receipt, receipt_id)
         if not r or r.user_id != user_id:
@@ -788,10 +1455,180 @@ class DB:
         self.session.commit()
         return True
 
+    def dispatch_ocr(
+        self,
+        queue: OcrQueue,
+        receipt_ids: Optional[List[str]] = None,
+        limit: int = 500,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """Send due receipts to the OCR queue in handler-shaped batches.
+
+        Due means pending, or enqueued without an ack past OCR_ACK_TIMEOUT,
+        with the retry deadline reached. Rows are claimed FOR UPDATE SKIP
+        LOCKED so concurrent dispatchers split the work. Receipts that already
+        used OCR_MAX_ATTEMPTS are marked failed for manual review instead.
+        """
+        R = models.Receipt
+        now = now or datetime.now(timezone.utc)
+        stmt = (
+            select(R.id, R.user_id, R.image_url, R.ocr_attempts, R.content_sha256)
+            .where(
+                R.ocr_dispatch.in_(("pending", "enqueued")),
+                or_(R.ocr_next_attempt_at.is_(None), R.ocr_next_attempt_at <= now),
+            )
+            .order_by(R.ocr_next_attempt_at.nulls_first(), R.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if receipt_ids is not None:
+            stmt = stmt.where(R.id.in_(receipt_ids))
+        rows = self.session.execute(stmt).all()
+
+        exhausted = [row for row in rows if row.ocr_attempts >= OCR_MAX_ATTEMPTS]
+        ready = [row for row in rows if row.ocr_attempts < OCR_MAX_ATTEMPTS]
+        enqueued: List[Dict[str, Any]] = []
+        send_failures: List[Dict[str, Any]] = []
+        for start in range(0, len(ready), MAX_BATCH):
+            batch = ready[start:start + MAX_BATCH]
+            failed = set(queue.send_batch([_ocr_message(row) for row in batch]))
+            for row in batch:
+                attempts = row.ocr_attempts + 1
+                if row.id in failed:
+                    send_failures.append({
+                        "id": row.id, "ocr_attempts": attempts, "ocr_next_attempt_at": now + retry_delay(attempts),
+                    })
+                else:
+                    enqueued.append({
+                        "id": row.id, "ocr_dispatch": "enqueued", "ocr_attempts": attempts,
+                        "ocr_enqueued_at": now, "ocr_next_attempt_at": now + OCR_ACK_TIMEOUT,
+                    })
+        gave_up = [
+            {
+                "id": row.id, "ocr_dispatch": "failed", "ocr_next_attempt_at": None, "status": "ocr_failed",
+                "ocr_error": f"OCR did not complete after {row.ocr_attempts} attempts", "needs_review": True,
+            }
+            for row in exhausted
+        ]
+        for changes in (enqueued, send_failures, gave_up):
+            if changes:
+                self.session.execute(update(R), changes)
+        self.session.commit()
+        return {"enqueued": len(enqueued), "sendFailures": len(send_failures), "exhausted": len(gave_up)}
+
+    def ack_ocr(self, user_id: str, receipt_id: str, succeeded: bool, now: Optional[datetime] = None) -> None:
+        """Record the OCR callback: acked on success, retried with backoff on failure."""
+        r = self.session.get(models.Receipt, receipt_id)
+        if not r or r.user_id != user_id:
+            return
+        _apply_ocr_ack(r, succeeded, now or datetime.now(timezone.utc))
+        self.session.commit()
+
+    def apply_ocr_results(self, results: List[Dict[str, Any]], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Apply a batch of OCR callbacks (update + ack) in one transaction.
+
+        Each result is an `ocr-callback` payload (`userId`, `receiptId`,
+        `status`, fields). Returns `{"receiptId", "updated"}` per result in
+        order; `updated` is False when the receipt does not exist (deleted
+        since upload), which the worker treats as done. Successful results
+        carrying `contentSha256` that were not served from the OCR cache are
+        added to it.
+        """
+        now = now or datetime.now(timezone.utc)
+        ids = {res["receiptId"] for res in results}
+        receipts = {
+            r.id: r for r in self.session.scalars(select(models.Receipt).where(models.Receipt.id.in_(ids))).all()
+        } if ids else {}
+        out: List[Dict[str, Any]] = []
+        for res in results:
+            r = receipts.get(res["receiptId"])
+            if r is None or r.user_id != res["userId"]:
+                out.append({"receiptId": res["receiptId"], "updated": False})
+                continue
+            updates = {k: v for k, v in res.items() if k not in ("userId", "receiptId")}
+            _apply_receipt_updates(r, updates)
+            _apply_ocr_ack(r, updates.get("status") == "ocr_done", now)
+            out.append({"receiptId": res["receiptId"], "updated": True})
+        entries = {
+            res["contentSha256"]: _ocr_cache_row(res, now)
+            for res in results
+            if res.get("status") == "ocr_done" and res.get("contentSha256") and res.get("ocrRawText")
+            and not res.get("ocrCacheHit")
+        }
+        if entries:
+            self.session.execute(
+                pg_insert(models.OcrCacheEntry).values(list(entries.values())).on_conflict_do_nothing()
+            )
+        self.session.commit()
+        return out
+
+    # ---------- OCR cache ----------
+    def lookup_ocr_cache(self, hashes: List[str], now: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """Cached provider output by content hash; each hit bumps `hits` and `last_used_at`."""
+        if not hashes:
+            return {}
+        C = models.OcrCacheEntry
+        rows = self.session.execute(
+            update(C)
+            .where(C.content_sha256.in_(set(hashes)))
+            .values(hits=C.hits + 1, last_used_at=now or datetime.now(timezone.utc))
+            .returning(C.content_sha256, C.provider, C.raw_text, C.raw_blocks, C.confidence)
+        ).all()
+        self.session.commit()
+        return {
+            row.content_sha256: {
+                "provider": row.provider,
+                "rawText": row.raw_text,
+                "rawBlocks": row.raw_blocks or [],
+                "confidence": float(row.confidence) if row.confidence is not None else None,
+            }
+            for row in rows
+        }
+
+    def evict_ocr_cache(self, max_age: timedelta, max_bytes: int, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Drop entries unused for `max_age`, then least recently used ones past `max_bytes` in total."""
+        C = models.OcrCacheEntry
+        now = now or datetime.now(timezone.utc)
+        by_age = self.session.execute(delete(C).where(C.last_used_at < now - max_age)).rowcount or 0
+        by_size = self.session.execute(text("""
+            DELETE FROM ocr_cache WHERE content_sha256 IN (
+                SELECT content_sha256 FROM (
+                    SELECT content_sha256,
+                           sum(size_bytes) OVER (ORDER BY last_used_at DESC, content_sha256) AS running
+                    FROM ocr_cache
+                ) ranked
+                WHERE running > :max_bytes
+            )
+        """), {"max_bytes": max_bytes}).rowcount or 0
+        entries, total_bytes, hits = self.session.execute(
+            select(func.count(), func.coalesce(func.sum(C.size_bytes), 0), func.coalesce(func.sum(C.hits), 0))
+        ).one()
+        self.session.commit()
+        return {
+            "evictedByAge": int(by_age),
+            "evictedBySize": int(by_size),
+            "entries": int(entries),
+            "bytes": int(total_bytes),
+            "hits": int(hits),
+        }
+
     # ---------- Recurring ----------
-    def list_recurring_rules(self, user_id: str) -> List[Dict[str, Any]]:
+    def list_recurring_rules(self, user_id: str, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Rules with `predictedAmount` (this month's amount for PREDICTED rules, else None)."""
         stmt = select(models.RecurringRule).where(models.RecurringRule.user_id == user_id)
-        return [_recurring_dict(r) for r in self.session.scalars(stmt).all()]
+        rules = [_recurring_dict(r) for r in self.session.scalars(stmt).all()]
+        today = today or datetime.now(timezone.utc).date()
+        predicted = self.predicted_rule_amounts(user_id, today) if any(r["amountMode"] == "PREDICTED" for r in rules) else {}
+        month = today.strftime("%Y-%m")
+        for rule in rules:
+            rule["predictedAmount"] = predicted[rule["ruleId"]][month] if rule["ruleId"] in predicted else None
+        return rules
+
+    def get_recurring(self, user_id: str, rule_id: str) -> Optional[Dict[str, Any]]:
+        r = self.session.get(models.RecurringRule, rule_id)
+        if not r or r.user_id != user_id:
+            return None
+        return _recurring_dict(r)
 
     def create_recurring(self, user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         rule_id = payload.get("ruleId") or _uid("rec")
@@ -808,10 +1645,14 @@ class DB:
             end_date=date.fromisoformat(payload["endDate"]) if payload.get("endDate") else None,
             autopost_mode=payload.get("autopostMode"),
             is_paused=payload.get("isPaused", False),
+            amount_mode=payload.get("amountMode") or "FIXED",
+            prediction_method=payload.get("predictionMethod"),
+            prediction_months=payload.get("predictionMonths"),
         )
         self.session.add(r)
         self.session.commit()
         self.session.refresh(r)
+        _invalidate_projections(user_id)
         return _recurring_dict(r)
 
     def update_recurring(self, user_id: str, rule_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -827,6 +1668,9 @@ class DB:
             ("dayOfMonth", "day_of_month"),
             ("autopostMode", "autopost_mode"),
             ("isPaused", "is_paused"),
+            ("amountMode", "amount_mode"),
+            ("predictionMethod", "prediction_method"),
+            ("predictionMonths", "prediction_months"),
         ]:
             if key in updates:
                 setattr(r, field, updates[key])
@@ -836,8 +1680,162 @@ class DB:
             r.end_date = date.fromisoformat(updates["endDate"]) if updates["endDate"] else None
         self.session.commit()
         self.session.refresh(r)
+        _invalidate_projections(user_id)
         return _recurring_dict(r)
 
+    def predicted_rule_amounts(self, user_id: str, today: date) -> Dict[str, Dict[str, int]]:
+        """{rule_id: {'YYYY-MM': amount}} for the user's PREDICTED rules, from today's month on.
+
+        One history query and one NumPy pass cover all of the user's variable
+        rules; the result is cached per user for the current month.
+        """
+        as_of = f"{today.year:04d}-{today.month:02d}"
+        cached = prediction_cache.get(user_id)
+        if cached is not None and as_of in cached:
+            return cached[as_of]
+
+        R, B, T = models.RecurringRule, models.Bill, models.Transaction
+        rules = self.session.execute(
+            select(R.id, R.amount_cents, R.prediction_method, R.prediction_months)
+            .where(R.user_id == user_id, R.amount_mode == "PREDICTED")
+            .order_by(R.id)
+        ).all()
+        table: Dict[str, Dict[str, int]] = {}
+        if rules:
+            lookbacks = [r.prediction_months or DEFAULT_PREDICTION_MONTHS for r in rules]
+            width = max(lookbacks) + 12
+            first = month_index(as_of) - width
+            row_of = {r.id: i for i, r in enumerate(rules)}
+            history = self.session.execute(
+                select(B.rule_id, B.due_date, func.coalesce(T.amount_cents, B.amount_cents))
+                .outerjoin(T, T.id == B.linked_txn_id)
+                .where(
+                    B.rule_id.in_(list(row_of)),
+                    or_(B.status == "PAID", B.linked_txn_id.is_not(None)),
+                    B.due_date >= date(first // 12, first % 12 + 1, 1),
+                    B.due_date < today.replace(day=1),
+                )
+            ).all()
+            monthly = history_matrix(
+                [(row_of[rule_id], due.year * 12 + due.month - 1 - first, amount) for rule_id, due, amount in history],
+                len(rules),
+                width,
+            )
+            amounts = predict_amounts(
+                [r.prediction_method or "MEDIAN" for r in rules],
+                lookbacks,
+                [r.amount_cents for r in rules],
+                monthly,
+            )
+            table = prediction_table([r.id for r in rules], amounts, as_of)
+        prediction_cache.put(user_id, {as_of: table})
+        return table
+
+    # ---------- Recurring suggestions ----------
+    def refresh_recurring_suggestions(
+        self,
+        today: date,
+        user_ids: Optional[List[str]] = None,
+        batch_size: int = 500,
+    ) -> int:
+        """Re-mine recurring-payment candidates from the last HISTORY_DAYS of expenses.
+
+        Users are processed in batches (all users when `user_ids` is None): one
+        history query over transactions_user_merchant_idx, one vectorized mining
+        pass, and a delete + insert of the batch's suggestions per commit. Each
+        user's run time goes to `recurring_suggestion_runs`, found or not.
+        Returns the number of suggestions stored.
+        """
+        T, S, Run = models.Transaction, models.RecurringSuggestion, models.RecurringSuggestionRun
+        stored = 0
+        for batch in self._user_batches(user_ids, batch_size):
+            rows = self.session.execute(
+                select(T.user_id, T.merchant_id, T.txn_date, T.amount_cents).where(
+                    T.user_id.in_(batch),
+                    T.merchant_id.is_not(None),
+                    T.amount_cents < 0,
+                    T.txn_date > today - timedelta(days=HISTORY_DAYS),
+                    T.txn_date <= today,
+                    T.entry_type.is_distinct_from("transfer"),
+                )
+            ).all()
+            suggestions = mine_recurring(*zip(*rows), today=today) if rows else []
+            self.session.execute(delete(S).where(S.user_id.in_(batch)))
+            if suggestions:
+                self.session.execute(pg_insert(S), [
+                    {
+                        "user_id": m["userId"],
+                        "merchant_id": m["merchantId"],
+                        "cadence": m["cadence"],
+                        "day_of_month": m["dayOfMonth"],
+                        "amount_cents": m["amount"],
+                        "occurrences": m["occurrences"],
+                        "interval_days": m["intervalDays"],
+                        "confidence": m["confidence"],
+                        "last_date": m["lastDate"],
+                    }
+                    for m in suggestions
+                ])
+            runs = pg_insert(Run).from_select(
+                ["user_id", "computed_at"],
+                select(models.User.id, func.now()).where(models.User.id.in_(batch)),
+            )
+            self.session.execute(runs.on_conflict_do_update(
+                index_elements=[Run.user_id], set_={"computed_at": runs.excluded.computed_at},
+            ))
+            self.session.commit()
+            stored += len(suggestions)
+        return stored
+
+    def recurring_suggestions(self, user_id: str, today: date, max_age: timedelta = timedelta(hours=24)) -> List[Dict[str, Any]]:
+        """Stored suggestions for the user, re-mined first when never mined or last mined over `max_age` ago.
+
+        Merchants already covered by one of the user's rules (canonical rule
+        name containing, or contained in, the merchant name) are left out.
+        """
+        S, M = models.RecurringSuggestion, models.Merchant
+        stmt = (
+            select(S, M.name)
+            .join(M, M.id == S.merchant_id)
+            .where(S.user_id == user_id)
+            .order_by(S.confidence.desc(), S.merchant_id)
+        )
+        mined_at = self.session.scalar(
+            select(models.RecurringSuggestionRun.computed_at).where(models.RecurringSuggestionRun.user_id == user_id)
+        )
+        if mined_at is None or mined_at < datetime.now(timezone.utc) - max_age:
+            self.refresh_recurring_suggestions(today, [user_id])
+        rows = self.session.execute(stmt).all()
+
+        covered = [
+            canonicalize_merchant(name)
+            for name in self.session.scalars(
+                select(models.RecurringRule.name).where(models.RecurringRule.user_id == user_id)
+            ).all()
+        ]
+        return [
+            _suggestion_dict(suggestion, name)
+            for suggestion, name in rows
+            if not any(rule and (rule in name or name in rule) for rule in covered)
+        ]
+
+    def _user_batches(self, user_ids: Optional[List[str]], batch_size: int):
+        if user_ids is not None:
+            for start in range(0, len(user_ids), batch_size):
+                yield user_ids[start:start + batch_size]
+            return
+        U = models.User
+        last: Optional[str] = None
+        while True:
+            stmt = select(U.id).order_by(U.id).limit(batch_size)
+            if last is not None:
+                stmt = stmt.where(U.id > last)
+            batch = list(self.session.scalars(stmt).all())
+            if not batch:
+                return
+            last = batch[-1]
+            yield batch
+
     # ---------- Bills ----------
     def list_bills(self, user_id: str, date_from: Optional[date], date_to: Optional[date], status: Optional[str]) -> List[Dict[str, Any]]:
         stmt = select(models.Bill).where(models.Bill.user_id == user_id)
@@ -850,6 +1848,125 @@ class DB:
         stmt = stmt.order_by(models.Bill.due_date, models.Bill.id)
         return [_bill_dict(b) for b in self.session.scalars(stmt).all()]
 
+    def materialize_bills(
+        self,
+        through: date,
+        from_date: date,
+        user_ids: Optional[List[str]] = None,
+        batch_size: int = 500,
+    ) -> int:
+        """Create PROJECTED bills for every active rule occurrence in [from_date, through].
+
+        Runs one INSERT ... SELECT per batch of users (all users with rules when
+        `user_ids` is None) and commits per batch. Existing occurrences are left
+        untouched. Returns the number of bills created.
+        """
+        created = 0
+        for batch in self._recurring_user_batches(user_ids, batch_size):
+            result = self.session.execute(
+                _MATERIALIZE_BILLS_SQL,
+                {"user_ids": batch, "from_date": from_date, "through_date": through},
+            )
+            self._apply_predicted_amounts(batch, from_date)
+            self.session.commit()
+            created += int(result.rowcount or 0)
+            for user_id in batch:
+                forecast_cache.invalidate(user_id)
+        return created
+
+    def _apply_predicted_amounts(self, user_ids: List[str], from_date: date) -> None:
+        """Rewrite open future bills of PREDICTED rules with this month's predictions (no commit).
+
+        Bills whose amount the user edited are left as they are.
+        """
+        R, B = models.RecurringRule, models.Bill
+        predicted_users = self.session.scalars(
+            select(R.user_id).where(R.user_id.in_(user_ids), R.amount_mode == "PREDICTED").distinct()
+        ).all()
+        for user_id in predicted_users:
+            table = self.predicted_rule_amounts(user_id, from_date)
+            bills = self.session.execute(
+                select(B.id, B.rule_id, B.due_date, B.amount_cents).where(
+                    B.user_id == user_id,
+                    B.rule_id.in_(list(table)),
+                    B.status == "PROJECTED",
+                    B.linked_txn_id.is_(None),
+                    B.amount_edited.is_(False),
+                    B.due_date >= from_date,
+                )
+            ).all()
+            changes = []
+            for bill in bills:
+                amount = amount_for(table[bill.rule_id], bill.due_date.strftime("%Y-%m"))
+                if amount != bill.amount_cents:
+                    changes.append({"id": bill.id, "amount_cents": amount})
+            if changes:
+                self.session.execute(update(B), changes)
+
+    def _recurring_user_batches(self, user_ids: Optional[List[str]], batch_size: int):
+        if user_ids is not None:
+            for start in range(0, len(user_ids), batch_size):
+                yield user_ids[start:start + batch_size]
+            return
+        R = models.RecurringRule
+        last: Optional[str] = None
+        while True:
+            stmt = select(R.user_id).where(R.is_paused.is_(False)).distinct().order_by(R.user_id).limit(batch_size)
+            if last is not None:
+                stmt = stmt.where(R.user_id > last)
+            batch = list(self.session.scalars(stmt).all())
+            if not batch:
+                return
+            last = batch[-1]
+            yield batch
+
+    def match_bill_payments(self, user_id: str, txn_ids: List[str], window_days: int = DUE_WINDOW_DAYS) -> int:
+        """Link the given transactions to open bills they pay and mark those bills PAID.
+
+        Transfers and transactions already linked to a bill are ignored. Returns
+        the number of bills matched.
+        """
+        if not txn_ids:
+            return 0
+        T, B = models.Transaction, models.Bill
+        linked = select(B.linked_txn_id).where(B.user_id == user_id, B.linked_txn_id.is_not(None))
+        payments = [
+            PaymentCandidate(*row)
+            for row in self.session.execute(
+                select(T.id, T.merchant, T.txn_date, T.amount_cents).where(
+                    T.user_id == user_id,
+                    T.id.in_(txn_ids),
+                    T.entry_type.is_distinct_from("transfer"),
+                    T.id.not_in(linked),
+                )
+            ).all()
+        ]
+        if not payments:
+            return 0
+        window = timedelta(days=window_days)
+        bills = [
+            OpenBill(row.id, row.name or "", row.due_date, row.amount_cents)
+            for row in self.session.execute(
+                select(B.id, B.name, B.due_date, B.amount_cents).where(
+                    B.user_id == user_id,
+                    func.coalesce(B.status, "") != "PAID",
+                    B.linked_txn_id.is_(None),
+                    B.amount_cents.is_not(None),
+                    B.due_date >= min(p.txn_date for p in payments) - window,
+                    B.due_date <= max(p.txn_date for p in payments) + window,
+                )
+            ).all()
+        ]
+        pairs = match_bills(bills, payments, window_days)
+        if pairs:
+            self.session.execute(
+                update(B),
+                [{"id": bill_id, "status": "PAID", "linked_txn_id": txn_id} for bill_id, txn_id in pairs],
+            )
+            self.session.commit()
+            _invalidate_projections(user_id)
+        return len(pairs)
+
     def update_bill(self, user_id: str, bill_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         b = self.session.get(models.Bill, bill_id)
         if not b or b.user_id != user_id:
@@ -857,10 +1974,283 @@ class DB:
         for key, field in [("status", "status"), ("amount", "amount_cents")]:
             if key in updates:
                 setattr(b, field, updates[key] if key != "status" else updates[key].upper())
+        if "amount" in updates:
+            b.amount_edited = True
         self.session.commit()
         self.session.refresh(b)
+        _invalidate_projections(user_id)
         return _bill_dict(b)
 
+    def sweep_bill_statuses(
+        self,
+        today: date,
+        due_ahead_days: int = BILL_DUE_AHEAD_DAYS,
+        batch_size: int = 1000,
+        lock_timeout_ms: int = SWEEP_LOCK_TIMEOUT_MS,
+    ) -> Dict[str, Any]:
+        """Advance open bills across all users: PROJECTED -> DUE -> OVERDUE.
+
+        A bill is DUE once its due date is within `due_ahead_days`, and OVERDUE
+        once that date has passed without payment. Each batch of users is one
+        transaction of two UPDATEs that range-scan bills_user_due_date_idx.
+        A batch that cannot get its row locks within `lock_timeout_ms` is
+        rolled back and left for the next run rather than waited on.
+        Returns counters for the run.
+        """
+        B = models.Bill
+        metrics: Dict[str, Any] = {"due": 0, "overdue": 0, "batches": 0, "lockTimeouts": 0}
+        started = time.monotonic()
+        for batch in self._user_batches(None, batch_size):
+            metrics["batches"] += 1
+            try:
+                self.session.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+                overdue = self.session.execute(
+                    update(B)
+                    .where(B.user_id.in_(batch), B.due_date < today, B.status.in_(("PROJECTED", "DUE")), B.linked_txn_id.is_(None))
+                    .values(status="OVERDUE")
+                    .execution_options(synchronize_session=False)
+                )
+                due = self.session.execute(
+                    update(B)
+                    .where(
+                        B.user_id.in_(batch),
+                        B.due_date >= today,
+                        B.due_date <= today + timedelta(days=due_ahead_days),
+                        B.status == "PROJECTED",
+                        B.linked_txn_id.is_(None),
+                    )
+                    .values(status="DUE")
+                    .execution_options(synchronize_session=False)
+                )
+                self.session.commit()
+            except OperationalError as exc:
+                self.session.rollback()
+                if getattr(exc.orig, "sqlstate", None) != "55P03":  # lock_not_available
+                    raise
+                metrics["lockTimeouts"] += 1
+                continue
+            metrics["overdue"] += int(overdue.rowcount or 0)
+            metrics["due"] += int(due.rowcount or 0)
+        metrics["seconds"] = round(time.monotonic() - started, 3)
+        return metrics
+
+    # ---------- Forecast ----------
+    def forecast(self, user_id: str, today: date, days: int, lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> Dict[str, Any]:
+        """Project the user's daily balance `days` ahead of `today`.
+
+        Starting balance is the sum of all transactions. Scheduled amounts are
+        unpaid bills (past-due ones only while DUE/OVERDUE and at most
+        FORECAST_OVERDUE_DAYS old) plus rule occurrences that have no bill
+        yet; discretionary spend is each category's average daily expense over
+        `lookback_days`, ignoring transfers and transactions that paid a bill.
+        """
+        key = (today.isoformat(), days, lookback_days)
+        cached = forecast_cache.get(user_id)
+        if cached is not None and key in cached:
+            return cached[key]
+
+        T, B, R = models.Transaction, models.Bill, models.RecurringRule
+        end = today + timedelta(days=days)
+        starting_balance = self.session.execute(
+            select(func.coalesce(func.sum(T.amount_cents), 0)).where(T.user_id == user_id)
+        ).scalar_one()
+
+        bill_paid_txns = select(B.linked_txn_id).where(B.user_id == user_id, B.linked_txn_id.is_not(None))
+        spend = func.sum(-T.amount_cents).label("spend")
+        baseline_rows = self.session.execute(
+            select(T.category_id, spend)
+            .where(
+                T.user_id == user_id,
+                T.amount_cents < 0,
+                T.txn_date > today - timedelta(days=lookback_days),
+                T.txn_date <= today,
+                T.entry_type.is_distinct_from("transfer"),
+                T.id.not_in(bill_paid_txns),
+            )
+            .group_by(T.category_id)
+        ).all()
+        baseline = sorted(
+            ({"categoryId": row.category_id, "dailyAverage": int(row.spend) / lookback_days} for row in baseline_rows),
+            key=lambda b: -b["dailyAverage"],
+        )
+
+        scheduled: List[tuple] = []
+        billed = set()
+        for bill in self.session.execute(
+            select(B.rule_id, B.due_date, B.amount_cents, B.status, B.linked_txn_id)
+            .where(
+                B.user_id == user_id,
+                B.due_date <= end,
+                or_(
+                    B.due_date >= today,
+                    and_(
+                        B.due_date >= today - timedelta(days=FORECAST_OVERDUE_DAYS),
+                        func.upper(B.status).in_(("DUE", "OVERDUE")),
+                    ),
+                ),
+            )
+        ).all():
+            billed.add((bill.rule_id, bill.due_date))
+            if (bill.status or "").upper() != "PAID" and bill.linked_txn_id is None and bill.amount_cents:
+                scheduled.append((bill.due_date, bill.amount_cents))
+
+        rules = [
+            _recurring_dict(r)
+            for r in self.session.scalars(select(R).where(R.user_id == user_id, R.is_paused.is_(False))).all()
+        ]
+        amounts = {r["ruleId"]: r["amount"] for r in rules}
+        predicted = self.predicted_rule_amounts(user_id, today)
+        for rule_id, dates in expand_rules(rules, today + timedelta(days=1), end).items():
+            for due in dates.astype(object).tolist():
+                if (rule_id, due) not in billed:
+                    amount = amount_for(predicted[rule_id], due.strftime("%Y-%m")) if rule_id in predicted else amounts[rule_id]
+                    scheduled.append((due, amount))
+
+        result = project_balance(
+            today, days, int(starting_balance), scheduled, sum(b["dailyAverage"] for b in baseline)
+        )
+        result["baseline"] = [
+            {"categoryId": b["categoryId"], "dailyAverage": int(round(b["dailyAverage"]))} for b in baseline
+        ]
+        cached = dict(cached or {})
+        cached[key] = result
+        forecast_cache.put(user_id, cached)
+        return result
+
+    # ---------- Search ----------
+    def search(self, user_id: str, q: str, limit: int = 20, after: Optional[SearchKey] = None) -> Dict[str, Any]:
+        rows = self.session.execute(search_statement(user_id, q, limit + 1, after)).all()
+        page = rows[:limit]
+        items = [
+            {
+                "type": row.kind,
+                "id": row.id,
+                "date": row.date.isoformat(),
+                "merchant": row.merchant,
+                "detail": row.detail,
+                "amount": int(row.amount),
+                "score": float(row.score),
+            }
+            for row in page
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor((float(last.score), last.kind, last.id))
+        return {"items": items, "nextCursor": next_cursor}
+
+    # ---------- Categorization rules ----------
+    def list_categorization_rules(self, user_id: str) -> List[Dict[str, Any]]:
+        stmt = (
+            select(models.CategorizationRule)
+            .where(models.CategorizationRule.user_id == user_id)
+            .order_by(models.CategorizationRule.priority.desc(), models.CategorizationRule.created_at, models.CategorizationRule.id)
+        )
+        return [_categorization_rule_dict(r) for r in self.session.scalars(stmt).all()]
+
+    def create_categorization_rule(self, user_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        r = models.CategorizationRule(
+            id=payload.get("ruleId") or _uid("crule"),
+            user_id=user_id,
+            pattern=payload["pattern"],
+            field=payload.get("field") or "any",
+            category_id=payload["categoryId"],
+            notes=payload.get("notes"),
+            priority=payload.get("priority", 0),
+            is_active=payload.get("isActive", True),
+        )
+        self.session.add(r)
+        self.session.commit()
+        self.session.refresh(r)
+        matcher_cache.invalidate(user_id)
+        return _categorization_rule_dict(r)
+
+    def update_categorization_rule(self, user_id: str, rule_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        r = self.session.get(models.CategorizationRule, rule_id)
+        if not r or r.user_id != user_id:
+            return None
+        for key, field in [
+            ("pattern", "pattern"),
+            ("field", "field"),
+            ("categoryId", "category_id"),
+            ("notes", "notes"),
+            ("priority", "priority"),
+            ("isActive", "is_active"),
+        ]:
+            if key in updates:
+                setattr(r, field, updates[key])
+        self.session.commit()
+        self.session.refresh(r)
+        matcher_cache.invalidate(user_id)
+        return _categorization_rule_dict(r)
+
+    def delete_categorization_rule(self, user_id: str, rule_id: str) -> bool:
+        r = self.session.get(models.CategorizationRule, rule_id)
+        if not r or r.user_id != user_id:
+            return False
+        self.session.delete(r)
+        self.session.commit()
+        matcher_cache.invalidate(user_id)
+        return True
+
+    def get_rule_matcher(self, user_id: str) -> RuleMatcher:
+        matcher = matcher_cache.get(user_id)
+        if matcher is None:
+            matcher = RuleMatcher(self.list_categorization_rules(user_id))
+            matcher_cache.put(user_id, matcher)
+        return matcher
+
+    def apply_categorization_rules(self, user_id: str, overwrite: bool = False, batch_size: int = 1000) -> Dict[str, int]:
+        """Run the user's rules over their whole history in keyset-paginated batches.
+
+        Only changed rows are written, with one executemany UPDATE per batch.
+        """
+        matcher = self.get_rule_matcher(user_id)
+        scanned = updated = 0
+        if not len(matcher):
+            return {"scanned": scanned, "updated": updated}
+
+        T = models.Transaction
+        last_id: Optional[str] = None
+        while True:
+            stmt = (
+                select(T.id, T.merchant, T.description, T.notes, T.category_id, T.splits)
+                .where(T.user_id == user_id)
+                .order_by(T.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                stmt = stmt.where(T.id > last_id)
+            rows = self.session.execute(stmt).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            changes: List[Dict[str, Any]] = []
+            for row in rows:
+                txn = {
+                    "merchant": row.merchant,
+                    "description": row.description,
+                    "notes": row.notes,
+                    "categoryId": row.category_id,
+                    "splits": row.splits,
+                }
+                if not matcher.apply(txn, overwrite=overwrite):
+                    continue
+                if (txn["categoryId"], txn["notes"], txn["splits"]) == (row.category_id, row.notes, row.splits):
+                    continue
+                changes.append(
+                    {"id": row.id, "category_id": txn["categoryId"], "notes": txn["notes"], "splits": txn["splits"]}
+                )
+            if changes:
+                self.session.execute(update(T), changes)
+                self.session.commit()
+                updated += len(changes)
+        if updated:
+            _invalidate_projections(user_id)
+        return {"scanned": scanned, "updated": updated}
+
 
 def get_session() -> Session:
     cfg = load_db_config()
@@ -0,0 +1,61 @@
+"""Daily cash-flow projection.
+
+Everything happens on one NumPy day axis (index 0 = today): scheduled
+amounts (rule occurrences and unpaid bills) are scattered into a delta array
+with `np.add.at`, the discretionary baseline is added to every future day
+as one broadcast, and the balance is a single cumulative sum.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .cache import UserCache
+
+DEFAULT_LOOKBACK_DAYS = 90
+
+# Per-user {(today, days): forecast}; the DB facade invalidates on writes that
+# move the inputs (transactions, rules, bills).
+forecast_cache = UserCache(maxsize=1024, ttl_seconds=600.0)
+
+
+def project_balance(
+    today: date,
+    days: int,
+    starting_balance: int,
+    scheduled: Iterable[Tuple[date, int]],
+    daily_discretionary: float,
+) -> Dict[str, Any]:
+    """Project end-of-day balances for today+1 .. today+days.
+
+    `scheduled` holds (date, signed amount) pairs; dates before tomorrow
+    (overdue bills) land on the first projected day.
+    """
+    items = list(scheduled)
+    delta = np.zeros(days + 1, dtype=np.float64)
+    scheduled_by_day = np.zeros(days + 1, dtype=np.int64)
+    if items:
+        offsets = np.array([(d - today).days for d, _ in items], dtype=np.int64)
+        amounts = np.array([amount for _, amount in items], dtype=np.int64)
+        keep = offsets <= days
+        offsets = np.clip(offsets[keep], 1, days)
+        np.add.at(scheduled_by_day, offsets, amounts[keep])
+    delta += scheduled_by_day
+    delta[1:] -= daily_discretionary
+    balance = np.rint(starting_balance + np.cumsum(delta)).astype(np.int64)
+
+    dates = [today + timedelta(days=i) for i in range(1, days + 1)]
+    points: List[Dict[str, Any]] = [
+        {"date": d.isoformat(), "balance": int(b), "scheduled": int(s)}
+        for d, b, s in zip(dates, balance[1:].tolist(), scheduled_by_day[1:].tolist())
+    ]
+    low = int(np.argmin(balance[1:])) if days else 0
+    return {
+        "startDate": today.isoformat(),
+        "days": days,
+        "startingBalance": int(starting_balance),
+        "dailyDiscretionary": int(round(daily_discretionary)),
+        "endingBalance": int(balance[-1]),
+        "lowest": points[low] if points else None,
+        "points": points,
+    }
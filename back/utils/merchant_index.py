@@ -0,0 +1,84 @@
+"""In-memory merchant autocomplete index.
+
+Each user's distinct merchants are kept in a sorted array of folded keys, so
+a prefix maps to one contiguous slice found with two binary searches; the
+slice is ranked by how often the user has used each merchant. Indexes are
+built lazily on the first suggestion request, held in an LRU across users
+and patched in place by transaction writes.
+"""
+import bisect
+import heapq
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from .cache import UserCache
+from .categorize import fold_text
+
+# Upper bound for the end of a prefix range in the sorted key array.
+_PREFIX_END = "\U0010ffff"
+
+merchant_indexes = UserCache(maxsize=512, ttl_seconds=600.0)
+
+
+def _key(merchant: str) -> str:
+    return " ".join(fold_text(merchant).split())
+
+
+class MerchantPrefixIndex:
+    def __init__(self, counts: Iterable[Tuple[str, int]] = ()):
+        self._lock = threading.Lock()
+        self._weights: Dict[str, int] = {}
+        self._display: Dict[str, str] = {}
+        best: Dict[str, int] = {}
+        for merchant, count in counts:
+            key = _key(merchant)
+            if not key:
+                continue
+            self._weights[key] = self._weights.get(key, 0) + int(count)
+            # Several spellings fold to one key; show the most used one.
+            if count > best.get(key, 0):
+                best[key] = count
+                self._display[key] = merchant.strip()
+        self._keys: List[str] = sorted(self._weights)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, merchant: str, delta: int = 1) -> None:
+        key = _key(merchant or "")
+        if not key:
+            return
+        with self._lock:
+            weight = self._weights.get(key, 0) + delta
+            if weight <= 0:
+                if key in self._weights:
+                    del self._weights[key]
+                    self._display.pop(key, None)
+                    idx = bisect.bisect_left(self._keys, key)
+                    if idx < len(self._keys) and self._keys[idx] == key:
+                        self._keys.pop(idx)
+                return
+            if key not in self._weights:
+                bisect.insort(self._keys, key)
+                self._display[key] = merchant.strip()
+            self._weights[key] = weight
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, object]]:
+        p = _key(prefix or "")
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, p)
+            hi = bisect.bisect_right(self._keys, p + _PREFIX_END, lo)
+            # nlargest is stable, so equal weights stay in alphabetical order.
+            top = heapq.nlargest(limit, self._keys[lo:hi], key=self._weights.__getitem__)
+            return [{"merchant": self._display[k], "count": self._weights[k]} for k in top]
+
+
+def record_merchant_change(user_id: str, old: str | None, new: str | None) -> None:
+    """Patch a loaded index after a transaction write; unloaded users are built fresh later."""
+    index = merchant_indexes.get(user_id)
+    if index is None or old == new:
+        return
+    if old:
+        index.add(old, -1)
+    if new:
+        index.add(new, 1)
@@ -0,0 +1,86 @@
+"""Merchant canonicalization: bank descriptors -> one stable merchant name.
+
+"Pago Recurrente VD DL RAPPI CHILE RAPPI" and "RAPPI" both canonicalize to
+"RAPPI", which is interned once in the `merchants` table so analytics can
+group by an integer `transactions.merchant_id` instead of raw text.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+
+from .categorize import fold_text
+
+# Payment channel prefixes added by the bank, stripped repeatedly from the front.
+_CHANNEL_PREFIX_RE = re.compile(
+    r"^(?:PAGO RECURRENTE|PAGO AUTOMATICO|COMPRA NACIONAL|COMPRA INTERNACIONAL|COMPRA NAC|COMPRA INT|COMPRA|CARGO|VD|DL|NP|PAC|PAT|POS)\s+"
+)
+# Leading account/RUT numbers on transfers, e.g. "0200713281 Transf a ...".
+_LEADING_REF_RE = re.compile(r"^\d{6,}K?\s+")
+# Aggregators whose real merchant follows the asterisk: MERCADOPAGO*CARNICERIA.
+_AGGREGATOR_RE = re.compile(r"^(?:MERCADOPAGO|MERPAGO|MP|SQ|PAYPAL|SUMUP|IZ)\s*\*\s*")
+# Everything after an asterisk is a per-charge reference: UBER *TRIP -> UBER.
+_STAR_SUFFIX_RE = re.compile(r"\s*\*.*$")
+_BILLING_PATH_RE = re.compile(r"/(?:BILL|BILLING)\b")
+_NON_WORD_RE = re.compile(r"[^A-Z0-9&.'/ ]+")
+_SPACES_RE = re.compile(r"\s+")
+_TRAILING_NUMBER_RE = re.compile(r"(?:\s+\d+)+$")
+# Country and legal-entity tokens that vary between descriptors of one merchant.
+_NOISE_TOKENS = frozenset({"CHILE", "CL", "SPA", "S.A.", "SA", "LTDA", "LIMITADA", "EIRL"})
+
+
+@lru_cache(maxsize=65536)
+def canonicalize_merchant(raw: Optional[str]) -> str:
+    """Return the canonical (uppercase, accent-free) merchant name for a descriptor."""
+    text = _SPACES_RE.sub(" ", fold_text(raw).upper()).strip()
+    if not text:
+        return ""
+    original = text
+
+    text = _LEADING_REF_RE.sub("", text)
+    while True:
+        stripped = _CHANNEL_PREFIX_RE.sub("", text)
+        if stripped == text:
+            break
+        text = stripped
+    text = _AGGREGATOR_RE.sub("", text)
+    text = _STAR_SUFFIX_RE.sub("", text)
+    text = _BILLING_PATH_RE.sub("", text)
+    text = _NON_WORD_RE.sub(" ", text)
+
+    tokens = [t for t in text.split() if t not in _NOISE_TOKENS]
+    text = _TRAILING_NUMBER_RE.sub("", " ".join(tokens))
+    tokens = text.split()
+    deduped: list[str] = []
+    for tok in tokens:
+        if not deduped or deduped[-1] != tok:
+            deduped.append(tok)
+    # "RAPPI PRO RAPPI": the brand repeated at the end adds nothing.
+    if len(deduped) > 1 and deduped[-1] == deduped[0]:
+        deduped.pop()
+    return " ".join(deduped) or original
+
+
+class MerchantIdCache:
+    """Process-wide canonical name -> merchants.id mapping. Ids never change once interned."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def update(self, mapping: Dict[str, int]) -> None:
+        with self._lock:
+            if len(self._ids) + len(mapping) > self.maxsize:
+                self._ids.clear()
+            self._ids.update(mapping)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+merchant_ids = MerchantIdCache()
@@ -0,0 +1,25 @@
+"""zstd codec for raw OCR blocks moved to `receipt_ocr_archive`.
+
+Textract blocks are verbose, repetitive JSON (labels, field types, confidences),
+which zstd shrinks far better than the pglz TOAST compression they get in the
+hot `receipts` table. `OCR_ARCHIVE_ZSTD_LEVEL` trades job CPU for size; reads
+decompress at the same speed whatever the level.
+"""
+import json
+import os
+from typing import Any, List, Tuple
+
+import zstandard
+
+CODEC = "zstd"
+ZSTD_LEVEL = int(os.getenv("OCR_ARCHIVE_ZSTD_LEVEL", "12"))
+
+
+def compress_blocks(blocks: List[Any]) -> Tuple[bytes, int]:
+    """Compressed payload and the size of the JSON it encodes."""
+    raw = json.dumps(blocks, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw), len(raw)
+
+
+def decompress_blocks(payload: bytes) -> List[Any]:
+    return json.loads(zstandard.ZstdDecompressor().decompress(payload))
@@ -0,0 +1,136 @@
+"""Queue between the API and the OCR worker (`ocr-lambda/handler.py`).
+
+Messages are the worker's job payload (`user_id`, `receipt_id`, `image_url`)
+and are consumed as SQS-shaped events (`{"Records": [{"messageId", "body"}]}`),
+so the same handler runs behind SQS in prod and behind the local queue in dev.
+
+Backends, picked by `OCR_QUEUE`:
+
+- `local` (default): SQLite table at `OCR_QUEUE_PATH`, shared by the API and
+  `python -m jobs.dispatch_ocr --run-worker`; `:memory:` keeps it in-process.
+- `sqs`: `OCR_QUEUE_URL` via boto3 `send_message_batch` (imported lazily).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# SQS SendMessageBatch / Lambda batch limit.
+MAX_BATCH = 10
+# Dispatch policy: a receipt is sent at most OCR_MAX_ATTEMPTS times. An enqueued
+# receipt with no callback after OCR_ACK_TIMEOUT is sent again; failed sends and
+# ocr_failed callbacks wait retry_delay(attempts) first.
+OCR_MAX_ATTEMPTS = 5
+OCR_ACK_TIMEOUT = timedelta(minutes=10)
+_RETRY_BASE_SECONDS = 30
+_RETRY_MAX_SECONDS = 3600
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: 30s, 60s, 120s, ... capped at an hour."""
+    return timedelta(seconds=min(_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), _RETRY_MAX_SECONDS))
+
+
+class OcrQueue(ABC):
+    @abstractmethod
+    def send_batch(self, messages: Sequence[Dict[str, Any]]) -> List[str]:
+        """Enqueue up to MAX_BATCH job payloads; returns the receipt ids that failed."""
+
+
+class SqsQueue(OcrQueue):
+    def __init__(self, queue_url: str, client: Any = None):
+        if client is None:
+            import boto3  # prod-only dependency
+
+            client = boto3.client("sqs")
+        self.queue_url = queue_url
+        self.client = client
+
+    def send_batch(self, messages: Sequence[Dict[str, Any]]) -> List[str]:
+        if not messages:
+            return []
+        try:
+            resp = self.client.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{"Id": m["receipt_id"], "MessageBody": json.dumps(m)} for m in messages],
+            )
+        except Exception:  # noqa: BLE001 - the dispatcher retries the whole batch
+            return [m["receipt_id"] for m in messages]
+        return [entry["Id"] for entry in resp.get("Failed", [])]
+
+
+class LocalQueue(OcrQueue):
+    """SQLite-backed stand-in with SQS-like visibility timeouts."""
+
+    def __init__(self, path: str, visibility_seconds: float = 300.0):
+        self.visibility_seconds = visibility_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_messages ("
+            " message_id INTEGER PRIMARY KEY AUTOINCREMENT, body TEXT NOT NULL, visible_at REAL NOT NULL,"
+            " receives INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ocr_messages)")}
+        if "receives" not in columns:  # queue files created before receive counts
+            self._conn.execute("ALTER TABLE ocr_messages ADD COLUMN receives INTEGER NOT NULL DEFAULT 0")
+
+    def send_batch(self, messages: Sequence[Dict[str, Any]]) -> List[str]:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO ocr_messages (body, visible_at) VALUES (?, ?)",
+                [(json.dumps(m), now) for m in messages],
+            )
+        return []
+
+    def receive(self, max_messages: int = MAX_BATCH) -> Dict[str, Any]:
+        """Claim visible messages as one SQS-shaped event (empty `Records` when idle).
+
+        Records carry `ApproximateReceiveCount` like SQS, so the worker can tell
+        the last delivery of a message it keeps failing.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows: List[Tuple[int, str, int]] = self._conn.execute(
+                "SELECT message_id, body, receives + 1 FROM ocr_messages"
+                " WHERE visible_at <= ? ORDER BY message_id LIMIT ?",
+                (now, max_messages),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE ocr_messages SET visible_at = ?, receives = receives + 1 WHERE message_id = ?",
+                [(now + self.visibility_seconds, message_id) for message_id, _, _ in rows],
+            )
+            self._conn.execute("COMMIT")
+        return {
+            "Records": [
+                {"messageId": str(message_id), "body": body, "attributes": {"ApproximateReceiveCount": str(receives)}}
+                for message_id, body, receives in rows
+            ]
+        }
+
+    def delete(self, message_ids: Sequence[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM ocr_messages WHERE message_id = ?", [(int(m),) for m in message_ids])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ocr_messages").fetchone()[0]
+
+
+_queue: Optional[OcrQueue] = None
+
+
+def get_ocr_queue() -> OcrQueue:
+    global _queue
+    if _queue is None:
+        if os.getenv("OCR_QUEUE", "local").lower() == "sqs":
+            _queue = SqsQueue(os.environ["OCR_QUEUE_URL"])
+        else:
+            _queue = LocalQueue(os.getenv("OCR_QUEUE_PATH", "/tmp/ocr-queue.sqlite3"))
+    return _queue
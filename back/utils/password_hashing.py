@@ -0,0 +1,52 @@
+"""PBKDF2 password derivation in a bounded process pool.
+
+At the production iteration count one derivation costs a few hundred ms of
+CPU. Run on the request threads, a burst of logins takes every core and the
+whole threadpool, and every other endpoint queues behind them. Derivations
+run in `AUTH_HASH_WORKERS` processes instead. At most `AUTH_HASH_MAX_PENDING`
+can be running or queued at once; beyond that `derive_password` raises
+`HashPoolBusy` right away and the caller answers 503 without doing any work.
+The pool is a `RestartablePool`: a worker that dies does not fail every later
+login, and where workers cannot start (Lambda) derivations run on the request
+thread, still bounded by the same slots.
+"""
+import binascii
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from utils.process_pool import RestartablePool
+
+# 0 derives on the request thread (still bounded by HASH_MAX_PENDING).
+HASH_WORKERS = max(int(os.getenv("AUTH_HASH_WORKERS", "2")), 0)
+HASH_MAX_PENDING = max(int(os.getenv("AUTH_HASH_MAX_PENDING", "16")), 1)
+
+
+class HashPoolBusy(Exception):
+    """Every derivation slot is taken; the attempt should be retried later."""
+
+
+def pbkdf2_hex(password: str, salt: bytes, iterations: int) -> str:
+    """PBKDF2-HMAC-SHA256 hex digest."""
+    dk = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return binascii.hexlify(dk).decode()
+
+
+_pool = RestartablePool(HASH_WORKERS)
+_slots = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def get_hash_pool() -> Optional[ProcessPoolExecutor]:
+    return _pool.executor()
+
+
+def derive_password(password: str, salt: bytes, iterations: int) -> str:
+    """`pbkdf2_hex` in the hash pool; raises HashPoolBusy when the queue is full."""
+    if not _slots.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        return _pool.run(pbkdf2_hex, password, salt, iterations)
+    finally:
+        _slots.release()
@@ -0,0 +1,83 @@
+"""Process pools for CPU-bound request work (image preprocessing, password hashing).
+
+Workers come from a forkserver, not a fork of the API process: uvicorn runs
+request threads (and the threadpool's locks) that a forked child would inherit
+in whatever state they were in. A worker that dies (OOM kill, segfault) breaks
+a ProcessPoolExecutor for good, so `RestartablePool.run` replaces a broken pool
+and retries the call once instead of failing every later request.
+
+With `max_workers` 0, or where worker processes cannot start at all (AWS
+Lambda has no /dev/shm for the pool's semaphores), `run` calls the function on
+the calling thread instead.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("process_pool")
+
+# What starting a pool raises on platforms without working multiprocessing primitives.
+_START_ERRORS = (OSError, ImportError, NotImplementedError)
+
+
+class RestartablePool:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.inline = max_workers <= 0
+
+    def _run_inline(self, error: BaseException) -> None:
+        logger.warning("Process pool unavailable (%s); running work in-process", error)
+        self.inline = True
+
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        """The current pool, started on first use; None when work runs in-process."""
+        pool = self._pool
+        if pool is None and not self.inline:
+            with self._lock:
+                if self._pool is None and not self.inline:
+                    try:
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+                        )
+                    except _START_ERRORS as exc:
+                        self._run_inline(exc)
+                pool = self._pool
+        return pool
+
+    def _discard(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """fn(*args) in a worker; a broken pool is replaced and the call retried once."""
+        for retry in (False, True):
+            pool = self.executor()
+            if pool is None:
+                break
+            try:
+                # The first submit starts the forkserver and the workers.
+                future = pool.submit(fn, *args)
+            except _START_ERRORS as exc:
+                self._run_inline(exc)
+                self._discard(pool)
+                break
+            except BrokenProcessPool:
+                pass
+            else:
+                try:
+                    return future.result()
+                except BrokenProcessPool:
+                    pass
+            self._discard(pool)
+            if retry:
+                raise BrokenProcessPool("Process pool broke again after a restart")
+        return fn(*args)
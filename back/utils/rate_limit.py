@@ -0,0 +1,41 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Thread-safe per-key token buckets (one per email, one per client IP, ...).
+
+    Each key holds up to `capacity` tokens and regains `refill_per_second`;
+    an attempt spends one. Only the `maxsize` most recently used keys are kept,
+    and a dropped key comes back with a full bucket. State is per process, so
+    with several uvicorn workers the effective limit is multiplied by their count.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, maxsize: int = 100_000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Spend a token for `key`: 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.refill_per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
@@ -0,0 +1,142 @@
+"""Receipt image preprocessing between upload and OCR.
+
+Phone photos arrive at full resolution (12+ MP, several MB) with EXIF
+orientation and location tags. Before a receipt is stored for good each image
+is:
+
+- auto-oriented from its EXIF orientation, then stripped of EXIF (and GPS);
+- downsized so the longer edge is at most `RECEIPT_MAX_EDGE` (2000 px keeps
+  receipt text well above OCR resolution limits);
+- re-encoded as JPEG at `RECEIPT_JPEG_QUALITY`;
+- thumbnailed to `THUMBNAIL_EDGE` px for the receipts list.
+
+Decoding and resampling are CPU bound, so they run in a small process pool
+(`RECEIPT_PREPROCESS_WORKERS`, see utils/process_pool.py) off the request
+threads, or in-process where worker processes cannot start (Lambda). Files
+Pillow cannot decode (PDFs, HEIC without a plugin) are stored unchanged.
+"""
+import hashlib
+import io
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .process_pool import RestartablePool
+from .storage import ReceiptStorage
+
+MAX_EDGE = int(os.getenv("RECEIPT_MAX_EDGE", "2000"))
+JPEG_QUALITY = int(os.getenv("RECEIPT_JPEG_QUALITY", "85"))
+THUMBNAIL_EDGE = 256
+THUMBNAIL_QUALITY = 70
+PREPROCESS_WORKERS = max(int(os.getenv("RECEIPT_PREPROCESS_WORKERS", "2")), 1)
+PREPROCESS_ENABLED = os.getenv("RECEIPT_PREPROCESS", "on").lower() != "off"
+
+
+@dataclass
+class PreprocessedImage:
+    data: bytes
+    thumbnail: bytes
+    width: int
+    height: int
+    original_bytes: int
+    content_type: str = "image/jpeg"
+
+
+def _encode(img: Image.Image, quality: int) -> bytes:
+    out = io.BytesIO()
+    # No exif= argument: the re-encoded file carries no EXIF at all.
+    img.save(out, "JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+def preprocess_image(
+    data: bytes,
+    max_edge: int = MAX_EDGE,
+    quality: int = JPEG_QUALITY,
+    thumbnail_edge: int = THUMBNAIL_EDGE,
+) -> Optional[PreprocessedImage]:
+    """Orient, strip, downsize and re-encode one image; None when Pillow cannot decode it."""
+    try:
+        img = Image.open(io.BytesIO(data))
+        # JPEG only: decode at the smallest DCT scale whose longer edge still covers max_edge.
+        scale = max_edge / max(img.size)
+        if scale < 1:
+            img.draft(img.mode, (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        thumb = img.copy()
+        thumb.thumbnail((thumbnail_edge, thumbnail_edge), Image.Resampling.LANCZOS)
+        return PreprocessedImage(
+            data=_encode(img, quality),
+            thumbnail=_encode(thumb, THUMBNAIL_QUALITY),
+            width=img.width,
+            height=img.height,
+            original_bytes=len(data),
+        )
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+
+
+_pool = RestartablePool(PREPROCESS_WORKERS)
+
+
+def get_preprocess_pool() -> Optional[ProcessPoolExecutor]:
+    return _pool.executor()
+
+
+def processed_keys(key: str) -> Dict[str, str]:
+    """Object keys for the re-encoded image and its thumbnail, next to the uploaded key."""
+    stem = str(PurePosixPath(key).with_suffix(""))
+    return {"image": f"{stem}.jpg", "thumbnail": f"{stem}.thumb.jpg"}
+
+
+def stale_upload_key(storage: ReceiptStorage, key: str, image: Dict[str, Any]) -> Optional[str]:
+    """The uploaded object at `key` when the stored image (`image` from store_receipt_image) went elsewhere."""
+    processed = processed_keys(key)["image"]
+    return key if processed != key and image["imageUrl"] == storage.uri(processed) else None
+
+
+def store_uploaded_image(storage: ReceiptStorage, key: str) -> Dict[str, Any]:
+    """`store_receipt_image` for an object already uploaded to `key`.
+
+    Preprocessing reads the upload back through the API. With
+    `RECEIPT_PREPROCESS=off` the bytes are not read at all and the receipt
+    has no `contentSha256` (the OCR worker hashes the object itself).
+    """
+    if not PREPROCESS_ENABLED:
+        return {"imageUrl": storage.uri(key), "thumbnailUrl": None, "contentSha256": None}
+    return store_receipt_image(storage, key, storage.get(key), "", uploaded=True)
+
+
+def store_receipt_image(storage: ReceiptStorage, key: str, data: bytes, content_type: str,
+                        uploaded: bool) -> Dict[str, Any]:
+    """Preprocess `data` in the worker pool and store the result and its thumbnail.
+
+    `uploaded` says whether `data` already sits at `key` (presigned upload).
+    The original is left in place even when the processed image goes to
+    another key; the caller deletes it (`stale_upload_key`) once the receipt
+    row is committed, so a failed insert can be retried. Returns the receipt
+    fields `imageUrl`, `thumbnailUrl` (None when the file was stored unchanged)
+    and `contentSha256` of the stored image.
+    """
+    processed = _pool.run(preprocess_image, data) if PREPROCESS_ENABLED else None
+    if processed is None:
+        if not uploaded:
+            storage.put(key, io.BytesIO(data), content_type)
+        return {"imageUrl": storage.uri(key), "thumbnailUrl": None, "contentSha256": hashlib.sha256(data).hexdigest()}
+
+    keys = processed_keys(key)
+    storage.put(keys["image"], io.BytesIO(processed.data), processed.content_type)
+    storage.put(keys["thumbnail"], io.BytesIO(processed.thumbnail), processed.content_type)
+    return {
+        "imageUrl": storage.uri(keys["image"]),
+        "thumbnailUrl": storage.uri(keys["thumbnail"]),
+        "contentSha256": hashlib.sha256(processed.data).hexdigest(),
+    }
@@ -0,0 +1,68 @@
+"""Match receipts to the card/bank transactions that paid them.
+
+A receipt's total is exact, so candidates are the expenses of the same user
+for exactly that amount (`amount_cents == -total_cents`) dated within
+`DATE_WINDOW_DAYS` of the receipt (card postings lag the purchase by a day or
+two). Among unused candidates a receipt takes the one whose merchant is most
+similar to its own, then the closest in date. OCR merchants are noisy, so a
+dissimilar merchant is only accepted when it is the sole candidate.
+"""
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .bill_matching import merchant_similarity
+
+DATE_WINDOW_DAYS = 3
+# Below this merchant similarity a candidate needs to be the only one.
+MIN_MERCHANT_SIMILARITY = 0.5
+
+
+class ReceiptCandidate(NamedTuple):
+    id: str
+    user_id: str
+    merchant: str
+    receipt_date: date
+    total: int
+
+
+class ExpenseCandidate(NamedTuple):
+    id: str
+    user_id: str
+    merchant: str
+    txn_date: date
+    amount: int
+
+
+def match_receipts(
+    receipts: Sequence[ReceiptCandidate],
+    expenses: Sequence[ExpenseCandidate],
+    window_days: int = DATE_WINDOW_DAYS,
+) -> List[Tuple[str, str]]:
+    """Return (receipt_id, txn_id) pairs; each receipt and transaction is used at most once."""
+    index: Dict[Tuple[str, int], List[ExpenseCandidate]] = {}
+    for txn in expenses:
+        index.setdefault((txn.user_id, -txn.amount), []).append(txn)
+
+    used: set[str] = set()
+    pairs: List[Tuple[str, str]] = []
+    for receipt in sorted(receipts, key=lambda r: (r.receipt_date, r.id)):
+        if receipt.total <= 0:
+            continue
+        candidates = [
+            (txn, abs((txn.txn_date - receipt.receipt_date).days))
+            for txn in index.get((receipt.user_id, receipt.total), ())
+            if txn.id not in used
+        ]
+        candidates = [(txn, days_off) for txn, days_off in candidates if days_off <= window_days]
+        best: Optional[Tuple[Tuple[float, int, str], ExpenseCandidate]] = None
+        for txn, days_off in candidates:
+            similarity = merchant_similarity(receipt.merchant, txn.merchant)
+            if similarity < MIN_MERCHANT_SIMILARITY and len(candidates) > 1:
+                continue
+            rank = (-similarity, days_off, txn.id)
+            if best is None or rank < best[0]:
+                best = (rank, txn)
+        if best is not None:
+            used.add(best[1].id)
+            pairs.append((receipt.id, best[1].id))
+    return pairs
@@ -0,0 +1,167 @@
+"""Occurrence dates for recurring rules.
+
+`expand_rules` answers "when does each of these rules occur between A and B"
+for many rules at once: rules are grouped by cadence and expanded as NumPy
+datetime64 grids (rules x periods) with a validity mask, so there is no
+per-day or per-period Python loop. Supported cadences:
+
+- MONTHLY: `dayOfMonth` (default: start day) clamped to short months, so 31
+  falls on Feb 28/29, Apr 30, ...
+- WEEKLY: every 7 days from `startDate`.
+- YEARLY: the start month each year, same day clamping as MONTHLY.
+
+Results are memoized per (rule definition, range). The key is the rule's
+schedule fields rather than its id, so editing a rule never serves stale dates.
+Pausing is a caller concern; the engine only looks at the schedule.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CADENCES = ("MONTHLY", "WEEKLY", "YEARLY")
+
+_DAY = np.timedelta64(1, "D")
+_MEMO_SIZE = 65536
+
+# (cadence, day_of_month, start, end, range_from, range_to)
+_Key = Tuple[str, Optional[int], str, Optional[str], str, str]
+
+_memo: "OrderedDict[_Key, np.ndarray]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _iso(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def _key(rule: Dict[str, Any], date_from: date, date_to: date) -> _Key:
+    return (
+        str(rule["cadence"]).upper(),
+        rule.get("dayOfMonth"),
+        _iso(rule["startDate"]),
+        _iso(rule.get("endDate")),
+        date_from.isoformat(),
+        date_to.isoformat(),
+    )
+
+
+def _memo_get(key: _Key) -> Optional[np.ndarray]:
+    with _memo_lock:
+        value = _memo.get(key)
+        if value is not None:
+            _memo.move_to_end(key)
+        return value
+
+
+def _memo_put(key: _Key, value: np.ndarray) -> None:
+    value.flags.writeable = False
+    with _memo_lock:
+        _memo[key] = value
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def clear_memo() -> None:
+    with _memo_lock:
+        _memo.clear()
+
+
+def _bounds(keys: Sequence[_Key]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-rule start date and the effective [lo, hi] window as datetime64[D]."""
+    start = np.array([k[2] for k in keys], dtype="datetime64[D]")
+    range_from = np.array([k[4] for k in keys], dtype="datetime64[D]")
+    range_to = np.array([k[5] for k in keys], dtype="datetime64[D]")
+    end = np.array([k[3] or k[5] for k in keys], dtype="datetime64[D]")
+    return start, np.maximum(start, range_from), np.minimum(end, range_to)
+
+
+def _day_in_month(keys: Sequence[_Key], start: np.ndarray) -> np.ndarray:
+    start_day = (start - start.astype("datetime64[M]").astype("datetime64[D]")) // _DAY + 1
+    dom = np.array([k[1] or 0 for k in keys], dtype=np.int64)
+    return np.where(dom > 0, dom, start_day)
+
+
+def _clamped_dates(months: np.ndarray, dom: np.ndarray) -> np.ndarray:
+    """months: (R, K) datetime64[M]; dom: (R,) -> (R, K) dates with day clamped to month length."""
+    month_start = months.astype("datetime64[D]")
+    month_len = ((months + 1).astype("datetime64[D]") - month_start) // _DAY
+    day = np.minimum(dom[:, None], month_len)
+    return month_start + (day - 1) * _DAY
+
+
+def _split(dates: np.ndarray, mask: np.ndarray) -> List[np.ndarray]:
+    return [row[m] for row, m in zip(dates, mask)]
+
+
+def _expand_monthly(keys: Sequence[_Key]) -> List[np.ndarray]:
+    start, lo, hi = _bounds(keys)
+    first = lo.astype("datetime64[M]")
+    span = (hi.astype("datetime64[M]") - first).astype(np.int64) + 1
+    width = max(int(span.max()), 0)
+    months = first[:, None] + np.arange(width)
+    dates = _clamped_dates(months, _day_in_month(keys, start))
+    mask = (dates >= lo[:, None]) & (dates <= hi[:, None])
+    return _split(dates, mask)
+
+
+def _expand_weekly(keys: Sequence[_Key]) -> List[np.ndarray]:
+    start, lo, hi = _bounds(keys)
+    weeks_to_lo = -((start - lo) // _DAY // 7)  # ceil((lo - start) / 7), lo >= start
+    first = start + weeks_to_lo * 7 * _DAY
+    count = np.maximum((hi - first) // _DAY // 7 + 1, 0)
+    width = int(count.max()) if len(count) else 0
+    steps = np.arange(width)
+    dates = first[:, None] + steps * 7 * _DAY
+    mask = steps[None, :] < count[:, None]
+    return _split(dates, mask)
+
+
+def _expand_yearly(keys: Sequence[_Key]) -> List[np.ndarray]:
+    start, lo, hi = _bounds(keys)
+    month_of_year = start.astype("datetime64[M]").astype(np.int64) % 12
+    first_year = lo.astype("datetime64[Y]").astype(np.int64)
+    span = hi.astype("datetime64[Y]").astype(np.int64) - first_year + 1
+    width = max(int(span.max()), 0)
+    years = first_year[:, None] + np.arange(width)
+    months = (years * 12 + month_of_year[:, None]).astype("datetime64[M]")
+    dates = _clamped_dates(months, _day_in_month(keys, start))
+    mask = (dates >= lo[:, None]) & (dates <= hi[:, None])
+    return _split(dates, mask)
+
+
+_EXPANDERS = {"MONTHLY": _expand_monthly, "WEEKLY": _expand_weekly, "YEARLY": _expand_yearly}
+
+
+def expand_rules(rules: Sequence[Dict[str, Any]], date_from: date, date_to: date) -> Dict[str, np.ndarray]:
+    """Map each rule's `ruleId` to its occurrence dates (datetime64[D], sorted, read-only) in [date_from, date_to]."""
+    result: Dict[str, np.ndarray] = {}
+    pending: Dict[str, List[Tuple[str, _Key]]] = {}
+    for rule in rules:
+        key = _key(rule, date_from, date_to)
+        if key[0] not in _EXPANDERS:
+            raise ValueError(f"unsupported cadence: {rule['cadence']}")
+        cached = _memo_get(key)
+        if cached is not None:
+            result[rule["ruleId"]] = cached
+        else:
+            pending.setdefault(key[0], []).append((rule["ruleId"], key))
+
+    for cadence, items in pending.items():
+        keys = [k for _, k in items]
+        for (rule_id, key), dates in zip(items, _EXPANDERS[cadence](keys)):
+            dates = np.ascontiguousarray(dates)
+            _memo_put(key, dates)
+            result[rule_id] = dates
+    return result
+
+
+def rule_occurrences(rule: Dict[str, Any], date_from: date, date_to: date) -> List[date]:
+    """Occurrence dates of a single rule as `datetime.date` objects."""
+    rule = {**rule, "ruleId": rule.get("ruleId") or ""}
+    dates = expand_rules([rule], date_from, date_to)[rule["ruleId"]]
+    return dates.astype(object).tolist()
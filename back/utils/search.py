@@ -0,0 +1,77 @@
+"""Ranked full-text search across transactions and receipts.
+
+Both entity types are matched in one UNION ALL: the generated `search_vector`
+columns answer the full-text part through their GIN indexes, and the trigram
+`%` operator catches misspelled merchants. Scores share one 0..1 scale
+(ts_rank_cd normalized with flag 32, trigram similarity) so the two kinds
+interleave, and pages are cut with a (score, kind, id) keyset.
+"""
+import base64
+import json
+from typing import Optional, Tuple
+
+from sqlalchemy import Float, Select, Text, and_, cast, func, literal, null, or_, select, tuple_, union_all
+
+from db import models
+
+# (score, kind, id) of the last row on the previous page.
+SearchKey = Tuple[float, str, str]
+
+# ts_rank_cd normalization: rank / (rank + 1), keeps scores below 1.
+_RANK_NORMALIZATION = 32
+
+
+def encode_cursor(key: SearchKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> SearchKey:
+    """Raises ValueError on anything that is not a cursor issued by `encode_cursor`."""
+    try:
+        score, kind, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), str(kind), str(item_id)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def search_statement(user_id: str, q: str, limit: int, after: Optional[SearchKey] = None) -> Select:
+    T, R = models.Transaction, models.Receipt
+    query = func.websearch_to_tsquery("simple", q)
+
+    txn_score = func.greatest(
+        func.ts_rank_cd(T.search_vector, query, _RANK_NORMALIZATION),
+        func.similarity(T.merchant, q),
+    )
+    txns = select(
+        literal("transaction").label("kind"),
+        T.id.label("id"),
+        T.txn_date.label("date"),
+        T.merchant.label("merchant"),
+        T.description.label("detail"),
+        T.amount_cents.label("amount"),
+        cast(txn_score, Float).label("score"),
+    ).where(T.user_id == user_id, or_(T.search_vector.op("@@")(query), T.merchant.op("%")(q)))
+
+    receipt_score = func.greatest(
+        func.ts_rank_cd(R.search_vector, query, _RANK_NORMALIZATION),
+        func.similarity(R.merchant, q),
+    )
+    receipts = select(
+        literal("receipt").label("kind"),
+        R.id.label("id"),
+        R.receipt_date.label("date"),
+        R.merchant.label("merchant"),
+        cast(null(), Text).label("detail"),
+        R.total_cents.label("amount"),
+        cast(receipt_score, Float).label("score"),
+    ).where(R.user_id == user_id, or_(R.search_vector.op("@@")(query), R.merchant.op("%")(q)))
+
+    hits = union_all(txns, receipts).subquery("hits")
+    stmt = select(hits)
+    if after is not None:
+        score, kind, item_id = after
+        stmt = stmt.where(or_(
+            hits.c.score < score,
+            and_(hits.c.score == score, tuple_(hits.c.kind, hits.c.id) > tuple_(kind, item_id)),
+        ))
+    return stmt.order_by(hits.c.score.desc(), hits.c.kind, hits.c.id).limit(limit)
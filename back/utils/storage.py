@@ -0,0 +1,255 @@
+"""Receipt image storage: presigned POST uploads straight to an object store.
+
+The API never sees image bytes on the happy path. It hands the client a URL
+and form fields (S3 "presigned POST" shape), the client uploads directly, and
+a completion call checks the object exists before the receipt row is created.
+
+Backends, picked by `RECEIPT_STORAGE`:
+
+- `local` (default): files under `RECEIPT_LOCAL_DIR`. The upload URL points at
+  `POST /api/v1/storage/receipts`, a small stand-in that speaks the same form
+  protocol (key + base64 policy + HMAC signature + file), so clients and tests
+  exercise the production flow without S3 or MinIO. `GET` on the same URL
+  serves stored objects for HMAC-signed links (the presigned GET stand-in).
+- `s3`: `RECEIPT_BUCKET` via boto3 (imported lazily; only needed in prod).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+from urllib.parse import urlencode
+
+UPLOAD_EXPIRES_SECONDS = 900
+DOWNLOAD_EXPIRES_SECONDS = int(os.getenv("RECEIPT_DOWNLOAD_EXPIRES_SECONDS", "3600"))
+MAX_UPLOAD_BYTES = 15 * 1024 * 1024
+# Presigned uploads take their key suffix from the content type, so each receipt id has a fixed set of keys.
+UPLOAD_SUFFIXES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/heic": ".heic",
+    "image/webp": ".webp",
+    "application/pdf": ".pdf",
+}
+ALLOWED_CONTENT_TYPES = tuple(UPLOAD_SUFFIXES)
+_COPY_CHUNK = 1024 * 1024
+
+
+class UploadRejected(ValueError):
+    """The upload form or download URL does not match a valid, unexpired signature."""
+
+
+class ReceiptStorage(ABC):
+    @abstractmethod
+    def presign_post(self, key: str, content_type: str, max_bytes: int = MAX_UPLOAD_BYTES,
+                     expires_in: int = UPLOAD_EXPIRES_SECONDS) -> Dict[str, Any]:
+        """{"url", "fields"} for a multipart POST of one object at `key`."""
+
+    @abstractmethod
+    def object_size(self, key: str) -> Optional[int]:
+        """Size in bytes of the stored object, or None when it does not exist."""
+
+    @abstractmethod
+    def put(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        """Server-side write, streamed (legacy multipart upload endpoint)."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """Whole object (uploads are capped at MAX_UPLOAD_BYTES)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the object; a missing key is not an error."""
+
+    @abstractmethod
+    def uri(self, key: str) -> str:
+        """Stored reference for `receipts.image_url`, readable by the OCR worker."""
+
+    @abstractmethod
+    def presign_get(self, key: str, expires_in: int = DOWNLOAD_EXPIRES_SECONDS) -> str:
+        """Time-limited https URL a browser can load the object from."""
+
+    def key_of(self, uri: Optional[str]) -> Optional[str]:
+        """The key behind a `uri()` reference; None for anything else."""
+        prefix = self.uri("")
+        return uri[len(prefix):] if uri and uri.startswith(prefix) else None
+
+    def download_url(self, uri: Optional[str]) -> Optional[str]:
+        """Browser-loadable URL for a stored `uri()` reference; other values are returned as they are."""
+        key = self.key_of(uri)
+        return self.presign_get(key) if key is not None else uri
+
+
+class LocalStorage(ReceiptStorage):
+    def __init__(self, root: Path, upload_url: str, bucket: str, secret: str):
+        self.root = root
+        self.upload_url = upload_url
+        self.bucket = bucket
+        self._secret = secret.encode()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise UploadRejected("invalid key")
+        return path
+
+    def _sign(self, policy: str) -> str:
+        return hmac.new(self._secret, policy.encode(), hashlib.sha256).hexdigest()
+
+    def presign_post(self, key: str, content_type: str, max_bytes: int = MAX_UPLOAD_BYTES,
+                     expires_in: int = UPLOAD_EXPIRES_SECONDS) -> Dict[str, Any]:
+        document = {"key": key, "contentType": content_type, "maxBytes": max_bytes, "expires": int(time.time()) + expires_in}
+        policy = base64.urlsafe_b64encode(json.dumps(document, separators=(",", ":")).encode()).decode()
+        return {
+            "url": self.upload_url,
+            "fields": {"key": key, "Content-Type": content_type, "policy": policy, "signature": self._sign(policy)},
+        }
+
+    def verify_policy(self, key: str, content_type: str, policy: str, signature: str) -> Dict[str, Any]:
+        """Check a stand-in upload form; returns the policy document."""
+        if not hmac.compare_digest(self._sign(policy), signature):
+            raise UploadRejected("bad signature")
+        document = json.loads(base64.urlsafe_b64decode(policy.encode()))
+        if document["key"] != key or document["contentType"] != content_type:
+            raise UploadRejected("form does not match policy")
+        if document["expires"] < time.time():
+            raise UploadRejected("policy expired")
+        return document
+
+    def _download_signature(self, key: str, expires: int) -> str:
+        return self._sign(f"GET\n{key}\n{expires}")
+
+    def presign_get(self, key: str, expires_in: int = DOWNLOAD_EXPIRES_SECONDS) -> str:
+        expires = int(time.time()) + expires_in
+        query = urlencode({"key": key, "expires": expires, "signature": self._download_signature(key, expires)})
+        return f"{self.upload_url}?{query}"
+
+    def verify_download(self, key: str, expires: int, signature: str) -> None:
+        """Check a stand-in presigned GET URL."""
+        if not hmac.compare_digest(self._download_signature(key, expires), signature):
+            raise UploadRejected("bad signature")
+        if expires < time.time():
+            raise UploadRejected("url expired")
+
+    def receive(self, key: str, fileobj: BinaryIO, max_bytes: int) -> int:
+        """Stream an uploaded file to disk in chunks, rejecting it past `max_bytes`."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".part")
+        written = 0
+        with partial.open("wb") as out:
+            while chunk := fileobj.read(_COPY_CHUNK):
+                written += len(chunk)
+                if written > max_bytes:
+                    out.close()
+                    partial.unlink(missing_ok=True)
+                    raise UploadRejected("file too large")
+                out.write(chunk)
+        partial.replace(path)
+        return written
+
+    def object_size(self, key: str) -> Optional[int]:
+        path = self._path(key)
+        return path.stat().st_size if path.is_file() else None
+
+    def put(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as out:
+            shutil.copyfileobj(fileobj, out, _COPY_CHUNK)
+
+    def get(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+
+class S3Storage(ReceiptStorage):
+    def __init__(self, bucket: str, client: Any = None):
+        if client is None:
+            import boto3  # prod-only dependency
+
+            client = boto3.client("s3")
+        self.bucket = bucket
+        self.client = client
+
+    def presign_post(self, key: str, content_type: str, max_bytes: int = MAX_UPLOAD_BYTES,
+                     expires_in: int = UPLOAD_EXPIRES_SECONDS) -> Dict[str, Any]:
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=expires_in,
+        )
+
+    def object_size(self, key: str) -> Optional[int]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return int(head["ContentLength"])
+
+    def put(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        self.client.upload_fileobj(fileobj, self.bucket, key, ExtraArgs={"ContentType": content_type})
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def presign_get(self, key: str, expires_in: int = DOWNLOAD_EXPIRES_SECONDS) -> str:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=expires_in
+        )
+
+
+_storage: Optional[ReceiptStorage] = None
+
+
+def get_storage() -> ReceiptStorage:
+    global _storage
+    if _storage is None:
+        bucket = os.getenv("RECEIPT_BUCKET", "local-receipts")
+        if os.getenv("RECEIPT_STORAGE", "local").lower() == "s3":
+            _storage = S3Storage(bucket)
+        else:
+            _storage = LocalStorage(
+                root=Path(os.getenv("RECEIPT_LOCAL_DIR", "/tmp/receipts")),
+                upload_url=os.getenv("RECEIPT_UPLOAD_URL", "http://localhost:8001/api/v1/storage/receipts"),
+                bucket=bucket,
+                secret=os.getenv("RECEIPT_STORAGE_SECRET") or os.getenv("AUTH_SECRET", "dev-secret"),
+            )
+    return _storage
+
+
+def receipt_key(user_id: str, receipt_id: str, filename: str) -> str:
+    """Object key for a receipt image stored by the API itself (legacy and batch uploads)."""
+    suffix = re.sub(r"[^a-z0-9.]", "", Path(filename or "").suffix.lower())[:8]
+    return f"receipts/{user_id}/{receipt_id}{suffix}"
+
+
+def upload_key(user_id: str, receipt_id: str, content_type: str) -> str:
+    """Object key for a presigned upload of one of ALLOWED_CONTENT_TYPES."""
+    return f"receipts/{user_id}/{receipt_id}{UPLOAD_SUFFIXES[content_type]}"
+
+
+def is_upload_key(key: str, user_id: str, receipt_id: str) -> bool:
+    """Whether `key` is exactly one of the keys POST /receipts/uploads can issue for this receipt."""
+    return key in {upload_key(user_id, receipt_id, content_type) for content_type in ALLOWED_CONTENT_TYPES}
@@ -0,0 +1,113 @@
+"""Mine recurring payments (subscriptions, bills) from transaction history.
+
+Expenses are grouped by (user, interned merchant). For every group at once,
+NumPy computes the count, mean and spread of the gaps between charges and of
+the charged amounts (`np.bincount` over group ids, no per-group Python loop);
+the proposed day of month and amount are per-group medians. Groups whose
+gaps sit tightly around 7 or ~30 days and whose amounts barely move become
+rule suggestions.
+"""
+from datetime import date
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+MIN_OCCURRENCES = 3
+HISTORY_DAYS = 400
+# Coefficient of variation limits for gaps and amounts.
+MAX_INTERVAL_CV = 0.2
+MAX_AMOUNT_CV = 0.25
+# cadence -> (nominal gap in days, allowed deviation of the mean gap)
+CADENCE_GAPS = {"WEEKLY": (7.0, 1.5), "MONTHLY": (30.44, 4.0)}
+
+
+def _group_median(gid: np.ndarray, values: np.ndarray, first: np.ndarray, count: np.ndarray) -> np.ndarray:
+    """Lower median of `values` per group; `gid` is sorted and `first` holds each group's first row."""
+    ordered = values[np.lexsort((values, gid))]
+    return ordered[first + (count - 1) // 2]
+
+
+def mine_recurring(
+    user_ids: Sequence[str],
+    merchant_ids: Sequence[int],
+    txn_dates: Sequence[date],
+    amounts: Sequence[int],
+    today: date,
+) -> List[Dict[str, Any]]:
+    """Return one suggestion per (user, merchant) group that looks recurring.
+
+    Inputs are parallel columns of expense rows (amounts may be signed; their
+    magnitude is used). Suggestions carry a negative `amount`, like bills.
+    """
+    if len(user_ids) == 0:
+        return []
+    users, user_code = np.unique(np.asarray(user_ids, dtype=object), return_inverse=True)
+    merchant = np.asarray(merchant_ids, dtype=np.int64)
+    radix = int(merchant.max()) + 1
+    key = user_code.astype(np.int64) * radix + merchant
+    day = np.asarray(txn_dates, dtype="datetime64[D]").astype(np.int64)
+    amount = np.abs(np.asarray(amounts, dtype=np.float64))
+
+    order = np.lexsort((day, key))
+    key, day, amount = key[order], day[order], amount[order]
+    # Several charges on one day count as one occurrence.
+    keep = np.r_[True, (key[1:] != key[:-1]) | (day[1:] != day[:-1])]
+    key, day, amount = key[keep], day[keep], amount[keep]
+
+    starts = np.r_[True, key[1:] != key[:-1]]
+    gid = np.cumsum(starts) - 1
+    groups = int(gid[-1]) + 1
+    count = np.bincount(gid, minlength=groups)
+    amount_mean = np.bincount(gid, amount, groups) / count
+    amount_var = np.maximum(np.bincount(gid, amount * amount, groups) / count - amount_mean ** 2, 0.0)
+
+    gap = np.diff(day).astype(np.float64)
+    inner = ~starts[1:]
+    gap_gid = gid[1:][inner]
+    gap = gap[inner]
+    gap_count = np.bincount(gap_gid, minlength=groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap_mean = np.bincount(gap_gid, gap, groups) / gap_count
+        gap_var = np.maximum(np.bincount(gap_gid, gap * gap, groups) / gap_count - gap_mean ** 2, 0.0)
+        gap_cv = np.sqrt(gap_var) / gap_mean
+        amount_cv = np.sqrt(amount_var) / amount_mean
+
+    first = np.flatnonzero(starts)
+    group_key = key[starts]
+    last_day = day[np.r_[first[1:] - 1, len(key) - 1]]
+    dates = day.astype("datetime64[D]")
+    day_of_month = (dates - dates.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64) + 1
+    typical_day = _group_median(gid, day_of_month, first, count)
+    typical_amount = _group_median(gid, amount, first, count)
+
+    cadence = np.full(groups, "", dtype=object)
+    for name, (nominal, slack) in CADENCE_GAPS.items():
+        cadence[np.abs(gap_mean - nominal) <= slack] = name
+    period = np.where(cadence == "WEEKLY", 7.0, 30.44)
+    today_day = np.datetime64(today, "D").astype(np.int64)
+    ok = (
+        (count >= MIN_OCCURRENCES)
+        & (cadence != "")
+        & (gap_cv <= MAX_INTERVAL_CV)
+        & (amount_cv <= MAX_AMOUNT_CV)
+        # Still active: the next charge is not long overdue.
+        & (today_day - last_day <= 1.5 * period)
+    )
+
+    confidence = np.clip(1.0 - (np.nan_to_num(gap_cv) + np.nan_to_num(amount_cv)) / 2, 0.0, 1.0)
+    last_dates = last_day.astype("datetime64[D]").astype(object)
+    suggestions: List[Dict[str, Any]] = []
+    for g in np.flatnonzero(ok):
+        last = last_dates[g]
+        suggestions.append({
+            "userId": users[group_key[g] // radix],
+            "merchantId": int(group_key[g] % radix),
+            "cadence": cadence[g],
+            "dayOfMonth": int(typical_day[g]) if cadence[g] == "MONTHLY" else None,
+            "amount": -int(round(typical_amount[g])),
+            "occurrences": int(count[g]),
+            "intervalDays": round(float(gap_mean[g]), 1),
+            "lastDate": last,
+            "confidence": round(float(confidence[g]), 4),
+        })
+    return suggestions
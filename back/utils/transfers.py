@@ -0,0 +1,64 @@
+"""Detect transfers between a user's own accounts.
+
+Moving money from checking to savings shows up as an expense on one account
+and an income of the same amount on the other. Credits are indexed by
+(amount, date) and, inside each key, by account, each queue in id order.
+Debits are taken in (amount, date, id) order, and each one looks up the
+2 * `window_days` + 1 dates around it, taking the earliest unused credit on a
+different account. Every lookup is a dict hit, so a full history is
+O(n log n) for the sort plus O(n * window * accounts) for the sweep, however
+many transactions share an amount.
+"""
+from collections import defaultdict, deque
+from datetime import date, timedelta
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_WINDOW_DAYS = 3
+
+
+class TransferCandidate(NamedTuple):
+    id: str
+    account_id: str
+    txn_date: date
+    amount: int
+
+
+# (amount, date) -> account_id -> unused credits in id order.
+CreditIndex = Dict[Tuple[int, date], Dict[str, Deque[TransferCandidate]]]
+
+
+def _take_credit(credits: CreditIndex, debit: TransferCandidate, window_days: int) -> Optional[TransferCandidate]:
+    amount = -debit.amount
+    for offset in range(-window_days, window_days + 1):
+        by_account = credits.get((amount, debit.txn_date + timedelta(days=offset)))
+        if not by_account:
+            continue
+        queues = [(q[0].id, account) for account, q in by_account.items() if account != debit.account_id]
+        if not queues:
+            continue
+        _, account = min(queues)
+        credit = by_account[account].popleft()
+        if not by_account[account]:
+            del by_account[account]
+        return credit
+    return None
+
+
+def pair_transfers(
+    candidates: Sequence[TransferCandidate],
+    window_days: int = DEFAULT_WINDOW_DAYS,
+) -> List[Tuple[str, str]]:
+    """Return (debit_id, credit_id) pairs; each transaction appears at most once."""
+    credits: CreditIndex = defaultdict(dict)
+    for c in sorted((c for c in candidates if c.amount > 0 and c.account_id), key=lambda c: c.id):
+        credits[(c.amount, c.txn_date)].setdefault(c.account_id, deque()).append(c)
+    debits = sorted(
+        (c for c in candidates if c.amount < 0 and c.account_id),
+        key=lambda c: (-c.amount, c.txn_date, c.id),
+    )
+    pairs: List[Tuple[str, str]] = []
+    for debit in debits:
+        credit = _take_credit(credits, debit, window_days)
+        if credit is not None:
+            pairs.append((debit.id, credit.id))
+    return pairs
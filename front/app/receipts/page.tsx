@@ -302,7 +302,7 @@ function ReceiptDetail({ receipt, onClose, onUpdateLineItem, onComplete, categor
 
 function ReceiptsContent() {
   const formatCurrency = useCurrencyFormatter()
-  const { receipts, uploadReceipt, updateReceipt, categories } = useData()
+  const { receipts, uploadReceipt, loadReceipt, updateReceipt, categories } = useData()
   const [showUpload, setShowUpload] = useState(false)
   const [selectedReceipt, setSelectedReceipt] = useState<Receipt | null>(null)
   const [uploadingReceipt, setUploadingReceipt] = useState(false)
@@ -310,6 +310,15 @@ function ReceiptsContent() {
   const needsReview = useMemo(() => receipts.filter(r => r.status === 'needs_review'), [receipts])
   const completed = useMemo(() => receipts.filter(r => r.status === 'complete'), [receipts])
 
+  const openReceipt = (receipt: Receipt) => {
+    setSelectedReceipt(receipt)
+    if (!receipt.detailLoaded) {
+      loadReceipt(receipt.id).then(full => {
+        if (full) setSelectedReceipt(current => current?.id === full.id ? full : current)
+      })
+    }
+  }
+
   const handleUpload = async (file: File) => {
     if (!uploadReceipt) return
     setShowUpload(false)
@@ -383,7 +392,7 @@ function ReceiptsContent() {
                 <Card 
                   key={receipt.id}
                   className="cursor-pointer hover:bg-accent/50 transition-colors"
-                  onClick={() => setSelectedReceipt(receipt)}
+                  onClick={() => openReceipt(receipt)}
                 >
                   <CardContent className="p-4 flex items-center gap-4">
                     <div className="h-12 w-12 rounded-lg bg-secondary flex items-center justify-center">
@@ -392,7 +401,9 @@ function ReceiptsContent() {
                     <div className="flex-1 min-w-0">
                       <p className="font-medium">{receipt.merchant}</p>
                       <p className="text-sm text-muted-foreground">
-                        {receipt.lineItems.length} items · {receipt.lineItems.filter(li => !li.categoryId).length} unallocated
+                        {receipt.detailLoaded
+                          ? `${receipt.lineItems.length} items · ${receipt.lineItems.filter(li => !li.categoryId).length} unallocated`
+                          : 'Tap to review'}
                       </p>
                     </div>
                     <div className="text-right">
@@ -421,7 +432,7 @@ function ReceiptsContent() {
                 <Card 
                   key={receipt.id}
                   className="cursor-pointer hover:bg-accent/50 transition-colors"
-                  onClick={() => setSelectedReceipt(receipt)}
+                  onClick={() => openReceipt(receipt)}
                 >
                   <CardContent className="p-4 flex items-center gap-4">
                     <div className="h-12 w-12 rounded-lg bg-secondary flex items-center justify-center">
@@ -430,7 +441,7 @@ function ReceiptsContent() {
                     <div className="flex-1 min-w-0">
                       <p className="font-medium">{receipt.merchant}</p>
                       <p className="text-sm text-muted-foreground">
-                        {receipt.lineItems.length} items
+                        {receipt.detailLoaded ? `${receipt.lineItems.length} items` : 'Receipt'}
                       </p>
                     </div>
                     <div className="text-right">
@@ -148,6 +148,17 @@ export interface ApiReceipt {
   updatedAt?: string | null
 }
 
+// GET /receipts list projection; line items come from fetchReceipt.
+export interface ApiReceiptSummary {
+  receiptId: string
+  merchant: string
+  date: string
+  total: number
+  status: string
+  thumbnailUrl?: string | null
+  needsReview?: boolean
+}
+
 export class ApiError extends Error {
   status: number
   constructor(status: number, message: string) {
@@ -337,7 +348,11 @@ export async function updateBill(token: string, billId: string, payload: Partial
 }
 
 export async function fetchReceipts(token: string) {
-  return apiFetch<ApiReceipt[]>('/receipts', 'GET', { token })
+  return apiFetch<ApiReceiptSummary[]>('/receipts', 'GET', { token })
+}
+
+export async function fetchReceipt(token: string, receiptId: string) {
+  return apiFetch<ApiReceipt>(`/receipts/${receiptId}`, 'GET', { token })
 }
 
 export async function createReceipt(token: string, payload: Omit<ApiReceipt, 'receiptId' | 'createdAt' | 'updatedAt'>) {
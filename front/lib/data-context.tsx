@@ -29,6 +29,7 @@ import {
   resumeRecurring,
   stopRecurring,
   fetchReceipts,
+  fetchReceipt,
   createReceipt,
   updateReceipt,
   deleteReceipt,
@@ -47,6 +48,7 @@ import {
   type ApiRecurring,
   type ApiBill,
   type ApiReceipt,
+  type ApiReceiptSummary,
 } from './api'
 import type {
   Transaction,
@@ -97,6 +99,7 @@ interface DataContextType {
   attachReceiptToTransaction: (transactionId: string, receiptId: string | null) => void
   addReceipt: (receipt: Omit<Receipt, 'id'>) => string
   uploadReceipt: (file: File) => Promise<string | null>
+  loadReceipt: (id: string) => Promise<Receipt | null>
   importTransactionsFile: (file: File) => Promise<{ imported: number; skipped: number; errors: string[] } | null>
   updateReceipt: (id: string, updates: Partial<Receipt>) => void
   deleteReceipt: (id: string) => void
@@ -202,21 +205,26 @@ const mapApiBill = (bill: ApiBill): BillInstance => ({
   status: (bill.status || 'PROJECTED').toLowerCase() === 'paid' ? 'paid' : 'projected',
 })
 
-const mapApiReceipt = (rcpt: ApiReceipt): Receipt => ({
-  id: rcpt.receiptId,
-  imageUrl: rcpt.imageUrl || '',
-  merchant: rcpt.merchant || 'Receipt',
-  date: rcpt.date || new Date().toISOString().split('T')[0],
-  total: fromMinor(rcpt.total || 0),
-  lineItems: (rcpt.lineItems || []).map(li => ({
-    id: li.id,
-    description: li.description,
-    amount: fromMinor(li.amount),
-    categoryId: li.categoryId,
-  })),
-  status: (rcpt.status || 'uploading') as Receipt['status'],
-  transactionId: rcpt.transactionId || null,
-})
+const mapApiReceipt = (rcpt: ApiReceipt | ApiReceiptSummary): Receipt => {
+  const detail = 'lineItems' in rcpt ? rcpt : null
+  return {
+    id: rcpt.receiptId,
+    imageUrl: detail?.imageUrl || '',
+    merchant: rcpt.merchant || 'Receipt',
+    date: rcpt.date || new Date().toISOString().split('T')[0],
+    total: fromMinor(rcpt.total || 0),
+    lineItems: (detail?.lineItems || []).map(li => ({
+      id: li.id,
+      description: li.description,
+      amount: fromMinor(li.amount),
+      categoryId: li.categoryId,
+    })),
+    status: (rcpt.status || 'uploading') as Receipt['status'],
+    transactionId: detail?.transactionId || null,
+    thumbnailUrl: 'thumbnailUrl' in rcpt ? rcpt.thumbnailUrl ?? null : null,
+    detailLoaded: detail !== null,
+  }
+}
 
 const mapApiBudget = (b: ApiBudget, currency?: string): Budget => ({
   month: b.month || new Date().toISOString().slice(0, 7),
@@ -553,6 +561,18 @@ export function DataProvider({ children }: { children: ReactNode }) {
     }
   }, [authToken])
 
+  const loadReceiptHandler = useCallback(async (id: string) => {
+    if (!authToken) return null
+    try {
+      const mapped = mapApiReceipt(await fetchReceipt(authToken, id))
+      setReceipts(prev => prev.map(r => r.id === id ? mapped : r))
+      return mapped
+    } catch (err) {
+      console.error('Failed to load receipt', err)
+      return null
+    }
+  }, [authToken])
+
   const importTransactionsFile = useCallback(async (file: File) => {
     if (!authToken) return null
     const result = await importTransactions(authToken, file)
@@ -943,6 +963,7 @@ export function DataProvider({ children }: { children: ReactNode }) {
         stopRecurringPayment,
         updateBillInstance,
         uploadReceipt: uploadReceiptHandler,
+        loadReceipt: loadReceiptHandler,
         importTransactionsFile,
         updateReceipt: updateReceiptHandler,
         deleteReceipt: deleteReceiptHandler,
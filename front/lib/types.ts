@@ -99,6 +99,9 @@ export interface Receipt {
   lineItems: ReceiptLineItem[]
   status: 'uploading' | 'parsing' | 'needs_review' | 'complete'
   transactionId: string | null
+  thumbnailUrl?: string | null
+  // False for list entries until the detail (line items) is fetched.
+  detailLoaded?: boolean
 }
 
 export interface ReceiptLineItem {
@@ -1,28 +1,71 @@
 import json
 import os
-from typing import Any, Dict
-from urllib import request
+from typing import Any, Dict, List, Sequence
 
+import urllib3
+from urllib3.util.retry import Retry
 
-def post_ocr_result(payload: Dict[str, Any]) -> Dict[str, Any]:
+# Matches MAX_CALLBACK_BATCH on the backend.
+CALLBACK_BATCH_SIZE = 100
+
+# Module level so warm invocations reuse the keep-alive connection to the
+# backend. Callbacks are idempotent, so POSTs are retried on connection errors
+# and gateway/throttling responses.
+_http = urllib3.PoolManager(
+    timeout=urllib3.Timeout(connect=5.0, read=20.0),
+    retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=None,
+        raise_on_status=False,
+    ),
+)
+
+
+def _post(path: str, payload: Any) -> Dict[str, Any]:
     api_base = os.getenv("OCR_CALLBACK_BASE_URL", "http://localhost:8001/api/v1")
     token = os.getenv("INTERNAL_SERVICE_TOKEN", "dev-internal-token")
-    url = f"{api_base.rstrip('/')}/internal/receipts/ocr-callback"
-
-    body = json.dumps(payload).encode("utf-8")
-    req = request.Request(
-        url,
-        data=body,
-        method="POST",
+    resp = _http.request(
+        "POST",
+        f"{api_base.rstrip('/')}{path}",
+        body=json.dumps(payload).encode("utf-8"),
         headers={
             "Content-Type": "application/json",
             "X-Internal-Token": token,
         },
     )
+    response_data = resp.data.decode("utf-8")
+    if resp.status >= 400:
+        raise RuntimeError(f"OCR callback {path} failed: HTTP {resp.status} {response_data[:200]}")
+    return {
+        "statusCode": resp.status,
+        "body": response_data,
+    }
+
+
+def post_ocr_result(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return _post("/internal/receipts/ocr-callback", payload)
+
+
+def post_ocr_results(payloads: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Post results through the batch callback, one request per CALLBACK_BATCH_SIZE.
+
+    Returns the backend's per-result outcomes (`receiptId`, `updated`) in order.
+    """
+    outcomes: List[Dict[str, Any]] = []
+    for start in range(0, len(payloads), CALLBACK_BATCH_SIZE):
+        chunk = list(payloads[start:start + CALLBACK_BATCH_SIZE])
+        resp = _post("/internal/receipts/ocr-callback:batch", {"results": chunk})
+        outcomes.extend(json.loads(resp["body"])["results"])
+    return outcomes
+
 
-    with request.urlopen(req, timeout=20) as resp:
-        response_data = resp.read().decode("utf-8")
-        return {
-            "statusCode": resp.status,
-            "body": response_data,
-        }
+def lookup_ocr_cache(hashes: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Cached provider output by image hash (hits only), one request per CALLBACK_BATCH_SIZE."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    unique = list(dict.fromkeys(hashes))
+    for start in range(0, len(unique), CALLBACK_BATCH_SIZE):
+        resp = _post("/internal/ocr-cache:lookup", {"hashes": unique[start:start + CALLBACK_BATCH_SIZE]})
+        entries.update(json.loads(resp["body"])["entries"])
+    return entries
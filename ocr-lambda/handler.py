@@ -1,70 +1,193 @@
 import json
-from typing import Any, Dict, Iterable, List
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from callback import post_ocr_result
+from callback import lookup_ocr_cache, post_ocr_results
 from normalizer import normalize_receipt
-from providers import get_provider
+from providers import get_provider, image_sha256
 
+# Records of one batch run concurrently; Textract and the callback are I/O bound.
+MAX_WORKERS = max(int(os.getenv("OCR_MAX_WORKERS", "4")), 1)
+# Matches maxReceiveCount on the queue's redrive policy: OCR errors are left to
+# SQS until the last delivery, which reports `ocr_failed` to the backend instead.
+MAX_RECEIVES = max(int(os.getenv("OCR_MAX_RECEIVES", "3")), 1)
+# Content-addressed result cache on the backend (keyed by image SHA-256).
+CACHE_ENABLED = os.getenv("OCR_CACHE", "on").lower() != "off"
+METRICS_NAMESPACE = os.getenv("OCR_METRICS_NAMESPACE", "Ledger/OCR")
 
-def _records_from_event(event: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+# Module level so warm invocations reuse the threads.
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ocr")
+
+
+def _records_from_event(event: Dict[str, Any]) -> Iterable[Tuple[Optional[str], int, Any]]:
+    """(messageId, receive count, payload) per record; messageId is None for direct invocations."""
     records = event.get("Records")
     if isinstance(records, list):
         for rec in records:
-            body = rec.get("body") if isinstance(rec, dict) else None
+            if not isinstance(rec, dict):
+                yield None, 1, rec
+                continue
+            message_id = rec.get("messageId")
+            receives = int((rec.get("attributes") or {}).get("ApproximateReceiveCount", 1))
+            body = rec.get("body")
             if isinstance(body, str):
                 try:
-                    yield json.loads(body)
+                    yield message_id, receives, json.loads(body)
                     continue
                 except json.JSONDecodeError:
                     pass
-            if isinstance(rec, dict):
-                yield rec
+            yield message_id, receives, rec
         return
-    yield event
+    yield None, 1, event
+
 
+def _process_one(
+    payload: Dict[str, Any],
+    final_attempt: bool = True,
+    cached: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """OCR one receipt into its callback payload; "retry" leaves the message to SQS.
 
-def _process_one(payload: Dict[str, Any]) -> Dict[str, Any]:
+    With a `cached` entry (provider output for the same image bytes) the
+    provider is not called; only normalization runs.
+    """
     user_id = payload["user_id"]
     receipt_id = payload["receipt_id"]
     image_uri = payload["image_url"]
 
-    provider = get_provider()
     try:
-        ocr_result = provider.extract(image_uri)
+        if cached is not None:
+            ocr_result = {"provider": cached["provider"], "raw_text": cached["rawText"], "raw_blocks": cached["rawBlocks"]}
+            if cached.get("confidence") is not None:
+                ocr_result["confidence"] = cached["confidence"]
+        else:
+            ocr_result = get_provider().extract(image_uri)
         parsed = normalize_receipt(ocr_result["raw_text"], ocr_result.get("raw_blocks"))
-
-        callback_payload = {
-            "userId": user_id,
-            "receiptId": receipt_id,
-            "status": "ocr_done",
-            "merchant": parsed.get("merchant", ""),
-            "date": parsed.get("purchaseDate"),
-            "total": parsed.get("totals", {}).get("grandTotal", 0),
-            "lineItems": parsed.get("items", []),
-            "ocrProvider": ocr_result.get("provider", "unknown"),
-            "ocrConfidence": ocr_result.get("confidence", parsed.get("confidence", 0.0)),
-            "ocrRawText": ocr_result.get("raw_text", ""),
-            "ocrRawBlocks": ocr_result.get("raw_blocks", []),
-            "parsedReceipt": parsed,
-            "needsReview": bool(parsed.get("needsReview", True)),
-            "ocrError": None,
-        }
-        post_ocr_result(callback_payload)
-        return {"receipt_id": receipt_id, "status": "ok"}
     except Exception as exc:  # noqa: BLE001
+        if not final_attempt:
+            return {"receipt_id": receipt_id, "status": "retry", "error": str(exc)}
         failure_payload = {
             "userId": user_id,
             "receiptId": receipt_id,
             "status": "ocr_failed",
             "ocrError": str(exc),
             "needsReview": True,
+            "contentSha256": payload.get("content_sha256"),
         }
-        post_ocr_result(failure_payload)
-        return {"receipt_id": receipt_id, "status": "failed", "error": str(exc)}
+        return {"receipt_id": receipt_id, "status": "failed", "error": str(exc), "callback": failure_payload}
+
+    callback_payload = {
+        "userId": user_id,
+        "receiptId": receipt_id,
+        "status": "ocr_done",
+        "merchant": parsed.get("merchant", ""),
+        "date": parsed.get("purchaseDate"),
+        "total": parsed.get("totals", {}).get("grandTotal", 0),
+        "lineItems": parsed.get("items", []),
+        "ocrProvider": ocr_result.get("provider", "unknown"),
+        "ocrConfidence": ocr_result.get("confidence", parsed.get("confidence", 0.0)),
+        "ocrRawText": ocr_result.get("raw_text", ""),
+        "ocrRawBlocks": ocr_result.get("raw_blocks", []),
+        "parsedReceipt": parsed,
+        "needsReview": bool(parsed.get("needsReview", True)),
+        "ocrError": None,
+        "contentSha256": payload.get("content_sha256"),
+        "ocrCacheHit": cached is not None,
+    }
+    return {"receipt_id": receipt_id, "status": "ok", "cache_hit": cached is not None, "callback": callback_payload}
+
+
+def _hash_record(record: Tuple[Optional[str], int, Any]) -> Optional[str]:
+    """The job's content hash, computing it from the image when the backend could not."""
+    payload = record[2]
+    if not isinstance(payload, dict) or not isinstance(payload.get("image_url"), str):
+        return None
+    if not payload.get("content_sha256"):
+        payload["content_sha256"] = image_sha256(payload["image_url"])
+    return payload["content_sha256"]
+
+
+def _cached_outputs(records: List[Tuple[Optional[str], int, Any]]) -> Dict[str, Dict[str, Any]]:
+    """One cache lookup for the whole batch; lookup failures just mean no hits."""
+    if not CACHE_ENABLED:
+        return {}
+    hashes = [h for h in _executor.map(_hash_record, records) if h]
+    if not hashes:
+        return {}
+    try:
+        return lookup_ocr_cache(hashes)
+    except Exception:  # noqa: BLE001 - fall back to the provider
+        return {}
+
+
+def _emit_cache_metrics(hits: int, misses: int) -> None:
+    """CloudWatch embedded metric format: one log line becomes OcrCacheHits/OcrCacheMisses."""
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [[]],
+                "Metrics": [{"Name": "OcrCacheHits", "Unit": "Count"}, {"Name": "OcrCacheMisses", "Unit": "Count"}],
+            }],
+        },
+        "OcrCacheHits": hits,
+        "OcrCacheMisses": misses,
+    }), flush=True)
+
+
+def _run_record(record: Tuple[Optional[str], int, Any], cached: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    message_id, receives, payload = record
+    final_attempt = message_id is None or receives >= MAX_RECEIVES
+    try:
+        entry = cached.get(payload.get("content_sha256") or "") if isinstance(payload, dict) else None
+        result = _process_one(payload, final_attempt=final_attempt, cached=entry)
+    except Exception as exc:  # noqa: BLE001 - malformed payload
+        receipt_id = payload.get("receipt_id") if isinstance(payload, dict) else None
+        result = {"receipt_id": receipt_id, "status": "error", "error": str(exc)}
+    result["message_id"] = message_id
+    return result
+
+
+def _post_callbacks(results: List[Dict[str, Any]]) -> None:
+    """One batch callback for every result that has one; on failure those records are errors."""
+    pending = [result for result in results if "callback" in result]
+    if not pending:
+        return
+    try:
+        post_ocr_results([result.pop("callback") for result in pending])
+    except Exception as exc:  # noqa: BLE001 - backend unreachable after retries
+        for result in pending:
+            result.update(status="error", error=f"callback: {exc}")
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    results: List[Dict[str, Any]] = []
-    for payload in _records_from_event(event):
-        results.append(_process_one(payload))
-    return {"processed": len(results), "results": results}
+    """Process a batch concurrently and report undelivered records as `batchItemFailures`.
+
+    Images already in the OCR cache skip the provider (one lookup per batch);
+    the rest run on the thread pool. All results then reach the backend in
+    one batch callback, which also fills the cache. A record fails (and SQS
+    redelivers only it) when its payload is malformed, the callback could not
+    be posted, or OCR failed before the last delivery. Needs
+    `ReportBatchItemFailures` on the event source mapping.
+    """
+    records = list(_records_from_event(event))
+    cached = _cached_outputs(records)
+    results: List[Dict[str, Any]] = list(_executor.map(lambda record: _run_record(record, cached), records))
+    _post_callbacks(results)
+    hits = sum(1 for result in results if result.get("cache_hit"))
+    if CACHE_ENABLED:
+        _emit_cache_metrics(hits, len(results) - hits)
+    failures = [
+        {"itemIdentifier": result["message_id"]}
+        for result in results
+        if result["status"] in ("retry", "error") and result["message_id"] is not None
+    ]
+    return {
+        "processed": len(results),
+        "results": results,
+        "cache": {"hits": hits, "misses": len(results) - hits},
+        "batchItemFailures": failures,
+    }
@@ -1,71 +1,301 @@
+"""Receipt normalization: provider output -> itemized receipt JSON.
+
+Textract's AnalyzeExpense already labels what matters (`summary` blocks with
+TOTAL, VENDOR_NAME, INVOICE_RECEIPT_DATE, ...; `line_item` blocks with ITEM,
+PRICE, QUANTITY, UNIT_PRICE fields), so those are read directly. The
+line-by-line text heuristics only fill what the blocks lack, and handle
+providers that return plain lines (mock).
+
+Amounts are returned in minor units of the detected currency. Chilean
+receipts print pesos without decimals and with `.` thousands separators
+(`$12.345`), so `12.345` is twelve thousand pesos, not twelve and a bit.
+"""
+import os
 import re
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Currencies without minor units: amounts are whole units.
+ZERO_DECIMAL_CURRENCIES = {"CLP", "JPY", "KRW", "PYG"}
+# Used when the amounts themselves do not tell (no thousands groups, no decimals).
+DEFAULT_CURRENCY = os.getenv("OCR_DEFAULT_CURRENCY", "CLP").upper()
+# Below this mean field confidence (0-1) the receipt is flagged for review.
+REVIEW_CONFIDENCE = 0.8
+# Currencies whose receipts print month-first dates (`03/02/2026` is March 2nd).
+MONTH_FIRST_CURRENCIES = {"USD"}
+
+_AMOUNT_RE = re.compile(r"-?\$?\s?\d[\d.,]*")
+_GROUPED_RE = re.compile(r"\d{1,3}(?:([.,])\d{3})+")
+_DECIMAL_RE = re.compile(r"(\d{1,3}(?:[.,]\d{3})*|\d+)[.,](\d{1,2})")
+_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2}|\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})\b")
+_TOTAL_LABEL_RE = re.compile(r"\btotal\b", re.IGNORECASE)
+_NOT_TOTAL_RE = re.compile(r"sub\s*-?total|total\s+(?:items|art)", re.IGNORECASE)
+# Payment, change and tax lines carry amounts but are not purchased items.
+_NOT_ITEM_RE = re.compile(
+    r"\b(?:efectivo|vuelto|cambio|tarjeta|debito|credito|iva|neto|rut|propina|cash|change|card|tax|tip)\b",
+    re.IGNORECASE,
+)
+
+_MERCHANT_LABELS = ("VENDOR_NAME", "NAME")
+_TOTAL_LABELS = ("TOTAL", "AMOUNT_DUE")
+
+
+def _amount_tokens(text: str) -> List[str]:
+    return [t.replace("$", "").replace(" ", "") for t in _AMOUNT_RE.findall(text or "")]
+
+
+def _decimal_style(tokens: Iterable[str]) -> Optional[bool]:
+    """True when amounts carry 2-digit decimals, False when they use thousands groups, None when unknown."""
+    decimals = grouped = False
+    for token in tokens:
+        digits = token.lstrip("-")
+        if _GROUPED_RE.fullmatch(digits):
+            grouped = True
+        elif _DECIMAL_RE.fullmatch(digits) and len(_DECIMAL_RE.fullmatch(digits).group(2)) == 2:
+            decimals = True
+    if decimals != grouped:
+        return decimals
+    return None
+
+
+def detect_currency(texts: Iterable[str], default: str = DEFAULT_CURRENCY) -> str:
+    """CLP-style (`12.345`) vs decimal (`12.34`) amounts; `default` when the amounts do not tell."""
+    style = _decimal_style(token for text in texts for token in _amount_tokens(text))
+    if style is None:
+        return default
+    if style:
+        return default if default not in ZERO_DECIMAL_CURRENCIES else "USD"
+    return default if default in ZERO_DECIMAL_CURRENCIES else "CLP"
+
+
+def parse_amount(text: str, currency: str) -> Optional[int]:
+    """Last amount in `text`, in minor units of `currency`; None when there is none."""
+    tokens = _amount_tokens(text)
+    if not tokens:
+        return None
+    token = tokens[-1].rstrip(".,")
+    negative = token.startswith("-")
+    digits = token.lstrip("-")
+    scale = 1 if currency in ZERO_DECIMAL_CURRENCIES else 100
+    if _GROUPED_RE.fullmatch(digits):
+        value = int(re.sub(r"\D", "", digits)) * scale
+    elif _DECIMAL_RE.fullmatch(digits):
+        whole, fraction = _DECIMAL_RE.fullmatch(digits).groups()
+        whole_units = int(re.sub(r"\D", "", whole) or 0)
+        minor = int(fraction.ljust(2, "0"))
+        value = whole_units * 100 + minor if scale == 100 else whole_units + (1 if minor >= 50 else 0)
+    elif digits.isdigit():
+        value = int(digits) * scale
+    else:
+        return None
+    return -value if negative else value
+
+
+def _date_readings(text: str, month_first: bool = False) -> List[str]:
+    """Valid ISO readings of the first date in `text`, the preferred day/month order first."""
+    match = _DATE_RE.search(text or "")
+    if not match:
+        return []
+    raw = match.group(1)
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", raw):
+        try:
+            return [date.fromisoformat(raw).isoformat()]
+        except ValueError:
+            return []
+    first, second, year = (int(part) for part in re.split(r"[/.-]", raw))
+    if year < 100:
+        year += 2000
+    readings: List[str] = []
+    for month, day in ((first, second), (second, first)) if month_first else ((second, first), (first, second)):
+        try:
+            reading = date(year, month, day).isoformat()
+        except ValueError:
+            continue
+        if reading not in readings:
+            readings.append(reading)
+    return readings
+
+
+def parse_date(text: str, month_first: bool = False) -> Optional[str]:
+    """ISO date from `YYYY-MM-DD` or `DD/MM/YYYY`, `DD-MM-YY`, `DD.MM.YYYY`.
+
+    Day-first unless `month_first`; when only the other order is a valid date
+    (`12/31/2025`) that one is used.
+    """
+    readings = _date_readings(text, month_first)
+    return readings[0] if readings else None
 
-_AMOUNT_RE = re.compile(r"(-?\d+[\.,]\d{2})$")
-_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+
+def _summary_fields(raw_blocks: List[Dict[str, Any]]) -> Dict[str, Tuple[str, float]]:
+    """Label -> (text, confidence 0-1), keeping the most confident detection per label."""
+    fields: Dict[str, Tuple[str, float]] = {}
+    for block in raw_blocks:
+        if block.get("type") != "summary" or not (block.get("text") or "").strip():
+            continue
+        label = (block.get("label") or "").upper()
+        confidence = float(block.get("confidence") or 0.0) / 100.0
+        if label not in fields or confidence > fields[label][1]:
+            fields[label] = (block["text"].strip(), confidence)
+    return fields
 
 
-def _to_cents(amount_str: str) -> int:
-    normalized = amount_str.replace(",", ".")
-    return int(round(float(normalized) * 100))
+def _block_items(raw_blocks: List[Dict[str, Any]], currency: str) -> Tuple[List[Dict[str, Any]], List[float]]:
+    items: List[Dict[str, Any]] = []
+    confidences: List[float] = []
+    for block in raw_blocks:
+        if block.get("type") != "line_item":
+            continue
+        by_type = {(f.get("type") or "").upper(): f for f in block.get("fields", []) if (f.get("text") or "").strip()}
+        price = by_type.get("PRICE")
+        amount = parse_amount(price["text"], currency) if price else None
+        if amount is None:
+            continue
+        description = (by_type.get("ITEM") or {}).get("text") or "Item"
+        qty_field = by_type.get("QUANTITY")
+        unit_field = by_type.get("UNIT_PRICE")
+        qty_match = re.search(r"\d+(?:[.,]\d+)?", qty_field["text"]) if qty_field else None
+        confidence = float(block.get("confidence") or 0.0) / 100.0
+        confidences.append(confidence)
+        items.append({
+            "id": f"li_{len(items) + 1}",
+            "description": description.strip(),
+            "amount": amount,
+            "qty": float(qty_match.group(0).replace(",", ".")) if qty_match else None,
+            "unitPrice": parse_amount(unit_field["text"], currency) if unit_field else None,
+            "confidence": round(confidence, 4),
+        })
+    return items, confidences
 
 
-def normalize_receipt(raw_text: str, raw_blocks: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
-    lines = [ln.strip() for ln in raw_text.splitlines() if ln.strip()]
+def _text_items(lines: List[str], currency: str) -> List[Dict[str, Any]]:
     items: List[Dict[str, Any]] = []
-    merchant = lines[0] if lines else ""
-    purchase_date = None
+    for line in lines:
+        if _TOTAL_LABEL_RE.search(line) or _NOT_TOTAL_RE.search(line) or _NOT_ITEM_RE.search(line):
+            continue
+        tokens = _AMOUNT_RE.findall(line)
+        if not tokens or parse_date(line):
+            continue
+        amount = parse_amount(line, currency)
+        description = line[: line.rfind(tokens[-1])].strip(" -:\t$") or "Item"
+        if amount is None or not re.search(r"[^\W\d_]", description):
+            continue
+        items.append({
+            "id": f"li_{len(items) + 1}",
+            "description": description,
+            "amount": amount,
+            "qty": None,
+            "unitPrice": None,
+            "confidence": 0.7,
+        })
+    return items
+
 
+def _text_total(lines: List[str], currency: str) -> Optional[int]:
     for line in lines:
-        date_match = _DATE_RE.search(line)
-        if date_match and not purchase_date:
-            purchase_date = date_match.group(1)
+        if _TOTAL_LABEL_RE.search(line) and not _NOT_TOTAL_RE.search(line):
+            amount = parse_amount(line, currency)
+            if amount is not None:
+                return amount
+    return None
 
-        amount_match = _AMOUNT_RE.search(line)
-        if not amount_match:
-            continue
-        amount_cents = _to_cents(amount_match.group(1))
-        description = line[: amount_match.start()].strip(" -:\t") or "Item"
-        items.append(
-            {
-                "id": f"li_{len(items) + 1}",
-                "description": description,
-                "amount": amount_cents,
-                "qty": None,
-                "unitPrice": None,
-                "confidence": 0.7,
-            }
-        )
-
-    # Pick the largest positive amount as total if no explicit label is found.
-    total = 0
-    lower_lines = [ln.lower() for ln in lines]
-    for idx, ln in enumerate(lower_lines):
-        if "total" in ln:
-            m = _AMOUNT_RE.search(lines[idx])
-            if m:
-                total = _to_cents(m.group(1))
-                break
-    if total == 0 and items:
-        total = max(i["amount"] for i in items)
-
-    inferred_date = purchase_date or datetime.utcnow().date().isoformat()
-    subtotal = sum(i["amount"] for i in items if i["amount"] < total) if items else total
+
+def normalize_receipt(
+    raw_text: str,
+    raw_blocks: Optional[List[Dict[str, Any]]] = None,
+    currency: Optional[str] = None,
+) -> Dict[str, Any]:
+    blocks = raw_blocks or []
+    lines = [ln.strip() for ln in (raw_text or "").splitlines() if ln.strip()]
+    summary = _summary_fields(blocks)
+    has_blocks = bool(summary) or any(b.get("type") == "line_item" for b in blocks)
+
+    amount_texts = [text for text, _ in summary.values()] + [
+        f.get("text") or "" for b in blocks if b.get("type") == "line_item" for f in b.get("fields", [])
+        if (f.get("type") or "").upper() in ("PRICE", "UNIT_PRICE")
+    ]
+    currency = (currency or detect_currency(amount_texts if has_blocks else lines)).upper()
+
+    confidences: List[float] = []
+
+    def field(labels: Tuple[str, ...]) -> Optional[str]:
+        for label in labels:
+            if label in summary:
+                confidences.append(summary[label][1])
+                return summary[label][0]
+        return None
+
+    merchant = field(_MERCHANT_LABELS)
+    month_first = currency in MONTH_FIRST_CURRENCIES
+    date_readings = _date_readings(field(("INVOICE_RECEIPT_DATE",)) or "", month_first)
+    total_text = field(_TOTAL_LABELS)
+    total = parse_amount(total_text, currency) if total_text else None
+    subtotal_text = field(("SUBTOTAL",))
+    tax_text = field(("TAX",))
+    discount_text = field(("DISCOUNT",))
+    items, item_confidences = _block_items(blocks, currency)
+    source = "blocks" if has_blocks else "text"
+
+    # Text fallback for whatever the blocks did not provide.
+    if not merchant:
+        merchant = next((ln for ln in lines if re.search(r"[^\W\d_]{2,}", ln) and ":" not in ln), "")
+    if not date_readings:
+        date_readings = next((r for r in (_date_readings(ln, month_first) for ln in lines) if r), [])
+    if total is None:
+        total = _text_total(lines, currency)
+    if not items:
+        items = _text_items(lines, currency)
+        item_confidences = [item["confidence"] for item in items]
+    if total is None and items:
+        total = sum(i["amount"] for i in items)
+    if total is None:
+        # AMOUNT_PAID is the cash tendered on many receipts, so it is the last resort.
+        paid_text = field(("AMOUNT_PAID",))
+        total = (parse_amount(paid_text, currency) if paid_text else None) or 0
+
+    subtotal = parse_amount(subtotal_text, currency) if subtotal_text else None
+    tax = parse_amount(tax_text, currency) if tax_text else None
+    discount = parse_amount(discount_text, currency) if discount_text else None
+    if subtotal is None:
+        subtotal = sum(i["amount"] for i in items) if items else total
+    if tax is None:
+        tax = max(total - subtotal, 0)
+
+    all_confidences = confidences + item_confidences
+    confidence = sum(all_confidences) / len(all_confidences) if all_confidences and has_blocks else 0.7
+    items_sum = sum(i["amount"] for i in items)
+    # Items should add up to the total, before or after tax and discounts (one unit of rounding).
+    consistent = any(
+        abs(total - expected) <= 1 for expected in (items_sum, items_sum + tax, items_sum - abs(discount or 0))
+    )
+    purchase_date = date_readings[0] if date_readings else None
+    # Peso receipts are always day-first; elsewhere a date valid in both orders is a guess.
+    if not date_readings:
+        date_status = "missing"
+    elif len(date_readings) > 1 and currency not in ZERO_DECIMAL_CURRENCIES:
+        date_status = "ambiguous"
+    else:
+        date_status = "found"
+    needs_review = (
+        source == "text" or not total or date_status != "found" or not merchant
+        or confidence < REVIEW_CONFIDENCE or (bool(items) and not consistent)
+    )
 
     return {
         "merchant": merchant,
-        "purchaseDate": inferred_date,
-        "currency": "USD",
+        # Today stands in for a missing date; `dateStatus` says whether it was read from the receipt.
+        "purchaseDate": purchase_date or datetime.now(timezone.utc).date().isoformat(),
+        "dateStatus": date_status,
+        "currency": currency,
         "items": items,
         "totals": {
             "subtotal": subtotal,
-            "tax": max(total - subtotal, 0),
+            "tax": tax,
             "tip": 0,
-            "discount": 0,
+            "discount": abs(discount or 0),
             "grandTotal": total,
         },
-        "confidence": 0.7,
-        "needsReview": True,
-        "rawBlocksCount": len(raw_blocks or []),
+        "confidence": round(confidence, 4),
+        "needsReview": needs_review,
+        "source": source,
+        "rawBlocksCount": len(blocks),
     }
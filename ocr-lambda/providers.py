@@ -1,8 +1,11 @@
+import hashlib
 import os
+import threading
 from urllib.parse import urlparse
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
+from botocore.config import Config
 
 
 class OcrProvider:
@@ -28,7 +31,13 @@ class MockProvider(OcrProvider):
 class TextractProvider(OcrProvider):
     def __init__(self) -> None:
         region_name = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1"
-        self.client = boto3.client("textract", region_name=region_name)
+        # boto3 clients are thread-safe; size the connection pool for the handler's workers.
+        max_connections = max(int(os.getenv("OCR_MAX_WORKERS", "4")), 10)
+        self.client = boto3.client(
+            "textract",
+            region_name=region_name,
+            config=Config(max_pool_connections=max_connections),
+        )
 
     def _parse_s3_uri(self, image_uri: str) -> Tuple[str, str]:
         parsed = urlparse(image_uri)
@@ -119,8 +128,53 @@ class TextractProvider(OcrProvider):
         }
 
 
+# Clients shared by the handler's executor threads; created once under _clients_lock
+# (boto3's default session is not safe to build clients from concurrently).
+_clients_lock = threading.Lock()
+_s3_client: Any = None
+_HASH_CHUNK = 1024 * 1024
+
+
+def _get_s3_client() -> Any:
+    global _s3_client
+    if _s3_client is None:
+        with _clients_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client("s3")
+    return _s3_client
+
+
+def image_sha256(image_uri: str) -> Optional[str]:
+    """Hex SHA-256 of an s3:// image, streamed; None for other URIs or when it cannot be read.
+
+    Only used for jobs whose message carries no `content_sha256` (the backend
+    hashes uploads it can read cheaply). A failure just means no cache lookup.
+    """
+    parsed = urlparse(image_uri)
+    if parsed.scheme != "s3" or not parsed.netloc or not parsed.path:
+        return None
+    try:
+        body = _get_s3_client().get_object(Bucket=parsed.netloc, Key=parsed.path.lstrip("/"))["Body"]
+        digest = hashlib.sha256()
+        for chunk in body.iter_chunks(_HASH_CHUNK):
+            digest.update(chunk)
+        return digest.hexdigest()
+    except Exception:  # noqa: BLE001
+        return None
+
+
+# One provider per name for the life of the container, so warm invocations
+# reuse the Textract client and its connection pool.
+_providers: Dict[str, OcrProvider] = {}
+
+
 def get_provider() -> OcrProvider:
     provider_name = os.getenv("OCR_PROVIDER", "mock").lower()
-    if provider_name == "textract":
-        return TextractProvider()
-    return MockProvider()
+    provider = _providers.get(provider_name)
+    if provider is None:
+        with _clients_lock:
+            provider = _providers.get(provider_name)
+            if provider is None:
+                provider = TextractProvider() if provider_name == "textract" else MockProvider()
+                _providers[provider_name] = provider
+    return provider
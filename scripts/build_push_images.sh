@@ -16,7 +16,7 @@ API_IMAGE="${REGISTRY}/personal-finance-app-api:${IMAGE_TAG}"
 WEB_IMAGE="${REGISTRY}/personal-finance-app-web:${IMAGE_TAG}"
 
 echo "[build] $API_IMAGE"
-docker build --target prod -t "$API_IMAGE" "$ROOT_DIR/back"
+docker build --target prod --build-context "ocr-lambda=$ROOT_DIR/ocr-lambda" -t "$API_IMAGE" "$ROOT_DIR/back"
 
 echo "[build] $WEB_IMAGE (NEXT_PUBLIC_API_BASE_URL=$NEXT_PUBLIC_API_BASE_URL)"
 docker build \